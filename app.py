@@ -1,21 +1,387 @@
-from flask import Flask, render_template, request, jsonify, flash, redirect, url_for
+from flask import (Flask, Response, abort, g, render_template, request, jsonify, flash,
+                   redirect, stream_with_context, url_for)
+import hashlib
+import json
+import logging
 import os
+import threading
+import time
+
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper(),
+                    format='%(asctime)s %(levelname)s [%(process)d] %(name)s: %(message)s')
+logger = logging.getLogger(__name__)
 
 # Import custom modules
-from utils.file_handler import FileHandler
+from utils import metrics
+from utils.candidate_store import CandidateStore
+from utils.df_store import DFStore
+from utils.disk_cache import DiskCache
+from utils.file_handler import FileHandler, EXTRACTOR_VERSION
+from utils.ingestion import IngestionPipeline
+from utils.job_queue import JobQueue
+from utils.ranking_cache import RankingCache
+from utils.ranking_store import RankingStore
+from utils.upload_store import UploadStore
 from models.resume_processor import ResumeProcessor
 from models.job_matcher import JobMatcher
+from models.hashing_matcher import HashingMatcher
+from models.dedup import NearDuplicateDetector
+from models.resume_index import ResumeIndex
+from models.embedding import build_embedder
+from models.vector_index import VectorIndex
 
 # Initialize Flask app
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
 app.config['UPLOAD_FOLDER'] = 'static/uploads'
+# Uploads are stored once per distinct content under UPLOAD_STORE_DIR; the
+# filename -> digest index lives next to the other SQLite files in data/.
+app.config['UPLOAD_STORE_DIR'] = os.environ.get('UPLOAD_STORE_DIR', 'static/uploads/blobs')
+app.config['UPLOAD_INDEX_PATH'] = os.environ.get('UPLOAD_INDEX_PATH', 'data/uploads.sqlite3')
+app.config['UPLOAD_MAX_BYTES'] = int(os.environ.get('UPLOAD_MAX_BYTES', 2 * 1024 ** 3))
+app.config['UPLOAD_RETENTION_DAYS'] = float(os.environ.get('UPLOAD_RETENTION_DAYS', 30))
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max
+app.config['EXTRACTION_CACHE_PATH'] = os.environ.get(
+    'EXTRACTION_CACHE_PATH', 'data/cache/extraction.sqlite3')
+app.config['EXTRACTION_CACHE_MAX_BYTES'] = int(os.environ.get(
+    'EXTRACTION_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+# Only the first pages/characters of each upload are extracted and ranked
+app.config['EXTRACT_MAX_PAGES'] = int(os.environ.get('EXTRACT_MAX_PAGES', 10))
+app.config['EXTRACT_MAX_CHARS'] = int(os.environ.get('EXTRACT_MAX_CHARS', 100_000))
+# Processed text and skills of every ingested resume, keyed by file digest
+app.config['CANDIDATES_DB_PATH'] = os.environ.get('CANDIDATES_DB_PATH', 'data/candidates.sqlite3')
+app.config['RESUME_INDEX_DIR'] = os.environ.get('RESUME_INDEX_DIR', 'data/index')
+# Index that ranks the stored pool: 'tfidf' (ResumeIndex, exact) or
+# 'embedding' (VectorIndex, approximate IVF search over dense vectors).
+# EMBEDDING_BACKEND is 'auto', 'transformer', 'lsa' or 'hashing'; 'auto'
+# uses the sentence-transformers model saved at EMBEDDING_MODEL if there is
+# one and LSA over TF-IDF otherwise. Nothing is downloaded.
+app.config['RANKING_BACKEND'] = os.environ.get('RANKING_BACKEND', 'tfidf')
+app.config['EMBEDDING_INDEX_DIR'] = os.environ.get('EMBEDDING_INDEX_DIR', 'data/embeddings')
+app.config['EMBEDDING_BACKEND'] = os.environ.get('EMBEDDING_BACKEND', 'auto')
+app.config['EMBEDDING_MODEL'] = os.environ.get('EMBEDDING_MODEL', 'models/embedding_model')
+app.config['EMBEDDING_DIM'] = int(os.environ.get('EMBEDDING_DIM', 256))
+app.config['EMBEDDING_NPROBE'] = int(os.environ.get('EMBEDDING_NPROBE', 32))
+# LSA is not fitted on a smaller pool; until then the embedding backend
+# ranks with the exact TF-IDF index
+app.config['EMBEDDING_MIN_DOCS'] = int(os.environ.get('EMBEDDING_MIN_DOCS', 500))
+# Finished rankings keyed by JD, resume files and matcher settings, shared by
+# every worker: an identical /upload or /demo request skips processing and
+# TF-IDF. Entries expire after RANKING_CACHE_TTL seconds.
+app.config['RANKING_CACHE_PATH'] = os.environ.get('RANKING_CACHE_PATH',
+                                                  'data/cache/rankings.sqlite3')
+app.config['RANKING_CACHE_MAX_BYTES'] = int(os.environ.get('RANKING_CACHE_MAX_BYTES',
+                                                           64 * 1024 * 1024))
+app.config['RANKING_CACHE_TTL'] = float(os.environ.get('RANKING_CACHE_TTL', 3600))
+app.config['RANKINGS_DIR'] = os.environ.get('RANKINGS_DIR', 'data/rankings')
+app.config['RESULTS_PER_PAGE'] = int(os.environ.get('RESULTS_PER_PAGE', 50))
+# Share of each single-JD score taken from skill overlap instead of TF-IDF
+# cosine (0 = pure cosine); SKILL_SCORE_MODE is 'weighted' or 'coverage'
+app.config['SKILL_SCORE_WEIGHT'] = float(os.environ.get('SKILL_SCORE_WEIGHT', 0.0))
+app.config['SKILL_SCORE_MODE'] = os.environ.get('SKILL_SCORE_MODE', 'weighted')
+# How uploads and bulk resume lists are vectorized: 'tfidf' fits TF-IDF per
+# request; 'hashing' hashes terms (HASHING_FEATURES buckets) and weights them
+# with document frequencies kept in DF_STATS_DIR and shared by every worker,
+# so scores do not depend on which resumes share a request. Only ingested
+# uploads are counted in those frequencies; demo and API resumes are not.
+app.config['MATCHER_MODE'] = os.environ.get('MATCHER_MODE', 'tfidf')
+app.config['DF_STATS_DIR'] = os.environ.get('DF_STATS_DIR', 'data/df_stats')
+app.config['HASHING_FEATURES'] = int(os.environ.get('HASHING_FEATURES', 2 ** 18))
+# Uploaded resumes whose word shingles overlap at least this much (MinHash
+# estimate) are shown once, as their best-scoring version, with the others
+# listed next to it. Every file is still scored; 0 lists each one separately.
+app.config['DEDUP_THRESHOLD'] = float(os.environ.get('DEDUP_THRESHOLD', 0.8))
+app.config['BULK_MAX_JOB_DESCRIPTIONS'] = int(os.environ.get('BULK_MAX_JOB_DESCRIPTIONS', 200))
+# Processes each web worker uses to extract/preprocess an upload batch; 0 or 1
+# = in-request serial loop. By default the cores are split between the
+# GUNICORN_WORKERS workers rather than every worker starting one per core.
+app.config['INGEST_WORKERS'] = int(os.environ.get(
+    'INGEST_WORKERS', max(1, (os.cpu_count() or 1) // int(os.environ.get('GUNICORN_WORKERS', 4)))))
+# Background ranking jobs (POST /api/jobs, or the upload form's background option)
+app.config['JOBS_DB_PATH'] = os.environ.get('JOBS_DB_PATH', 'data/jobs.sqlite3')
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))
+# Trained ResumeClassifier (models/ml_model.py) behind /api/classify; the
+# endpoint answers 503 while there is no usable model file
+app.config['CLASSIFIER_MODEL_PATH'] = os.environ.get('CLASSIFIER_MODEL_PATH',
+                                                     'models/resume_classifier.pkl')
+# Where each gunicorn worker leaves its metrics snapshot for /metrics to merge
+app.config['METRICS_DIR'] = os.environ.get('METRICS_DIR', 'data/metrics')
 
 # Initialize components
-file_handler = FileHandler(app.config['UPLOAD_FOLDER'])
+metrics.REGISTRY.configure(app.config['METRICS_DIR'])
+extraction_cache = DiskCache(app.config['EXTRACTION_CACHE_PATH'],
+                             max_bytes=app.config['EXTRACTION_CACHE_MAX_BYTES'],
+                             version=EXTRACTOR_VERSION)
+upload_store = UploadStore(app.config['UPLOAD_STORE_DIR'], app.config['UPLOAD_INDEX_PATH'],
+                           max_bytes=app.config['UPLOAD_MAX_BYTES'],
+                           retention_seconds=app.config['UPLOAD_RETENTION_DAYS'] * 86400)
+file_handler = FileHandler(app.config['UPLOAD_FOLDER'], cache=extraction_cache,
+                           max_pages=app.config['EXTRACT_MAX_PAGES'],
+                           max_chars=app.config['EXTRACT_MAX_CHARS'],
+                           store=upload_store)
 resume_processor = ResumeProcessor()
-job_matcher = JobMatcher()
+# Stored candidates and cached rankings depend on extraction and processing
+processing_version = f'{file_handler.extraction_version}|{resume_processor.version}'
+candidate_store = CandidateStore(app.config['CANDIDATES_DB_PATH'], version=processing_version)
+df_store = None
+if app.config['MATCHER_MODE'] == 'hashing':
+    df_store = DFStore(app.config['DF_STATS_DIR'], n_features=app.config['HASHING_FEATURES'])
+    job_matcher = HashingMatcher(df_store, skill_weight=app.config['SKILL_SCORE_WEIGHT'],
+                                 skill_mode=app.config['SKILL_SCORE_MODE'])
+elif app.config['MATCHER_MODE'] == 'tfidf':
+    job_matcher = JobMatcher(skill_weight=app.config['SKILL_SCORE_WEIGHT'],
+                             skill_mode=app.config['SKILL_SCORE_MODE'])
+else:
+    raise ValueError(f"MATCHER_MODE must be 'tfidf' or 'hashing', "
+                     f"got {app.config['MATCHER_MODE']!r}")
+near_duplicates = (NearDuplicateDetector(threshold=app.config['DEDUP_THRESHOLD'])
+                   if app.config['DEDUP_THRESHOLD'] > 0 else None)
+resume_index = ResumeIndex(app.config['RESUME_INDEX_DIR'])
+vector_index = None
+if app.config['RANKING_BACKEND'] == 'embedding':
+    vector_index = VectorIndex(app.config['EMBEDDING_INDEX_DIR'],
+                               build_embedder(app.config['EMBEDDING_BACKEND'],
+                                              app.config['EMBEDDING_MODEL'],
+                                              app.config['EMBEDDING_DIM']),
+                               preprocess=resume_processor.preprocessor.preprocess_text,
+                               nprobe=app.config['EMBEDDING_NPROBE'],
+                               min_fit_docs=app.config['EMBEDDING_MIN_DOCS'],
+                               fallback=resume_index)
+elif app.config['RANKING_BACKEND'] != 'tfidf':
+    raise ValueError(f"RANKING_BACKEND must be 'tfidf' or 'embedding', "
+                     f"got {app.config['RANKING_BACKEND']!r}")
+# What /api/index/rank and the upload form's pool ranking search; bulk
+# ranking always uses the TF-IDF index.
+pool_index = vector_index if vector_index is not None else resume_index
+ranking_store = RankingStore(app.config['RANKINGS_DIR'])
+ranking_cache = RankingCache(app.config['RANKING_CACHE_PATH'],
+                             max_bytes=app.config['RANKING_CACHE_MAX_BYTES'],
+                             ttl=app.config['RANKING_CACHE_TTL'],
+                             version=processing_version)
+ingestion_pipeline = IngestionPipeline(file_handler, resume_processor,
+                                       workers=app.config['INGEST_WORKERS'],
+                                       candidates=candidate_store)
+job_queue = JobQueue(app.config['JOBS_DB_PATH'], workers=app.config['JOB_WORKERS'])
+# Index refits run one at a time on their own thread, so a long refit never
+# holds up the JOB_WORKERS that user ranking jobs wait for.
+refit_queue = JobQueue(app.config['JOBS_DB_PATH'], workers=1)
+# Indexes with a refit queued by this worker (see _queue_refit)
+_refits_queued = set()
+_refit_lock = threading.Lock()
+resume_classifier = None
+if os.path.exists(app.config['CLASSIFIER_MODEL_PATH']):
+    # Loaded at import so preloaded gunicorn workers share one copy
+    from models.ml_model import ResumeClassifier
+
+    resume_classifier = ResumeClassifier().load(app.config['CLASSIFIER_MODEL_PATH'])
+    if resume_classifier.vectorizer is None:
+        # Trained on a feature matrix: it cannot vectorize resume text itself
+        logger.error("Classifier %s has no fitted vectorizer; /api/classify is disabled",
+                     app.config['CLASSIFIER_MODEL_PATH'])
+        resume_classifier = None
+
+
+def warm_up():
+    """Load everything that is otherwise initialised lazily on first request.
+
+    gunicorn.conf.py calls this in the master when ``preload_app`` is on, so
+    the forked workers share these pages instead of each importing NLTK and
+    scikit-learn on its first upload.
+    """
+    resume_processor.preprocessor.preprocess_text('warm up the text preprocessing pipeline')
+    job_matcher.calculate_similarity_scores([{'processed_text': 'java engineer'}],
+                                            'python developer')
+    len(resume_index)
+    len(pool_index)
+    # Warm-up work is not traffic
+    metrics.REGISTRY.reset()
+
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_request(response):
+    start = g.get('request_start')
+    endpoint = request.endpoint or 'unmatched'
+    if start is not None:
+        metrics.HTTP_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint)
+    metrics.HTTP_REQUESTS.inc(endpoint=endpoint, method=request.method,
+                              status=response.status_code)
+    return response
+
+
+def _save_uploads(files):
+    """Save uploaded files; returns ``(filename, path)`` pairs and warnings for skipped ones."""
+    saved, skipped = [], []
+    for file in files:
+        if file.filename == '':
+            continue
+
+        logger.debug("Saving file: %s", file.filename)
+
+        # Check file type
+        if not file_handler.allowed_file(file.filename):
+            skipped.append(f'File type not supported: {file.filename}')
+            continue
+
+        # Save file
+        file_path = file_handler.save_file(file)
+        if not file_path:
+            skipped.append(f'Could not save file: {file.filename}')
+            continue
+
+        saved.append((file.filename, file_path))
+    return saved, skipped
+
+
+def _index_resumes(resume_data):
+    """Add processed resumes to the stored candidate pool.
+
+    Resumes are keyed by file digest, so the same file uploaded under two
+    names is one candidate; resumes without one fall back to the filename.
+    New resumes are embedded in one batch when the embedding backend is on,
+    and counted in the shared document frequencies in hashing mode. Index
+    refits are queued as background jobs rather than run here.
+    """
+    ids = [res.get('digest') or res['filename'] for res in resume_data]
+    texts = [res['processed_text'] for res in resume_data]
+    meta = [{'filename': res['filename'], 'skills': res['skills'],
+             'skill_count': res['skill_count']} for res in resume_data]
+    for index in (resume_index, vector_index):
+        if index is None:
+            continue
+        try:
+            index.add(ids, texts, meta)
+            if index.needs_refit():
+                _queue_refit(index)
+        except Exception as e:
+            logger.error("Could not update %s: %s", type(index).__name__, e)
+    if df_store is not None:
+        try:
+            job_matcher.observe(resume_data)
+        except Exception as e:
+            logger.error("Could not update document frequencies: %s", e)
+
+
+def _queue_refit(index):
+    """Refit ``index`` on ``refit_queue``, at most once at a time per worker."""
+    with _refit_lock:
+        if index in _refits_queued:
+            return
+        _refits_queued.add(index)
+    refit_queue.submit(_run_refit_job, 0, index, kind='refit')
+
+
+def _run_refit_job(job, index):
+    """Background refit of a resume index, run by ``refit_queue``."""
+    try:
+        return {'index': type(index).__name__, 'refitted': index.refit(),
+                'resumes': len(index)}
+    finally:
+        with _refit_lock:
+            _refits_queued.discard(index)
+
+
+def _collapse_duplicates(sims, resume_data):
+    """Scores and resumes with each near-duplicate cluster collapsed (see DEDUP_THRESHOLD)."""
+    if near_duplicates is None:
+        return sims, resume_data
+    return near_duplicates.collapse(resume_data, sims)
+
+
+def _flash_duplicates(ranked):
+    grouped = sum(len(res.get('duplicates') or ()) for res in ranked)
+    if grouped:
+        flash(f'{grouped} near-duplicate resume{"s were" if grouped > 1 else " was"} '
+              f'listed under a matching version.', 'info')
+
+
+def _run_ranking_job(job, saved, job_description):
+    """Background version of the /upload flow, run by ``job_queue``.
+
+    Each file is reported as soon as it is processed; the finished ranking is
+    stored in ``ranking_store`` and its id becomes the job result.
+    """
+    resume_data = []
+    for outcome in ingestion_pipeline.iter_run(saved):
+        if outcome['error']:
+            job.file_done(outcome['filename'], error=outcome['error'])
+            continue
+        processed = outcome['processed']
+        resume_data.append(processed)
+        job.file_done(outcome['filename'], data={'skills': processed['skills'],
+                                                 'skill_count': processed['skill_count']})
+
+    if not resume_data:
+        raise ValueError('No valid resumes were processed. Please check your files.')
+
+    _index_resumes(resume_data)
+    sims = job_matcher.calculate_similarity_scores(resume_data, job_description)
+    sims, resume_data = _collapse_duplicates(sims, resume_data)
+    ranking_id = ranking_store.save(sims, resume_data, job_description,
+                                    extra=_ranking_extra(job_description))
+    logger.info("Job %s ranked %d resumes", job.id, len(sims))
+    return {'ranking_id': ranking_id, 'total_resumes': len(sims),
+            'summary': job_matcher.summarize(sims)}
+
+
+def _job_status(job):
+    status = dict(job)
+    status['status_url'] = url_for('job_status', job_id=job['id'])
+    status['files_url'] = url_for('job_files', job_id=job['id'])
+    if job['status'] == 'done':
+        status['results_url'] = url_for('job_results', job_id=job['id'])
+        status['page_url'] = url_for('show_results', ranking_id=job['result']['ranking_id'])
+    return status
+
+
+def _ranking_extra(job_description):
+    """What a stored ranking keeps besides scores: the JD's skills, for matched/missing."""
+    return {'jd_skills': list(job_matcher.jd_skills(job_description))}
+
+
+def _skill_names(requested):
+    """Normalise requested skills to the names ``extract_skills`` produces."""
+    if isinstance(requested, str):
+        requested = requested.split(',')
+    names = []
+    for skill in requested or []:
+        skill = str(skill).strip()
+        if skill:
+            names.extend(resume_processor.extract_skills(skill) or [skill.lower()])
+    return list(dict.fromkeys(names))
+
+
+def _ranking_key(job_description, resumes):
+    """``ranking_cache`` key for ``(filename, content digest)`` pairs.
+
+    Taken again when storing a result: the matcher config can change while
+    ranking (hashing mode counts new resumes in the shared DF statistics).
+    """
+    config = dict(job_matcher.config(), dedup_threshold=app.config['DEDUP_THRESHOLD'])
+    return ranking_cache.key(job_description, resumes, config)
+
+
+def _upload_digests(saved):
+    """``(filename, digest)`` of saved uploads, or None when a file cannot be hashed."""
+    digests = [ingestion_pipeline.digest(path) for _, path in saved]
+    if not saved or not all(digests):
+        return None
+    return [(filename, digest) for (filename, _), digest in zip(saved, digests)]
+
+
+def _rank_pool(job_description):
+    sims, ids, meta = job_matcher.score_index(pool_index, job_description)
+    if not len(sims):
+        flash('The stored candidate pool is empty. Upload some resumes first.', 'warning')
+        return render_template('upload.html')
+    ranking_id = ranking_store.save(sims, meta, job_description, ids=ids,
+                                    extra=_ranking_extra(job_description))
+    flash(f'Ranked {len(sims)} stored resumes.', 'success')
+    return redirect(url_for('show_results', ranking_id=ranking_id))
 
 
 @app.route('/')
@@ -30,147 +396,417 @@ def upload_resumes():
         files = request.files.getlist('resumes')  # This gets ALL selected files
         job_description = request.form.get('job_description', '').strip()
 
-        print(f"DEBUG: Received {len(files)} files")
-        print(f"DEBUG: Job description length: {len(job_description)}")
+        logger.debug("Received %d files", len(files))
+        logger.debug("Job description length: %d", len(job_description))
 
         # Validation
         if not job_description:
             flash('Job description is required', 'error')
             return render_template('upload.html')
 
+        # Match against every previously ingested resume; no files needed
+        if request.form.get('pool'):
+            return _rank_pool(job_description)
+
         if not files or all(f.filename == '' for f in files):
             flash('Please upload at least one resume file', 'error')
             return render_template('upload.html')
 
-        # Process ALL uploaded files
+        # Save ALL uploaded files (FileStorage objects stay in this thread)
+        saved, skipped = _save_uploads(files)
+        for message in skipped:
+            flash(message, 'warning')
+
+        # Same JD and files as a recent request: reuse its scores
+        cache_resumes = _upload_digests(saved)
+        cached = (ranking_cache.get(_ranking_key(job_description, cache_resumes))
+                  if cache_resumes else None)
+        if cached is not None:
+            sims, meta = cached
+            ranking_id = ranking_store.save(sims, meta, job_description,
+                                            extra=_ranking_extra(job_description))
+            flash(f'Successfully ranked {len(sims)} resumes!', 'success')
+            _flash_duplicates(meta)
+            return redirect(url_for('show_results', ranking_id=ranking_id))
+
+        # Big batches can be ranked in the background; the page then polls
+        if request.form.get('background') and saved:
+            job_id = job_queue.submit(_run_ranking_job, len(saved), saved, job_description)
+            return redirect(url_for('show_job', job_id=job_id))
+
+        # Extract and process saved files (in parallel, results in upload order)
         resume_data = []
         processed_count = 0
-
-        for file in files:
-            if file.filename == '':
-                continue
-
-            print(f"DEBUG: Processing file: {file.filename}")
-
-            # Check file type
-            if not file_handler.allowed_file(file.filename):
-                flash(f'File type not supported: {file.filename}', 'warning')
-                continue
-
-            # Save file
-            file_path = file_handler.save_file(file)
-            if not file_path:
-                flash(f'Could not save file: {file.filename}', 'warning')
-                continue
-
-            # Extract text from file
-            resume_text = file_handler.extract_text(file_path)
-
-            if not resume_text or len(resume_text.strip()) < 50:  # Minimum text length
-                flash(f'Could not extract sufficient text from: {file.filename}', 'warning')
-                continue
-
-            print(f"DEBUG: Extracted {len(resume_text)} characters from {file.filename}")
-
-            # Process resume text
-            try:
-                processed = resume_processor.process_resume(resume_text)
-                processed['filename'] = file.filename
-                resume_data.append(processed)
-                processed_count += 1
-                print(f"DEBUG: Successfully processed {file.filename}")
-            except Exception as e:
-                print(f"ERROR: Failed to process {file.filename}: {e}")
-                flash(f'Error processing {file.filename}: {str(e)}', 'warning')
+        for outcome in ingestion_pipeline.run(saved):
+            if outcome['error']:
+                logger.warning(outcome['error'])
+                flash(outcome['error'], outcome['category'])
+                # Keep the warnings for the next identical request
+                cache_resumes = None
                 continue
+            resume_data.append(outcome['processed'])
+            processed_count += 1
+            logger.debug("Successfully processed %s", outcome['filename'])
 
         # Check if we have any valid resumes
         if not resume_data:
             flash('No valid resumes were processed. Please check your files.', 'error')
             return render_template('upload.html')
 
-        print(f"DEBUG: Successfully processed {processed_count} out of {len(files)} files")
+        logger.info("Processed %d out of %d files", processed_count, len(files))
+
+        # Keep the stored candidate pool up to date for /api/index/rank
+        _index_resumes(resume_data)
 
-        # Rank ALL resumes by percentage match
+        # Rank ALL resumes by percentage match, then list near-duplicates once
         try:
-            results = job_matcher.rank_resumes(resume_data, job_description)
+            sims = job_matcher.calculate_similarity_scores(resume_data, job_description)
+            sims, resume_data = _collapse_duplicates(sims, resume_data)
 
-            if not results:
+            if not len(sims):
                 flash('Could not rank resumes. Please try again.', 'error')
                 return render_template('upload.html')
 
-            print(f"DEBUG: Ranked {len(results)} resumes")
-            for i, result in enumerate(results[:3]):  # Show top 3
-                print(f"DEBUG: Rank {i + 1}: {result['filename']} - {result['percentage_match']}%")
+            logger.debug("Ranked %d resumes", len(sims))
+            if cache_resumes:
+                ranking_cache.set(_ranking_key(job_description, cache_resumes), sims, resume_data)
+
+            # Persist the ranking so its pages can be served later
+            ranking_id = ranking_store.save(sims, resume_data, job_description,
+                                            extra=_ranking_extra(job_description))
 
             # Add success message
-            flash(f'Successfully ranked {len(results)} resumes!', 'success')
+            flash(f'Successfully ranked {len(sims)} resumes!', 'success')
+            _flash_duplicates(resume_data)
 
-            return render_template('results.html',
-                                   results=results,
-                                   job_description=job_description,
-                                   total_resumes=len(results))
+            return redirect(url_for('show_results', ranking_id=ranking_id))
 
         except Exception as e:
-            print(f"ERROR: Ranking failed: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Ranking failed: %s", e)
             flash(f'Error ranking resumes: {str(e)}', 'error')
             return render_template('upload.html')
 
     return render_template('upload.html')
 
 
+# Sample data for demonstration
+DEMO_JOB_DESCRIPTION = """We are looking for a Python Developer with experience in machine learning, 
+data science, and web development. Requirements: Python, Flask, scikit-learn, pandas, SQL, 
+REST APIs, Git, and cloud platforms like AWS."""
+
+DEMO_RESUMES = [
+    {
+        'filename': 'john_doe_senior.pdf',
+        'text': '''John Doe - Senior Python Developer
+        5 years experience in Python development, machine learning, and data science.
+        Skills: Python, Flask, Django, scikit-learn, pandas, numpy, SQL, PostgreSQL, 
+        REST APIs, Git, AWS, Docker, machine learning algorithms, data analysis.
+        Experience with TensorFlow, Keras, and deep learning projects.'''
+    },
+    {
+        'filename': 'jane_smith_fullstack.pdf',
+        'text': '''Jane Smith - Full Stack Developer
+        3 years experience in web development. Some Python experience.
+        Skills: JavaScript, React, Node.js, Python, HTML, CSS, MongoDB, 
+        Express.js, Git, basic machine learning knowledge.'''
+    },
+    {
+        'filename': 'mike_jones_data.pdf',
+        'text': '''Mike Jones - Data Scientist
+        4 years in data science and analytics. Strong Python background.
+        Skills: Python, pandas, numpy, scikit-learn, matplotlib, seaborn,
+        SQL, Jupyter, statistics, machine learning, data visualization,
+        AWS, big data processing.'''
+    }
+]
+
+
 @app.route('/demo')
 def demo():
-    # Sample data for demonstration
-    job_description = """We are looking for a Python Developer with experience in machine learning, 
-    data science, and web development. Requirements: Python, Flask, scikit-learn, pandas, SQL, 
-    REST APIs, Git, and cloud platforms like AWS."""
-
-    sample_resumes = [
-        {
-            'filename': 'john_doe_senior.pdf',
-            'text': '''John Doe - Senior Python Developer
-            5 years experience in Python development, machine learning, and data science.
-            Skills: Python, Flask, Django, scikit-learn, pandas, numpy, SQL, PostgreSQL, 
-            REST APIs, Git, AWS, Docker, machine learning algorithms, data analysis.
-            Experience with TensorFlow, Keras, and deep learning projects.'''
-        },
-        {
-            'filename': 'jane_smith_fullstack.pdf',
-            'text': '''Jane Smith - Full Stack Developer
-            3 years experience in web development. Some Python experience.
-            Skills: JavaScript, React, Node.js, Python, HTML, CSS, MongoDB, 
-            Express.js, Git, basic machine learning knowledge.'''
-        },
-        {
-            'filename': 'mike_jones_data.pdf',
-            'text': '''Mike Jones - Data Scientist
-            4 years in data science and analytics. Strong Python background.
-            Skills: Python, pandas, numpy, scikit-learn, matplotlib, seaborn,
-            SQL, Jupyter, statistics, machine learning, data visualization,
-            AWS, big data processing.'''
-        }
-    ]
-
-    # Process sample resumes
-    resume_data = []
-    for resume in sample_resumes:
-        processed = resume_processor.process_resume(resume['text'])
-        processed['filename'] = resume['filename']
-        resume_data.append(processed)
+    job_description = DEMO_JOB_DESCRIPTION
+    # The samples never change, so after the first request (in any worker)
+    # the ranking comes from the cache
+    cache_resumes = [
+        (resume['filename'], hashlib.sha256(resume['text'].encode('utf-8')).hexdigest())
+        for resume in DEMO_RESUMES]
+    cached = ranking_cache.get(_ranking_key(job_description, cache_resumes))
+    if cached is not None:
+        sims, resume_data = cached
+    else:
+        # Process sample resumes
+        resume_data = []
+        for resume in DEMO_RESUMES:
+            processed = resume_processor.process_resume(resume['text'])
+            processed['filename'] = resume['filename']
+            resume_data.append(processed)
 
-    # Rank resumes by percentage
-    results = job_matcher.rank_resumes(resume_data, job_description)
+        # Rank resumes by percentage
+        sims = job_matcher.calculate_similarity_scores(resume_data, job_description)
+        ranking_cache.set(_ranking_key(job_description, cache_resumes), sims, resume_data)
+    results = job_matcher.rank_scores(sims, resume_data,
+                                      jd_skills=job_matcher.jd_skills(job_description))
 
     return render_template('results.html',
                            results=results,
                            job_description=job_description,
                            total_resumes=len(resume_data),
+                           summary=job_matcher.summarize(sims),
                            is_demo=True)
 
 
+@app.route('/results/<ranking_id>')
+def show_results(ranking_id):
+    """One page of a stored ranking; only that page's rows are built."""
+    loaded = ranking_store.load(ranking_id)
+    if loaded is None:
+        flash('That ranking has expired. Please rank the resumes again.', 'warning')
+        return redirect(url_for('upload_resumes'))
+    sims, payload = loaded
+
+    per_page = min(max(request.args.get('per_page', app.config['RESULTS_PER_PAGE'], type=int), 1), 500)
+    pages = max(1, -(-len(sims) // per_page))
+    page = min(max(request.args.get('page', 1, type=int), 1), pages)
+
+    results = job_matcher.rank_scores(sims, payload['meta'], payload['ids'],
+                                      top_k=per_page, offset=(page - 1) * per_page,
+                                      jd_skills=payload.get('jd_skills'))
+
+    return render_template('results.html',
+                           results=results,
+                           job_description=payload['job_description'],
+                           total_resumes=len(sims),
+                           summary=job_matcher.summarize(sims),
+                           ranking_id=ranking_id,
+                           page=page,
+                           pages=pages,
+                           per_page=per_page)
+
+
+@app.route('/results/<ranking_id>/export.csv')
+def export_results(ranking_id):
+    """Full ranking as CSV, streamed in page-sized chunks."""
+    loaded = ranking_store.load(ranking_id)
+    if loaded is None:
+        abort(404)
+    sims, payload = loaded
+    chunk = app.config['RESULTS_PER_PAGE']
+
+    def rows():
+        yield 'Rank,Filename,Match Percentage,Skills Count,Skills\n'
+        for offset in range(0, len(sims), chunk):
+            for r in job_matcher.rank_scores(sims, payload['meta'], payload['ids'],
+                                             top_k=chunk, offset=offset):
+                filename = str(r['filename']).replace('"', '""')
+                skills = '; '.join(r['skills']).replace('"', '""')
+                yield f'{r["rank"]},"{filename}",{r["percentage_match"]},{r["skill_count"]},"{skills}"\n'
+
+    return Response(rows(), mimetype='text/csv', headers={
+        'Content-Disposition': 'attachment; filename=resume_ranking_results.csv'})
+
+
+@app.route('/api/index/rank', methods=['POST'])
+def rank_index():
+    """Rank every stored resume against a JSON ``job_description``.
+
+    Optional ``must_have``: skills (a list, or one comma-separated string)
+    every returned resume must list; names are matched like the skills
+    extracted from resumes, so aliases such as "Node.js" work. Optional
+    ``skill_weight`` (0-1) overrides ``SKILL_SCORE_WEIGHT`` for this query.
+    """
+    payload = request.get_json(silent=True) or {}
+    job_description = str(payload.get('job_description', '')).strip()
+    if not job_description:
+        return jsonify({'error': 'job_description is required'}), 400
+    top_k = int(payload.get('top_k', 100))
+    offset = int(payload.get('offset', 0))
+    must_have = _skill_names(payload.get('must_have'))
+    skill_weight = payload.get('skill_weight')
+    if skill_weight is not None:
+        skill_weight = float(skill_weight)
+        if not 0.0 <= skill_weight <= 1.0:
+            return jsonify({'error': 'skill_weight must be between 0 and 1'}), 400
+
+    results = job_matcher.rank_index(pool_index, job_description, top_k=top_k, offset=offset,
+                                     must_have=must_have, skill_weight=skill_weight)
+    return jsonify({'total_resumes': len(pool_index), 'offset': offset,
+                    'results': results.to_dicts()})
+
+
+@app.route('/api/rank/bulk', methods=['POST'])
+def rank_bulk():
+    """Top-k resumes for many job descriptions in one pass.
+
+    JSON body: ``job_descriptions`` (list of strings), optional ``top_k`` and
+    optional ``resumes`` (list of ``{"filename", "text"}``). Without
+    ``resumes`` the stored resume index is ranked.
+    """
+    payload = request.get_json(silent=True) or {}
+    job_descriptions = [str(jd).strip() for jd in payload.get('job_descriptions') or []]
+    if not job_descriptions or not all(job_descriptions):
+        return jsonify({'error': 'job_descriptions must be a list of non-empty strings'}), 400
+    if len(job_descriptions) > app.config['BULK_MAX_JOB_DESCRIPTIONS']:
+        return jsonify({'error': f"at most {app.config['BULK_MAX_JOB_DESCRIPTIONS']} "
+                                 f"job descriptions per request"}), 400
+    top_k = int(payload.get('top_k', 10))
+
+    if payload.get('resumes'):
+        resume_data = []
+        for i, resume in enumerate(payload['resumes']):
+            processed = resume_processor.process_resume(str(resume.get('text', '')))
+            processed['filename'] = resume.get('filename') or f'Resume_{i + 1}'
+            resume_data.append(processed)
+        rankings = job_matcher.rank_many(resume_data, job_descriptions, top_k=top_k)
+        total = len(resume_data)
+    else:
+        rankings = job_matcher.rank_many_index(resume_index, job_descriptions, top_k=top_k)
+        total = len(resume_index)
+
+    return jsonify({
+        'total_resumes': total,
+        'rankings': [{'job_index': i, 'results': results}
+                     for i, results in enumerate(rankings)],
+    })
+
+
+@app.route('/api/classify', methods=['POST'])
+def classify_resumes():
+    """Predicted category of every uploaded ``resumes`` file, in one batch."""
+    if resume_classifier is None:
+        return jsonify({'error': 'no trained classifier is installed'}), 503
+    saved, skipped = _save_uploads(request.files.getlist('resumes'))
+    if not saved:
+        return jsonify({'error': 'no supported resume files were uploaded',
+                        'skipped': skipped}), 400
+
+    resume_data, errors = [], []
+    for outcome in ingestion_pipeline.run(saved):
+        if outcome['error']:
+            errors.append(outcome['error'])
+        else:
+            resume_data.append(outcome['processed'])
+    results = []
+    if resume_data:
+        labels, confidence = resume_classifier.predict_batch(resume_data)
+        results = [{'filename': res['filename'], 'category': label,
+                    'confidence': round(float(conf), 4)}
+                   for res, label, conf in zip(resume_data, labels.tolist(), confidence)]
+    return jsonify({'results': results, 'skipped': skipped + errors})
+
+
+@app.route('/jobs/<job_id>')
+def show_job(job_id):
+    """Progress page for a background ranking; redirects to the results when done."""
+    job = job_queue.get(job_id)
+    if job is None:
+        abort(404)
+    if job['status'] == 'done':
+        return redirect(url_for('show_results', ranking_id=job['result']['ranking_id']))
+    return render_template('job.html', job=job)
+
+
+@app.route('/api/jobs', methods=['POST'])
+def create_job():
+    """Start a background ranking of uploaded ``resumes`` against ``job_description``.
+
+    Returns 202 with the job id straight away; poll ``status_url`` (or read
+    ``/api/jobs/<id>/stream``) for progress.
+    """
+    files = request.files.getlist('resumes')
+    job_description = request.form.get('job_description', '').strip()
+    if not job_description:
+        return jsonify({'error': 'job_description is required'}), 400
+
+    saved, skipped = _save_uploads(files)
+    if not saved:
+        return jsonify({'error': 'no supported resume files were uploaded',
+                        'skipped': skipped}), 400
+
+    job_id = job_queue.submit(_run_ranking_job, len(saved), saved, job_description)
+    status = _job_status(job_queue.get(job_id))
+    status['skipped'] = skipped
+    return jsonify(status), 202
+
+
+@app.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'unknown job'}), 404
+    return jsonify(_job_status(job))
+
+
+@app.route('/api/jobs/<job_id>/files')
+def job_files(job_id):
+    """Per-file outcomes recorded after sequence number ``after``."""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'unknown job'}), 404
+    events = job_queue.events(job_id, after=request.args.get('after', 0, type=int))
+    return jsonify({'status': job['status'], 'processed': job['processed'],
+                    'total': job['total'], 'files': events})
+
+
+@app.route('/api/jobs/<job_id>/stream')
+def job_stream(job_id):
+    """Newline-delimited JSON: one line per processed file, then the final status."""
+    if job_queue.get(job_id) is None:
+        return jsonify({'error': 'unknown job'}), 404
+
+    def lines():
+        after = 0
+        while True:
+            job = job_queue.get(job_id)
+            for event in job_queue.events(job_id, after=after):
+                after = event['seq']
+                yield json.dumps(event) + '\n'
+            if job['status'] in ('done', 'failed'):
+                # Events written between the two reads above are flushed here
+                for event in job_queue.events(job_id, after=after):
+                    yield json.dumps(event) + '\n'
+                yield json.dumps(_job_status(job)) + '\n'
+                return
+            time.sleep(0.5)
+
+    return Response(stream_with_context(lines()), mimetype='application/x-ndjson')
+
+
+@app.route('/api/jobs/<job_id>/results')
+def job_results(job_id):
+    """Ranked results of a finished job, ``top_k`` at a time from ``offset``."""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'unknown job'}), 404
+    if job['status'] != 'done':
+        return jsonify(_job_status(job)), 409
+    loaded = ranking_store.load(job['result']['ranking_id'])
+    if loaded is None:
+        return jsonify({'error': 'the ranking for this job has expired'}), 410
+    sims, payload = loaded
+    top_k = int(request.args.get('top_k', 100))
+    offset = int(request.args.get('offset', 0))
+
+    results = job_matcher.rank_scores(sims, payload['meta'], payload['ids'],
+                                      top_k=top_k, offset=offset,
+                                      jd_skills=payload.get('jd_skills'))
+    return jsonify({'total_resumes': len(sims), 'offset': offset,
+                    'summary': job_matcher.summarize(sims), 'results': results.to_dicts()})
+
+
+@app.route('/api/cache/stats')
+def cache_stats():
+    stats = {'extraction': extraction_cache.stats(), 'uploads': upload_store.stats(),
+             'candidates': candidate_store.stats(), 'rankings': ranking_cache.stats()}
+    if df_store is not None:
+        stats['document_frequencies'] = df_store.stats()
+    return jsonify(stats)
+
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Stage timings and counters of every worker, in Prometheus text format."""
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+
 @app.errorhandler(404)
 def not_found(e):
     return render_template('404.html'), 404
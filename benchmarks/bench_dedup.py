@@ -0,0 +1,96 @@
+"""Near-duplicate grouping: all-pairs Jaccard vs MinHash + LSH banding.
+
+Builds a synthetic pool (``corpus.py``) and adds ``--revisions`` edited
+copies of its first resumes (a few words changed, a line added), then
+groups it two ways: exact Jaccard over every pair of shingle sets
+(quadratic, only up to ``--exact-max`` resumes) and
+``NearDuplicateDetector.clusters``. Reports time and how many revisions
+each one put with their original.
+
+    python benchmarks/bench_dedup.py --resumes 10000 --revisions 500
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import corpus  # noqa: E402
+from models.dedup import NearDuplicateDetector  # noqa: E402
+
+
+def revise(rng, text, edits=3):
+    words = text.split()
+    for _ in range(edits):
+        words[rng.randrange(len(words))] = rng.choice(('updated', 'lead', 'senior', '2024'))
+    return ' '.join(words) + ' references available on request'
+
+
+def exact_clusters(detector, texts):
+    sets = [set(detector.shingles(text).tolist()) for text in texts]
+    parent = list(range(len(texts)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i in range(len(sets)):
+        for j in range(i + 1, len(sets)):
+            union = len(sets[i] | sets[j])
+            if union and len(sets[i] & sets[j]) / union >= detector.threshold:
+                parent[find(j)] = find(i)
+    groups = {}
+    for i in range(len(texts)):
+        groups.setdefault(find(i), []).append(i)
+    return list(groups.values())
+
+
+def found(clusters, n_base, n_revisions):
+    """Revisions clustered with the resume they were made from."""
+    owner = {i: k for k, group in enumerate(clusters) for i in group}
+    return sum(owner[n_base + i] == owner[i] for i in range(n_revisions))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--resumes', type=int, default=10_000)
+    parser.add_argument('--revisions', type=int, default=500)
+    parser.add_argument('--threshold', type=float, default=0.8)
+    parser.add_argument('--exact-max', type=int, default=2_000,
+                        help='largest pool the all-pairs baseline is run on')
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    base, _ = corpus.generate(args.resumes, jds=1)
+    base = [text.lower() for text in base]
+    revisions = [revise(rng, text) for text in base[:args.revisions]]
+    texts = base + revisions
+    detector = NearDuplicateDetector(threshold=args.threshold)
+
+    print(f"{len(texts):,} resumes, {len(revisions):,} revisions, threshold {args.threshold}")
+    start = time.perf_counter()
+    signatures = detector.signatures(texts)
+    print(f"signatures            {time.perf_counter() - start:8.2f} s  "
+          f"({signatures.nbytes / 2 ** 20:.1f} MB)")
+    start = time.perf_counter()
+    clusters = detector.clusters(texts)
+    print(f"MinHash + LSH, total  {time.perf_counter() - start:8.2f} s  "
+          f"{found(clusters, len(base), len(revisions)):,}/{len(revisions):,} revisions grouped, "
+          f"{len(clusters):,} clusters")
+
+    if len(texts) <= args.exact_max:
+        start = time.perf_counter()
+        exact = exact_clusters(detector, texts)
+        print(f"all-pairs Jaccard     {time.perf_counter() - start:8.2f} s  "
+              f"{found(exact, len(base), len(revisions)):,}/{len(revisions):,} revisions grouped, "
+              f"{len(exact):,} clusters")
+    else:
+        print(f"all-pairs Jaccard     skipped (more than --exact-max={args.exact_max:,} resumes)")
+
+
+if __name__ == '__main__':
+    main()
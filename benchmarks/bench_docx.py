@@ -0,0 +1,99 @@
+"""DOCX extraction: python-docx object model vs. the streaming XML reader.
+
+Each sample DOCX in ``static/uploads`` is extracted with the previous
+python-docx loop (``docx.Document`` + ``text +=`` per paragraph) and with
+``FileHandler.extract_text_from_docx``, which parses ``word/document.xml``
+(and headers) incrementally from the zip, measuring time and, in a
+separate run, the tracemalloc peak. A large DOCX is also built by
+repeating the sample paragraphs ``--copies`` times with a table per copy,
+to show how both approaches scale and how much table text the legacy
+path dropped.
+
+    python benchmarks/bench_docx.py --copies 2000 --max-chars 100000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import docx  # noqa: E402
+
+from utils.file_handler import FileHandler  # noqa: E402
+
+SAMPLES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                       'static', 'uploads')
+
+
+def legacy_extract(file_path):
+    doc = docx.Document(file_path)
+    text = ''
+    for paragraph in doc.paragraphs:
+        text += paragraph.text + '\n'
+    return text
+
+
+def build_large_docx(paths, copies, out_path):
+    paragraphs = [p.text for path in paths for p in docx.Document(path).paragraphs]
+    document = docx.Document()
+    document.sections[0].header.paragraphs[0].text = 'Jane Doe | jane@example.com'
+    for i in range(copies):
+        for text in paragraphs:
+            document.add_paragraph(text)
+        table = document.add_table(rows=3, cols=2)
+        for j, cell in enumerate(table._cells):
+            cell.text = f'Skill {i}-{j}: Python, Docker, Kubernetes'
+    document.save(out_path)
+
+
+def measure(fn, path, repeat):
+    """Best time of ``repeat`` plain runs, then the peak of one traced run.
+
+    Tracing slows pure-Python code down a lot, so it never overlaps the
+    timed runs.
+    """
+    seconds = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(path)
+        seconds = min(seconds, time.perf_counter() - start)
+    tracemalloc.start()
+    text = fn(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak, len(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--copies', type=int, default=200,
+                        help='times the sample paragraphs are repeated in the synthetic DOCX')
+    parser.add_argument('--max-chars', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=5, help='best of this many runs')
+    args = parser.parse_args()
+
+    streaming = FileHandler(tempfile.gettempdir())
+    capped = FileHandler(tempfile.gettempdir(), max_chars=args.max_chars)
+    paths = [os.path.join(SAMPLES, name) for name in sorted(os.listdir(SAMPLES))
+             if name.lower().endswith('.docx')]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        large = os.path.join(tmp, f'synthetic_{args.copies}_copies.docx')
+        build_large_docx(paths, args.copies, large)
+
+        print(f"{'file':<36} {'KB':>6}  {'extractor':<18} {'seconds':>8} {'peak KB':>9} {'chars':>9}")
+        for path in paths + [large]:
+            size = os.path.getsize(path) // 1024
+            for label, fn in (('python-docx +=', legacy_extract),
+                              ('streaming XML', streaming.extract_text_from_docx),
+                              ('streaming, capped', capped.extract_text_from_docx)):
+                seconds, peak, chars = measure(fn, path, args.repeat)
+                print(f"{os.path.basename(path):<36} {size:>6}  {label:<18} "
+                      f"{seconds:>8.4f} {peak // 1024:>9,} {chars:>9,}")
+
+
+if __name__ == '__main__':
+    main()
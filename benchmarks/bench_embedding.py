@@ -0,0 +1,91 @@
+"""Embedding ranking backend: IVF search versus scoring every stored vector.
+
+Builds a ``VectorIndex`` (memory-mapped float32 vectors in a temporary
+directory) over a synthetic corpus for each embedding backend, then for
+each job description compares ``JobMatcher.rank_index(..., top_k=k)``,
+which only scores the resumes in the probed IVF lists, with exhaustive
+scoring of the same vectors. Reports recall@k against the exhaustive top k
+and the speedup for a few ``nprobe`` settings.
+
+    python benchmarks/bench_embedding.py --resumes 100000 --top-k 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import generate  # noqa: E402
+from models.embedding import build_embedder  # noqa: E402
+from models.job_matcher import JobMatcher  # noqa: E402
+from models.vector_index import VectorIndex  # noqa: E402
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def exhaustive(index, job_description, top_k):
+    sims, ids, _ = index.score(job_description)
+    return [ids[i] for i in JobMatcher.select_top(sims, top_k)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--resumes', type=int, default=100_000)
+    parser.add_argument('--jds', type=int, default=10)
+    parser.add_argument('--top-k', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--dim', type=int, default=256)
+    parser.add_argument('--backends', nargs='+', default=['lsa', 'hashing'])
+    parser.add_argument('--nprobe', nargs='+', type=int, default=[8, 16, 32])
+    args = parser.parse_args()
+
+    resumes, jds = generate(args.resumes, jds=args.jds)
+    texts = [t.lower() for t in resumes]
+    ids = [f'resume_{i}' for i in range(len(resumes))]
+    matcher = JobMatcher()
+
+    for backend in args.backends:
+        with tempfile.TemporaryDirectory() as folder:
+            index = VectorIndex(folder, build_embedder(backend, dim=args.dim))
+            start = time.perf_counter()
+            index.fit(ids, texts)
+            fit_time = time.perf_counter() - start
+            size = os.path.getsize(index.matrix.filename)
+            print(f"{backend}: fit + embed {len(ids)} resumes in {fit_time:.1f} s, "
+                  f"{index.matrix.shape[1]} dims, vectors file {size / 1024 ** 2:.1f} MB, "
+                  f"{len(index.ivf) if index.ivf else 0} IVF lists")
+
+            full_times, full_tops = [], []
+            for jd in jds:
+                elapsed, top = best_of(lambda: exhaustive(index, jd, args.top_k), args.repeat)
+                full_times.append(elapsed)
+                full_tops.append(top)
+            full_time = sum(full_times) / len(jds)
+            print(f"  exhaustive                    {full_time * 1000:7.1f} ms/JD")
+
+            for nprobe in args.nprobe:
+                index.nprobe = nprobe
+                recalls, elapsed_total = [], 0.0
+                for jd, full in zip(jds, full_tops):
+                    elapsed, results = best_of(
+                        lambda: matcher.rank_index(index, jd, top_k=args.top_k), args.repeat)
+                    elapsed_total += elapsed
+                    found = {r['resume_id'] for r in results}
+                    recalls.append(len(found & set(full)) / max(1, len(full)))
+                ivf_time = elapsed_total / len(jds)
+                print(f"  IVF nprobe={nprobe:<3}              {ivf_time * 1000:7.1f} ms/JD  "
+                      f"recall@{args.top_k} {sum(recalls) / len(recalls):.3f} "
+                      f"(min {min(recalls):.2f})  speedup x{full_time / ivf_time:.1f}")
+
+
+if __name__ == '__main__':
+    main()
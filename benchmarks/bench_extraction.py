@@ -0,0 +1,87 @@
+"""PDF extraction peak memory: legacy ``text +=`` loop vs. the page generator.
+
+Each sample PDF in ``static/uploads`` is extracted with the legacy loop and
+with ``FileHandler.extract_text_from_pdf`` (uncapped and capped), measuring
+time and the tracemalloc peak. A large PDF is also built by repeating the
+sample pages ``--pages`` times, to show how both approaches scale.
+
+    python benchmarks/bench_extraction.py --pages 100 --max-pages 10
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PyPDF2  # noqa: E402
+
+from utils.file_handler import FileHandler  # noqa: E402
+
+SAMPLES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                       'static', 'uploads')
+
+
+def legacy_extract(file_path):
+    text = ''
+    with open(file_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        for page in reader.pages:
+            text_ = page.extract_text()
+            if text_:
+                text += text_
+    return text
+
+
+def build_large_pdf(paths, pages, out_path):
+    writer = PyPDF2.PdfWriter()
+    sources = [PyPDF2.PdfReader(path) for path in paths]
+    while len(writer.pages) < pages:
+        for reader in sources:
+            for page in reader.pages:
+                if len(writer.pages) < pages:
+                    writer.add_page(page)
+    with open(out_path, 'wb') as f:
+        writer.write(f)
+
+
+def measure(fn, path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    text = fn(path)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak, len(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=100, help='pages in the synthetic PDF')
+    parser.add_argument('--max-pages', type=int, default=10)
+    args = parser.parse_args()
+
+    streaming = FileHandler(SAMPLES)
+    capped = FileHandler(SAMPLES, max_pages=args.max_pages)
+    paths = [os.path.join(SAMPLES, name) for name in sorted(os.listdir(SAMPLES))
+             if name.lower().endswith('.pdf')]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        large = os.path.join(tmp, f'synthetic_{args.pages}_pages.pdf')
+        build_large_pdf(paths, args.pages, large)
+
+        print(f"{'file':<44} {'KB':>7}  {'extractor':<22} {'seconds':>8} {'peak KB':>9} {'chars':>8}")
+        for path in paths + [large]:
+            size = os.path.getsize(path) // 1024
+            for label, fn in (('legacy text +=', legacy_extract),
+                              ('page generator', streaming.extract_text_from_pdf),
+                              (f'generator, {args.max_pages} pages', capped.extract_text_from_pdf)):
+                seconds, peak, chars = measure(fn, path)
+                print(f"{os.path.basename(path):<44} {size:>7}  {label:<22} "
+                      f"{seconds:>8.3f} {peak // 1024:>9,} {chars:>8,}")
+
+
+if __name__ == '__main__':
+    main()
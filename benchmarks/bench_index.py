@@ -0,0 +1,78 @@
+"""Score a new job description against a large stored pool via ResumeIndex.
+
+Builds a synthetic pool of ``--resumes`` documents, fits the index once, then
+times ``JobMatcher.rank_index`` (transform + sparse mat-vec + result build)
+against the per-request refit done by ``JobMatcher.rank_resumes``.
+
+    python benchmarks/bench_index.py --resumes 50000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.job_matcher import JobMatcher  # noqa: E402
+from models.resume_index import ResumeIndex  # noqa: E402
+
+VOCAB = (
+    'python java javascript sql mongodb react angular machine learning data science '
+    'flask django nodejs express html css bootstrap git docker kubernetes aws azure gcp '
+    'cloud pandas numpy scikit tensorflow pytorch mysql postgresql redis spark hadoop '
+    'tableau excel api rest json linux devops agile scrum spring hibernate microservices '
+    'android swift kotlin develop engin manag team project design build deploy test analyt '
+    'report lead senior junior intern univers degre bachelor master experi year communic'
+).split()
+
+JD = ('Python developer with machine learning and data science experience. '
+      'Flask, pandas, scikit-learn, SQL, REST APIs, Git, Docker and AWS.')
+
+
+def synthetic_docs(count, seed=7, length=250):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield ' '.join(rng.choice(VOCAB) for _ in range(length))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--resumes', type=int, default=50_000)
+    parser.add_argument('--queries', type=int, default=20)
+    args = parser.parse_args()
+
+    texts = list(synthetic_docs(args.resumes))
+    ids = [f'resume_{i}' for i in range(args.resumes)]
+    meta = [{'filename': f'{doc_id}.pdf', 'skills': [], 'skill_count': 0} for doc_id in ids]
+    matcher = JobMatcher()
+
+    with tempfile.TemporaryDirectory() as folder:
+        index = ResumeIndex(folder)
+        start = time.perf_counter()
+        index.fit(ids, texts, meta)
+        print(f"fit + save   {args.resumes} docs: {time.perf_counter() - start:8.3f} s")
+
+        start = time.perf_counter()
+        len(ResumeIndex(folder))  # loaded on first use
+        print(f"load from disk:               {time.perf_counter() - start:8.3f} s")
+
+        start = time.perf_counter()
+        for _ in range(args.queries):
+            sims, _, _ = index.score(JD)
+        print(f"score (transform + mat-vec):  {(time.perf_counter() - start) / args.queries:8.4f} s/JD")
+
+        start = time.perf_counter()
+        for _ in range(args.queries):
+            matcher.rank_index(index, JD)
+        print(f"rank_index (full result list): {(time.perf_counter() - start) / args.queries:7.4f} s/JD")
+
+    resumes = [{'processed_text': t, **m} for t, m in zip(texts, meta)]
+    start = time.perf_counter()
+    matcher.rank_resumes(resumes, JD)
+    print(f"rank_resumes (refit per JD):  {time.perf_counter() - start:8.3f} s/JD")
+
+
+if __name__ == '__main__':
+    main()
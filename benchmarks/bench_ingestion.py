@@ -0,0 +1,65 @@
+"""Throughput of the upload ingestion stage: serial loop vs. process pool.
+
+Copies the sample resumes in ``static/uploads`` into a temporary folder until
+``--files`` uploads exist, then runs ``IngestionPipeline`` with each worker
+count. The extraction cache is disabled so every run parses every file.
+
+    python benchmarks/bench_ingestion.py --files 200 --workers 1 2 4
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.resume_processor import ResumeProcessor  # noqa: E402
+from utils.file_handler import FileHandler  # noqa: E402
+from utils.ingestion import IngestionPipeline  # noqa: E402
+
+SAMPLES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                       'static', 'uploads')
+
+
+def build_batch(folder, count):
+    samples = sorted(f for f in os.listdir(SAMPLES) if f.lower().endswith(('.pdf', '.docx', '.txt')))
+    items = []
+    for i in range(count):
+        name = samples[i % len(samples)]
+        path = os.path.join(folder, f'{i:05d}_{name}')
+        shutil.copyfile(os.path.join(SAMPLES, name), path)
+        items.append((name, path))
+    return items
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=200)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        items = build_batch(folder, args.files)
+        handler = FileHandler(folder)
+        processor = ResumeProcessor()
+
+        baseline = None
+        print(f"{'workers':>8} {'seconds':>9} {'files/s':>9} {'speedup':>8}")
+        for workers in args.workers:
+            pipeline = IngestionPipeline(handler, processor, workers=workers)
+            # Spin the pool up, and load NLTK and the parsers, outside the timing
+            pipeline.run(items[:max(2, workers * 2)])
+            start = time.perf_counter()
+            results = pipeline.run(items)
+            elapsed = time.perf_counter() - start
+            pipeline.shutdown()
+
+            assert [r['filename'] for r in results] == [name for name, _ in items]
+            baseline = baseline or elapsed
+            print(f"{workers:>8} {elapsed:>9.2f} {len(items) / elapsed:>9.1f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Pruned top-k retrieval (InvertedIndex) versus scoring the whole stored pool.
+
+Fits a ResumeIndex over a synthetic corpus, then for each job description
+compares ``JobMatcher.rank_index`` with ``top_k`` (posting lists + MaxScore
+pruning) against exhaustive scoring (one mat-vec over every resume + top-k
+selection). Reports recall@k of the pruned result against the exhaustive
+one, how many resumes were scored exactly, and the speedup; then the same
+with a must-have skill filter.
+
+    python benchmarks/bench_prefilter.py --resumes 50000 --top-k 20
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from corpus import generate  # noqa: E402
+from models.job_matcher import JobMatcher  # noqa: E402
+from models.resume_index import ResumeIndex  # noqa: E402
+from models.resume_processor import ResumeProcessor  # noqa: E402
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def exhaustive(index, job_description, top_k, allowed=None):
+    sims, ids, _ = index.score(job_description)
+    if allowed is not None:
+        sims = np.where(allowed, sims, -np.inf)
+        top_k = min(top_k, int(allowed.sum()))
+    return [ids[i] for i in JobMatcher.select_top(sims, top_k)]
+
+
+def report(label, index, matcher, jds, top_k, repeat, must_have=None):
+    inverted = index.inverted()[0]
+    allowed = inverted.skill_filter(must_have)
+    vectorizer = index.snapshot()[1]
+    recalls, speedups, scored = [], [], []
+    for jd in jds:
+        full_time, full = best_of(lambda: exhaustive(index, jd, top_k, allowed), repeat)
+        pruned_time, pruned = best_of(
+            lambda: matcher.rank_index(index, jd, top_k=top_k, must_have=must_have), repeat)
+        pruned = [r['resume_id'] for r in pruned]
+        recalls.append(len(set(full) & set(pruned)) / max(1, len(full)))
+        speedups.append(full_time / pruned_time)
+        query = vectorizer.transform([jd.lower().strip()]).astype(np.float32)
+        scored.append(inverted.top_k(query, top_k, allowed)[2])
+        if full != pruned:
+            print(f"  order differs for one JD: {full[:5]} vs {pruned[:5]}")
+    pool = len(index) if allowed is None else int(allowed.sum())
+    print(f"{label:<28} pool {pool:>7}  recall@{top_k} {min(recalls):.3f}  "
+          f"scored exactly {np.mean(scored):9.1f}  speedup x{np.median(speedups):5.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--resumes', type=int, default=20_000)
+    parser.add_argument('--jds', type=int, default=10)
+    parser.add_argument('--top-k', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--must-have', nargs='+', default=['python', 'sql'])
+    args = parser.parse_args()
+
+    resumes, jds = generate(args.resumes, jds=args.jds)
+    processor = ResumeProcessor()
+    meta = [{'filename': f'resume_{i}.txt', 'skills': processor.extract_skills(text)}
+            for i, text in enumerate(resumes)]
+    index = ResumeIndex()
+    index.fit([f'resume_{i}' for i in range(len(resumes))], [t.lower() for t in resumes], meta)
+    matcher = JobMatcher()
+
+    start = time.perf_counter()
+    index.inverted()
+    print(f"posting lists for {len(index)} resumes built in {time.perf_counter() - start:.3f} s")
+    report('top-k', index, matcher, jds, args.top_k, args.repeat)
+    report(f"top-k, must have {'+'.join(args.must_have)}", index, matcher, jds,
+           args.top_k, args.repeat, must_have=args.must_have)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Text preprocessing throughput: legacy pipeline vs. TextPreprocessor.
+
+The legacy pipeline (uncompiled ``re.sub`` + ``PorterStemmer.stem`` on every
+token) is reproduced here and run side by side with the current
+``TextPreprocessor`` over the sample resumes, repeated ``--repeat`` times.
+Outputs of both tokenizers must be identical to the legacy pipeline;
+``tests/test_text_preprocessing.py`` checks the same on edge cases.
+
+    python benchmarks/bench_preprocessing.py --repeat 50
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import text_preprocessing  # noqa: E402
+from utils.file_handler import FileHandler  # noqa: E402
+from utils.text_preprocessing import TextPreprocessor  # noqa: E402
+
+SAMPLES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                       'static', 'uploads')
+
+
+def legacy_preprocess(text, stop_words, stemmer):
+    text = text.lower()
+    text = re.sub(r'[^\w\s+#\.]', ' ', text)
+    text = ' '.join(text.split())
+    if len(text.strip()) < 10:
+        return text
+    word_tokenize = text_preprocessing.load_nltk()['word_tokenize']
+    if word_tokenize is not None:
+        try:
+            tokens = word_tokenize(text)
+        except Exception:
+            tokens = text.split()
+    else:
+        tokens = text.split()
+    tokens = [t for t in tokens if t not in stop_words and len(t) > 1]
+    if stemmer:
+        tokens = [stemmer.stem(t) for t in tokens]
+    processed = ' '.join(tokens)
+    return processed if processed.strip() else text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    handler = FileHandler(SAMPLES)
+    texts = [handler.extract_text(os.path.join(SAMPLES, name))
+             for name in sorted(os.listdir(SAMPLES)) if handler.allowed_file(name)]
+    corpus = texts * args.repeat
+
+    fast = TextPreprocessor()
+    regex = TextPreprocessor(tokenizer='regex')
+    resources = text_preprocessing.load_nltk()
+    if fast.stemmer is None and text_preprocessing.NLTK_AVAILABLE:
+        # Stopwords corpus missing: still exercise (cached) stemming, on both sides.
+        from nltk.stem import PorterStemmer
+        resources['stemmer'] = fast.stemmer = regex.stemmer = PorterStemmer()
+        print("note: NLTK stopwords corpus unavailable, using fallback stop words")
+    legacy_stemmer = type(fast.stemmer)() if fast.stemmer else None
+    print(f"{len(texts)} sample resumes x {args.repeat}; stemming {'on' if fast.stemmer else 'off'}")
+
+    start = time.perf_counter()
+    expected = [legacy_preprocess(t, fast.stop_words, legacy_stemmer) for t in corpus]
+    legacy_s = time.perf_counter() - start
+    tokens = sum(len(out.split()) for out in expected)
+
+    text_preprocessing._cached_stem.cache_clear()
+    start = time.perf_counter()
+    got = list(fast.preprocess_many(corpus))
+    fast_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    got_regex = list(regex.preprocess_many(corpus))
+    regex_s = time.perf_counter() - start
+
+    assert got == expected, 'optimized output differs from the legacy pipeline'
+    assert got_regex == expected, 'regex tokenizer output differs from the legacy pipeline'
+
+    for label, seconds in (('legacy pipeline', legacy_s),
+                           ('TextPreprocessor (word_tokenize)', fast_s),
+                           ('TextPreprocessor (regex tokenizer)', regex_s)):
+        print(f"{label:<36} {tokens / seconds:>12,.0f} tokens/s  {legacy_s / seconds:>5.2f}x")
+    print("outputs identical to legacy: word_tokenize path yes, regex path yes")
+    print(f"stem cache: {text_preprocessing._cached_stem.cache_info()}")
+
+
+if __name__ == '__main__':
+    main()
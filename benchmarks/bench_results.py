@@ -0,0 +1,107 @@
+"""Memory held by ranking results and by processed resumes.
+
+Compares the per-resume result dicts ``rank_resumes`` used to return with the
+columnar ``RankingResult``, for a full ranking of ``--resumes`` candidates,
+and the processed resume dicts with and without ``original_text`` (which
+ingestion now drops once the text is spilled to the candidate store).
+Sizes are what ``tracemalloc`` sees allocated while building each one.
+
+    python benchmarks/bench_results.py --resumes 100000
+"""
+import argparse
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from corpus import generate, load_skill_forms  # noqa: E402
+from models.job_matcher import JobMatcher  # noqa: E402
+from models.ranking_result import RankingResult  # noqa: E402
+from models.resume_processor import ResumeProcessor  # noqa: E402
+
+
+def allocated(build):
+    """``(result, bytes still allocated after build())``."""
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def result_dicts(sims, metas):
+    # What rank_resumes returned before RankingResult
+    order = JobMatcher.select_top(sims)
+    results = []
+    for rank, idx in enumerate(order, 1):
+        score = float(sims[idx])
+        results.append({
+            'resume_id': int(idx),
+            'filename': metas[idx].get('filename', f'Resume_{idx + 1}'),
+            'similarity_score': score,
+            'percentage_match': round(score * 100, 2),
+            'skills': metas[idx].get('skills', []),
+            'skill_count': metas[idx].get('skill_count', 0),
+            'rank': rank,
+        })
+    return results
+
+
+def columnar(sims, metas):
+    order = JobMatcher.select_top(sims)
+    return RankingResult.from_meta(order, sims[order], metas)
+
+
+def mb(size):
+    return f'{size / 1024 ** 2:8.1f} MB'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--resumes', type=int, default=100_000)
+    parser.add_argument('--processed', type=int, default=2_000,
+                        help='resumes run through process_resume for the text comparison')
+    args = parser.parse_args()
+
+    # Metadata as ingestion leaves it: one filename and one skills list per
+    # resume, shared by whatever result is built from it.
+    rng = random.Random(7)
+    forms = [form.lower() for form in load_skill_forms()]
+    metas = []
+    for i in range(args.resumes):
+        skills = rng.sample(forms, rng.randint(8, 25))
+        metas.append({'filename': f'candidate_{i:06d}.pdf', 'skills': skills,
+                      'skill_count': len(skills)})
+    sims = np.random.default_rng(7).random(args.resumes, dtype=np.float32)
+
+    dicts, dict_size = allocated(lambda: result_dicts(sims, metas))
+    result, columnar_size = allocated(lambda: columnar(sims, metas))
+    assert [r['resume_id'] for r in dicts[:100]] == [r.resume_id for r in result[:100]]
+    print(f"full ranking of {args.resumes} resumes")
+    print(f"  list of result dicts:   {mb(dict_size)}")
+    print(f"  RankingResult columns:  {mb(columnar_size)}  "
+          f"(x{dict_size / max(1, columnar_size):.1f} smaller)")
+    del dicts, result
+
+    # Kept as bytes so each decode stands in for a freshly extracted text
+    files = [text.encode('utf-8') for text in generate(args.processed, jds=0)[0]]
+    processor = ResumeProcessor()
+    processor.process_resume(files[0].decode('utf-8'))  # lazy set-up is not per-resume
+    processed, with_text = allocated(
+        lambda: [processor.process_resume(data.decode('utf-8')) for data in files])
+    del processed
+    processed, without_text = allocated(
+        lambda: [{k: v for k, v in processor.process_resume(data.decode('utf-8')).items()
+                  if k != 'original_text'} for data in files])
+    print(f"{args.processed} processed resumes")
+    print(f"  with original_text:     {mb(with_text)}")
+    print(f"  without original_text:  {mb(without_text)}  "
+          f"(x{with_text / max(1, without_text):.1f} smaller)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Skill extraction: legacy per-keyword substring loop vs. SkillMatcher.
+
+Runs both extractors over the text of every sample resume in
+``static/uploads`` and reports documents/second, plus the cost of the
+substring loop if it had to scan every alias in the bundled taxonomy.
+
+    python benchmarks/bench_skills.py --repeat 200
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.skill_matcher import get_default_matcher  # noqa: E402
+from utils.file_handler import FileHandler  # noqa: E402
+
+SAMPLES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                       'static', 'uploads')
+
+LEGACY_KEYWORDS = [
+    'python', 'java', 'javascript', 'sql', 'mongodb', 'react', 'angular',
+    'machine learning', 'data science', 'artificial intelligence', 'ai',
+    'flask', 'django', 'nodejs', 'express', 'html', 'css', 'bootstrap',
+    'git', 'docker', 'kubernetes', 'aws', 'azure', 'gcp', 'cloud',
+    'pandas', 'numpy', 'scikit-learn', 'tensorflow', 'pytorch',
+    'mysql', 'postgresql', 'redis', 'spark', 'hadoop', 'big data',
+    'tableau', 'power bi', 'excel', 'api', 'rest', 'json', 'xml',
+    'linux', 'windows', 'devops', 'ci/cd', 'agile', 'scrum',
+    'spring', 'hibernate', 'microservices', 'web development',
+    'mobile development', 'android', 'ios', 'swift', 'kotlin'
+]
+
+
+def substring_loop(text, keywords):
+    text_lower = text.lower()
+    return list({skill for skill in keywords if skill in text_lower})
+
+
+def timed(label, fn, texts, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            fn(text)
+    elapsed = time.perf_counter() - start
+    docs = repeat * len(texts)
+    print(f"{label:<44} {docs / elapsed:>10.0f} docs/s  {elapsed / docs * 1e6:>8.1f} us/doc")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    handler = FileHandler(SAMPLES)
+    texts = [handler.extract_text(os.path.join(SAMPLES, name))
+             for name in sorted(os.listdir(SAMPLES)) if handler.allowed_file(name)]
+    print(f"{len(texts)} sample resumes, {sum(map(len, texts))} characters")
+
+    start = time.perf_counter()
+    matcher = get_default_matcher()
+    print(f"compile taxonomy ({len(matcher)} skills, {len(matcher._lookup)} forms): "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+    all_forms = list(matcher._lookup)
+    timed('legacy loop, 60 keywords', lambda t: substring_loop(t, LEGACY_KEYWORDS), texts, args.repeat)
+    timed(f'legacy loop, {len(all_forms)} taxonomy forms', lambda t: substring_loop(t, all_forms),
+          texts, args.repeat)
+    timed('SkillMatcher.extract (one regex pass)', matcher.extract, texts, args.repeat)
+
+    legacy = set().union(*(substring_loop(t, LEGACY_KEYWORDS) for t in texts))
+    found = set().union(*(matcher.extract(t) for t in texts))
+    print(f"legacy-only hits (substring false positives or merged aliases): {sorted(legacy - found)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""Start-up time and per-worker memory of the app.
+
+1. ``import app`` in a fresh interpreter: wall time and peak RSS.
+2. gunicorn with 4 workers, with and without ``preload_app``: seconds until
+   the first request is answered, then per-worker RSS / PSS / private
+   memory (from /proc/<pid>/smaps_rollup, Linux only) after every worker has
+   served ``/demo``.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --repo /path/to/other/checkout --import-only
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_PROBE = '''
+import resource, sys, time
+sys.path.insert(0, '.')
+start = time.perf_counter()
+import app
+print(time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024)
+'''
+
+
+def run_env(tmp):
+    env = dict(os.environ)
+    env.update(
+        EXTRACTION_CACHE_PATH=os.path.join(tmp, 'extraction.sqlite3'),
+        RESUME_INDEX_DIR=os.path.join(tmp, 'index'),
+        RANKINGS_DIR=os.path.join(tmp, 'rankings'),
+        INGEST_WORKERS='1',
+    )
+    return env
+
+
+def measure_import(repo, tmp, runs):
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', IMPORT_PROBE], cwd=repo, env=run_env(tmp),
+                             capture_output=True, text=True, check=True).stdout
+        seconds, rss = out.strip().splitlines()[-1].split()
+        samples.append((float(seconds), int(rss)))
+    best = min(samples)
+    print(f"import app: {best[0]:.2f} s (best of {runs}), peak RSS {best[1]} MB")
+
+
+def smaps(pid):
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                fields[parts[0][:-1]] = int(parts[1])
+    private = fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    return fields.get('Rss', 0) / 1024, fields.get('Pss', 0) / 1024, private / 1024
+
+
+def children(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(p) for p in f.read().split()]
+
+
+def measure_gunicorn(repo, tmp, preload, workers, port):
+    env = run_env(tmp)
+    env.update(GUNICORN_PRELOAD='1' if preload else '0', GUNICORN_WORKERS=str(workers),
+               GUNICORN_BIND=f'127.0.0.1:{port}')
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py',
+                             'app:app'], cwd=repo, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        url = f'http://127.0.0.1:{port}'
+        while True:
+            try:
+                urllib.request.urlopen(url + '/', timeout=1).read()
+                break
+            except OSError:
+                if time.perf_counter() - start > 120:
+                    raise RuntimeError('gunicorn did not come up')
+                time.sleep(0.05)
+        ready = time.perf_counter() - start
+
+        # Enough requests that every worker has ranked at least once.
+        start = time.perf_counter()
+        for _ in range(workers * 10):
+            urllib.request.urlopen(url + '/demo', timeout=60).read()
+        first_demos = time.perf_counter() - start
+
+        stats = [smaps(pid) for pid in children(proc.pid)]
+        master = smaps(proc.pid)
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=30)
+
+    label = 'preload' if preload else 'no preload'
+    n = len(stats)
+    print(f"gunicorn {label:<10} ready {ready:5.2f} s, {workers * 10} x /demo {first_demos:5.2f} s | "
+          f"per worker RSS {sum(s[0] for s in stats) / n:6.1f} MB, "
+          f"PSS {sum(s[1] for s in stats) / n:6.1f} MB, private {sum(s[2] for s in stats) / n:6.1f} MB | "
+          f"total PSS incl. master {sum(s[1] for s in stats) + master[1]:6.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repo', default=ROOT, help='checkout to measure')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--import-only', action='store_true')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        measure_import(args.repo, tmp, args.runs)
+        if not args.import_only:
+            measure_gunicorn(args.repo, tmp, False, args.workers, args.port)
+            measure_gunicorn(args.repo, tmp, True, args.workers, args.port + 1)
+
+
+if __name__ == '__main__':
+    main()
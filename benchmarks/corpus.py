@@ -0,0 +1,111 @@
+"""Deterministic synthetic resumes and job descriptions, generated offline.
+
+Skills are drawn from the bundled taxonomy (with its aliases, so the skill
+matcher has real work to do) and mixed with resume-like filler text. The
+same ``seed`` always produces the same corpus.
+"""
+import json
+import os
+import random
+import shutil
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TAXONOMY = os.path.join(ROOT, 'models', 'skills_taxonomy.json')
+SAMPLES = os.path.join(ROOT, 'static', 'uploads')
+
+FIRST_NAMES = ('Asha Ben Chen Dana Elif Farid Grace Hiro Ines Jonas Kavya Luis Mei Nora '
+               'Omar Priya Quinn Ravi Sofia Tariq Uma Victor Wen Yusuf Zara').split()
+LAST_NAMES = ('Adams Bose Costa Diaz Evans Fischer Gupta Haddad Ito Jensen Khan Lopez '
+              'Murphy Nair Okafor Patel Rossi Sato Tanaka Usman Varga Weber Yilmaz Zhou').split()
+TITLES = ('Software Engineer', 'Data Scientist', 'Backend Developer', 'Frontend Developer',
+          'DevOps Engineer', 'Machine Learning Engineer', 'Full Stack Developer',
+          'Data Analyst', 'Cloud Architect', 'QA Engineer', 'Mobile Developer')
+VERBS = ('Built', 'Designed', 'Led', 'Maintained', 'Migrated', 'Optimized', 'Automated',
+         'Delivered', 'Implemented', 'Refactored', 'Scaled', 'Monitored')
+OBJECTS = ('a reporting service', 'the payments API', 'data pipelines', 'an internal dashboard',
+           'the CI/CD workflow', 'customer-facing web pages', 'a recommendation model',
+           'the search backend', 'mobile release tooling', 'the analytics warehouse')
+OUTCOMES = ('reducing latency by {n}%', 'serving {n}k daily users', 'cutting costs by {n}%',
+            'improving test coverage to {n}%', 'for a team of {n} engineers',
+            'processing {n}M events per day')
+FILLER = ('collaborated with stakeholders across product design and operations to ship '
+          'reliable features on schedule while mentoring junior colleagues and writing '
+          'clear documentation for internal and external users').split()
+
+
+def load_skill_forms(path=TAXONOMY):
+    """Every surface form in the taxonomy (names and aliases)."""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    forms = []
+    for entry in data['skills']:
+        forms.append(entry['name'])
+        forms.extend(entry.get('aliases', []))
+    return forms
+
+
+def synthetic_resume(rng, forms, sections=4):
+    name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+    title = rng.choice(TITLES)
+    skills = rng.sample(forms, rng.randint(8, 25))
+    lines = [f'{name} - {title}',
+             f'{rng.randint(1, 15)} years of experience. '
+             f'{name.split()[0].lower()}@example.com',
+             '', 'SKILLS', ', '.join(skills), '', 'EXPERIENCE']
+    for _ in range(sections):
+        lines.append(f'{rng.choice(TITLES)}, {rng.choice(LAST_NAMES)} Corp '
+                     f'({rng.randint(2008, 2024)})')
+        for _ in range(rng.randint(2, 5)):
+            outcome = rng.choice(OUTCOMES).format(n=rng.randint(2, 90))
+            lines.append(f'- {rng.choice(VERBS)} {rng.choice(OBJECTS)} using '
+                         f'{rng.choice(skills)} and {rng.choice(skills)}, {outcome}.')
+        lines.append(' '.join(rng.choice(FILLER) for _ in range(rng.randint(10, 30))) + '.')
+    lines += ['', 'EDUCATION', f'B.Sc. Computer Science, {rng.choice(LAST_NAMES)} University']
+    return '\n'.join(lines)
+
+
+def synthetic_jd(rng, forms):
+    required = rng.sample(forms, rng.randint(5, 12))
+    return (f'We are hiring a {rng.choice(TITLES)} with {rng.randint(2, 8)}+ years of '
+            f'experience. Requirements: {", ".join(required)}. '
+            f'You will {rng.choice(VERBS).lower()} {rng.choice(OBJECTS)} and '
+            + ' '.join(rng.choice(FILLER) for _ in range(30)) + '.')
+
+
+def generate(count, jds=5, seed=7):
+    """Return ``(resume_texts, jd_texts)`` for a corpus of ``count`` resumes."""
+    rng = random.Random(seed)
+    forms = load_skill_forms()
+    resumes = [synthetic_resume(rng, forms) for _ in range(count)]
+    job_descriptions = [synthetic_jd(rng, forms) for _ in range(jds)]
+    return resumes, job_descriptions
+
+
+def write_files(texts, folder, docx_every=10, pdf_every=20):
+    """Write resumes as upload files and return ``(filename, path)`` pairs.
+
+    Most become ``.txt``; every ``docx_every``-th is written as a DOCX and
+    every ``pdf_every``-th is a copy of one of the sample PDFs (PDFs cannot
+    be generated without extra dependencies). 0 disables a format.
+    """
+    import docx
+
+    pdfs = sorted(os.path.join(SAMPLES, name) for name in os.listdir(SAMPLES)
+                  if name.lower().endswith('.pdf'))
+    items = []
+    for i, text in enumerate(texts):
+        if pdf_every and pdfs and i % pdf_every == pdf_every - 1:
+            name = f'resume_{i:06d}.pdf'
+            shutil.copyfile(pdfs[i % len(pdfs)], os.path.join(folder, name))
+        elif docx_every and i % docx_every == docx_every - 1:
+            name = f'resume_{i:06d}.docx'
+            document = docx.Document()
+            for line in text.split('\n'):
+                document.add_paragraph(line)
+            document.save(os.path.join(folder, name))
+        else:
+            name = f'resume_{i:06d}.txt'
+            with open(os.path.join(folder, name), 'w', encoding='utf-8') as f:
+                f.write(text)
+        items.append((name, os.path.join(folder, name)))
+    return items
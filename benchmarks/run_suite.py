@@ -0,0 +1,289 @@
+"""Benchmark suite: time every pipeline stage on a synthetic corpus.
+
+Generates ``--size`` synthetic resumes and ``--jds`` job descriptions
+offline (see ``corpus.py``), then times each stage on its own and the whole
+upload flow end to end. Each stage is also re-run under ``tracemalloc`` to
+record its peak Python/NumPy allocation (``--no-memory`` skips that).
+Results are written as JSON. With ``--baseline``, a stage that is slower,
+or peaks higher, than the baseline by more than ``--threshold`` fails the
+run (exit code 1).
+
+    python benchmarks/run_suite.py --size 1k --output results-1k.json \
+        --baseline benchmarks/baselines/1k.json
+
+Stages:
+    extraction      FileHandler.extract_text over --files written uploads
+    preprocessing   TextPreprocessor.preprocess_many
+    skills          SkillMatcher.count
+    process_resume  ResumeProcessor.process_resume (preprocessing + skills)
+    ranking         JobMatcher.rank_resumes, one call per JD (refits TF-IDF)
+    bulk_ranking    JobMatcher.rank_many, all JDs in one pass
+    index_fit       ResumeIndex.fit (includes saving to disk)
+    index_query     JobMatcher.rank_index, one call per JD
+    end_to_end      IngestionPipeline + ranking of the --files uploads
+"""
+import argparse
+import contextlib
+import datetime
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import corpus  # noqa: E402
+from models.job_matcher import JobMatcher  # noqa: E402
+from models.resume_index import ResumeIndex  # noqa: E402
+from models.resume_processor import ResumeProcessor  # noqa: E402
+from models.skill_matcher import get_default_matcher  # noqa: E402
+from utils.file_handler import FileHandler  # noqa: E402
+from utils.ingestion import IngestionPipeline  # noqa: E402
+from utils.text_preprocessing import TextPreprocessor  # noqa: E402
+
+SIZES = {'1k': 1_000, '10k': 10_000, '100k': 100_000}
+TOP_K = 50
+SHORT_STAGE_REPEAT = 5
+
+
+def parse_size(value):
+    if value.lower() in SIZES:
+        return SIZES[value.lower()]
+    try:
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'expected one of {", ".join(SIZES)} or an integer')
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence anything the pipeline writes to stdout while timing."""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def measure(fn, repeat, memory):
+    """Run ``fn`` (returning ``(output, items)``); best time of ``repeat`` and peak memory.
+
+    Stages that finish in under a second are always run at least
+    ``SHORT_STAGE_REPEAT`` times, since a single short timing is mostly noise.
+    """
+    best = None
+    runs = 0
+    while runs < repeat or (best < 1.0 and runs < SHORT_STAGE_REPEAT):
+        runs += 1
+        gc.collect()
+        with quiet():
+            start = time.perf_counter()
+            output, items = fn()
+            seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+
+    peak = None
+    if memory:
+        del output
+        gc.collect()
+        tracemalloc.start()
+        with quiet():
+            output, _ = fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return output, {'seconds': round(best, 6), 'items': items,
+                    'items_per_second': round(items / best, 2) if best else None,
+                    'peak_bytes': peak}
+
+
+def run(args):
+    resumes, jds = corpus.generate(args.size, jds=args.jds, seed=args.seed)
+    preprocessor = TextPreprocessor()
+    skill_matcher = get_default_matcher()
+    processor = ResumeProcessor()
+    matcher = JobMatcher()
+    stages = {}
+
+    def stage(name, fn):
+        if args.stages and name not in args.stages:
+            return None
+        print(f'{name:<15} ...', end=' ', flush=True)
+        output, result = measure(fn, args.repeat, not args.no_memory)
+        stages[name] = result
+        peak = f"{result['peak_bytes'] / 2**20:9.1f} MB" if result['peak_bytes'] is not None else ''
+        print(f"{result['seconds']:9.3f} s {result['items_per_second']:>12,.1f}/s {peak}")
+        return output
+
+    with tempfile.TemporaryDirectory() as folder:
+        files = corpus.write_files(resumes[:args.files], folder)
+        file_handler = FileHandler(folder)
+
+        def extraction():
+            return [file_handler.extract_text(path) for _, path in files], len(files)
+
+        def preprocessing():
+            return list(preprocessor.preprocess_many(resumes)), len(resumes)
+
+        def skills():
+            return [skill_matcher.count(text) for text in resumes], len(resumes)
+
+        def process_resume():
+            data = []
+            for i, text in enumerate(resumes):
+                processed = processor.process_resume(text)
+                processed['filename'] = f'resume_{i:06d}.txt'
+                data.append(processed)
+            return data, len(resumes)
+
+        stage('extraction', extraction)
+        stage('preprocessing', preprocessing)
+        stage('skills', skills)
+        resume_data = stage('process_resume', process_resume)
+        if resume_data is None:
+            with quiet():
+                resume_data = process_resume()[0]
+
+        def ranking():
+            return [matcher.rank_resumes(resume_data, jd, top_k=TOP_K) for jd in jds], len(jds)
+
+        def bulk_ranking():
+            return matcher.rank_many(resume_data, jds, top_k=TOP_K), len(jds)
+
+        index_dir = os.path.join(folder, 'index')
+
+        def index_fit():
+            index = ResumeIndex(index_dir)
+            index.fit([res['filename'] for res in resume_data],
+                      [res['processed_text'] for res in resume_data],
+                      [{'filename': res['filename'], 'skills': res['skills'],
+                        'skill_count': res['skill_count']} for res in resume_data])
+            return index, len(resume_data)
+
+        stage('ranking', ranking)
+        stage('bulk_ranking', bulk_ranking)
+        index = stage('index_fit', index_fit)
+
+        if not args.stages or 'index_query' in args.stages:
+            if index is None:
+                with quiet():
+                    index = index_fit()[0]
+
+            def index_query():
+                return [matcher.rank_index(index, jd, top_k=TOP_K) for jd in jds], len(jds)
+
+            stage('index_query', index_query)
+
+        pipeline = IngestionPipeline(file_handler, processor, workers=args.workers)
+
+        def end_to_end():
+            data = [outcome['processed'] for outcome in pipeline.run(files)
+                    if outcome['processed'] is not None]
+            sims = matcher.calculate_similarity_scores(data, jds[0])
+            return matcher.rank_scores(sims, data, top_k=TOP_K), len(files)
+
+        try:
+            stage('end_to_end', end_to_end)
+        finally:
+            pipeline.shutdown()
+
+    return stages
+
+
+def environment(args):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, cwd=corpus.ROOT, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import numpy
+    import sklearn
+    return {
+        'date': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': numpy.__version__,
+        'scikit-learn': sklearn.__version__,
+        'size': args.size,
+        'files': args.files,
+        'jds': args.jds,
+        'seed': args.seed,
+        'workers': args.workers,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Print a comparison table and return the list of regressed metrics."""
+    regressions = []
+    print(f"\n{'stage':<15} {'metric':<11} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, current in results['stages'].items():
+        base = baseline['stages'].get(name)
+        if base is None:
+            continue
+        for metric in ('seconds', 'peak_bytes'):
+            if not base.get(metric) or current.get(metric) is None:
+                continue
+            change = current[metric] / base[metric] - 1
+            flag = ''
+            if change > threshold:
+                flag = '  REGRESSION'
+                regressions.append(f'{name}.{metric}')
+            print(f"{name:<15} {metric:<11} {base[metric]:>12,.3f} {current[metric]:>12,.3f} "
+                  f"{change:>+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=parse_size, default=SIZES['1k'],
+                        help='resumes in the corpus: 1k, 10k, 100k or a number')
+    parser.add_argument('--jds', type=int, default=5, help='job descriptions')
+    parser.add_argument('--files', type=int, default=None,
+                        help='resumes written to disk for extraction/end_to_end '
+                             '(default: min(size, 500))')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--repeat', type=int, default=1, help='timed runs per stage (best kept)')
+    parser.add_argument('--workers', type=int, default=1, help='ingestion processes in end_to_end')
+    parser.add_argument('--stages', nargs='+', metavar='STAGE', help='only run these stages')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc pass')
+    parser.add_argument('--output', help='write results JSON here')
+    parser.add_argument('--baseline', help='results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.20,
+                        help='allowed slowdown / memory growth vs. baseline (0.20 = 20%%)')
+    args = parser.parse_args()
+    if args.files is None:
+        args.files = min(args.size, 500)
+
+    print(f'{args.size:,} resumes, {args.jds} job descriptions, {args.files} files, seed {args.seed}')
+    results = {'environment': environment(args), 'stages': run(args)}
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f'results written to {args.output}')
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        base_env = baseline.get('environment', {})
+        for key in ('size', 'files', 'jds', 'seed'):
+            if base_env.get(key) != results['environment'][key]:
+                print(f"error: baseline was recorded with {key}={base_env.get(key)}, "
+                      f"this run uses {results['environment'][key]}", file=sys.stderr)
+                return 2
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: "
+                  f"{', '.join(regressions)}", file=sys.stderr)
+            return 1
+        print(f'\nno regressions over {args.threshold:.0%}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
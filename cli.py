@@ -0,0 +1,377 @@
+"""Command-line entry points for batch ranking without the web app.
+
+    python cli.py bulk-score --jd-dir requisitions/ --resumes resumes/ \
+        --top-k 20 --output rankings.jsonl --matrix scores.csv
+
+    python cli.py rank-dir --jd-dir requisitions/ --resumes resumes.zip \
+        --output nightly.csv --rankings nightly-top.jsonl --top-k 50
+
+    python cli.py rebuild-index --candidates data/candidates.sqlite3 --index data/index \
+        --embeddings data/embeddings --embedding-backend lsa
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from models.embedding import BACKENDS as EMBEDDING_BACKENDS, build_embedder
+from models.job_matcher import CHUNK_ROWS, JobMatcher
+from models.resume_index import ResumeIndex
+from models.resume_processor import ResumeProcessor
+from models.vector_index import VectorIndex
+from utils.candidate_store import CandidateStore
+from utils.disk_cache import DiskCache
+from utils.file_handler import EXTRACTOR_VERSION, FileHandler
+from utils.batch_run import (WRITERS, Checkpoint, ResumeSource, open_writer,
+                             output_format)
+from utils.ingestion import IngestionPipeline
+
+
+def _list_files(folder, file_handler):
+    paths = []
+    for root, _, names in os.walk(folder):
+        for name in sorted(names):
+            if file_handler.allowed_file(name):
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+
+def _load_job_descriptions(args, file_handler):
+    paths = list(args.jd or [])
+    if args.jd_dir:
+        paths.extend(_list_files(args.jd_dir, file_handler))
+    jobs = []
+    for path in paths:
+        text = file_handler.extract_text(path).strip()
+        if not text:
+            print(f"Warning: skipping empty job description {path}", file=sys.stderr)
+            continue
+        jobs.append((os.path.basename(path), text))
+    return jobs
+
+
+def _load_resumes(folder, file_handler, workers):
+    pipeline = IngestionPipeline(file_handler, ResumeProcessor(), workers=workers)
+    items = [(os.path.relpath(path, folder), path) for path in _list_files(folder, file_handler)]
+    resume_data = []
+    try:
+        for outcome in pipeline.run(items):
+            if outcome['error']:
+                print(f"Warning: {outcome['error']}", file=sys.stderr)
+                continue
+            resume_data.append(outcome['processed'])
+    finally:
+        pipeline.shutdown()
+    return resume_data
+
+
+def _write_matrix(path, scores, job_names, resume_names):
+    if path.endswith('.npy'):
+        np.save(path, scores)
+        return
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['job'] + resume_names)
+        for name, row in zip(job_names, scores):
+            writer.writerow([name] + [f'{value:.6f}' for value in row])
+
+
+def bulk_score(args):
+    cache = DiskCache(args.cache, version=EXTRACTOR_VERSION) if args.cache else None
+    file_handler = FileHandler(args.upload_folder, cache=cache)
+    matcher = JobMatcher()
+
+    jobs = _load_job_descriptions(args, file_handler)
+    if not jobs:
+        print("Error: no job descriptions given", file=sys.stderr)
+        return 2
+    job_names = [name for name, _ in jobs]
+    job_texts = [text for _, text in jobs]
+
+    if args.index:
+        index = ResumeIndex(args.index)
+        if not len(index):
+            print(f"Error: resume index {args.index} is empty", file=sys.stderr)
+            return 2
+        rankings = matcher.rank_many_index(index, job_texts, top_k=args.top_k,
+                                           chunk_size=args.chunk_size)
+        resume_names = [m.get('filename', doc_id) for doc_id, m in zip(index.ids, index.meta)]
+        scores = (matcher.score_matrix_index(index, job_texts, chunk_size=args.chunk_size)
+                  if args.matrix else None)
+    else:
+        resume_data = _load_resumes(args.resumes, file_handler, args.workers)
+        if not resume_data:
+            print(f"Error: no usable resumes in {args.resumes}", file=sys.stderr)
+            return 2
+        rankings = matcher.rank_many(resume_data, job_texts, top_k=args.top_k,
+                                     chunk_size=args.chunk_size)
+        resume_names = [res['filename'] for res in resume_data]
+        scores = (matcher.score_matrix(resume_data, job_texts, chunk_size=args.chunk_size)
+                  if args.matrix else None)
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        for name, results in zip(job_names, rankings):
+            out.write(json.dumps({'job': name, 'results': results}) + '\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    if scores is not None:
+        _write_matrix(args.matrix, scores, job_names, resume_names)
+
+    print(f"Scored {len(job_names)} job descriptions against {len(resume_names)} resumes",
+          file=sys.stderr)
+    return 0
+
+
+def _merge_top(top, scores, names, k):
+    """Fold one batch's (JDs x resumes) ``scores`` into each JD's running top ``k``.
+
+    ``top`` holds one ``[[score, name], ...]`` list per JD, best first; ties
+    keep the earlier resume, as in ``JobMatcher.select_top``.
+    """
+    merged = []
+    for best, row in zip(top, scores):
+        pool = best + [[float(score), name] for score, name in zip(row, names)]
+        order = JobMatcher.select_top(np.asarray([score for score, _ in pool]), k)
+        merged.append([pool[i] for i in order])
+    return merged
+
+
+def rank_dir(args):
+    """Rank a folder or archive of resumes against JDs, streaming rows to ``--output``.
+
+    Files go through ``IngestionPipeline`` ``--batch-size`` at a time, so
+    only one batch of documents is held at once. Scores use one TF-IDF
+    vocabulary fitted on the first ``--fit-sample`` resumes plus the JDs
+    and frozen for the rest of the run. After each batch the output is
+    flushed and a checkpoint saved; re-running the same command continues
+    after the last checkpointed batch.
+    """
+    cache = DiskCache(args.cache, version=EXTRACTOR_VERSION) if args.cache else None
+    file_handler = FileHandler(args.upload_folder, cache=cache, max_pages=args.max_pages,
+                               max_chars=args.max_chars)
+    jobs = _load_job_descriptions(args, file_handler)
+    if not jobs:
+        print("Error: no job descriptions given", file=sys.stderr)
+        return 2
+    job_names = [name for name, _ in jobs]
+    job_texts = [text for _, text in jobs]
+    try:
+        fmt = args.format or output_format(args.output)
+        source = ResumeSource(args.resumes, file_handler.allowed_file)
+        checkpoint_path = args.checkpoint or args.output.rstrip('/') + '.checkpoint.json'
+        processor = ResumeProcessor()
+        checkpoint = Checkpoint(checkpoint_path, Checkpoint.fingerprint_of(
+            os.path.abspath(args.resumes), jobs, fmt, args.fit_sample, args.top_k,
+            file_handler.extraction_version, processor.version))
+        state = None if args.restart else checkpoint.load()
+        vectorizer = _load_checkpoint_vectorizer(checkpoint_path, state) if state else None
+        writer = open_writer(args.output, fmt, state['output'] if state else None)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    if state:
+        print(f"Resuming after {state['done']} files", file=sys.stderr)
+    else:
+        state = {'done': 0, 'rows': 0, 'skipped': 0, 'output': None,
+                 'top': [[] for _ in jobs], 'vectorizer': None}
+    vectorizer_path = state['vectorizer'] or checkpoint_path + '.vectorizer.joblib'
+
+    matcher = JobMatcher()
+    pipeline = IngestionPipeline(file_handler, processor, workers=args.workers)
+    names = source.names()
+    pending = []  # processed resumes waiting for the vectorizer to be fitted
+    try:
+        for start in range(state['done'], len(names), args.batch_size):
+            batch = names[start:start + args.batch_size]
+            with tempfile.TemporaryDirectory() as scratch:
+                outcomes = pipeline.run(source.materialize(batch, scratch))
+            for outcome in outcomes:
+                if outcome['error']:
+                    print(f"Warning: {outcome['error']}", file=sys.stderr)
+                    state['skipped'] += 1
+                else:
+                    pending.append(outcome['processed'])
+            last = start + len(batch) >= len(names)
+            if vectorizer is None:
+                if len(pending) < args.fit_sample and not last:
+                    continue
+                import joblib
+
+                vectorizer = matcher.fit_vectorizer(pending, job_texts)
+                joblib.dump(vectorizer, vectorizer_path + '.tmp')
+                os.replace(vectorizer_path + '.tmp', vectorizer_path)
+                state['vectorizer'] = vectorizer_path
+
+            scores = matcher.score_fitted(vectorizer, pending, job_texts)
+            rows = []
+            for job, row in zip(job_names, scores):
+                for res, score in zip(pending, row):
+                    rows.append({'job': job, 'filename': res['filename'],
+                                 'similarity_score': round(float(score), 6),
+                                 'percentage_match': round(float(score) * 100, 2),
+                                 'skill_count': res['skill_count'], 'skills': res['skills']})
+            writer.write(rows)
+            state['top'] = _merge_top(state['top'], scores,
+                                      [res['filename'] for res in pending], args.top_k)
+            state['rows'] += len(rows)
+            state['output'] = writer.flush()
+            state['done'] = start + len(batch)
+            checkpoint.save(state)
+            pending = []
+            print(f"{state['done']}/{len(names)} files", file=sys.stderr)
+    finally:
+        writer.close()
+        pipeline.shutdown()
+        source.close()
+
+    if args.rankings:
+        with open(args.rankings, 'w', encoding='utf-8') as f:
+            for name, best in zip(job_names, state['top']):
+                results = [{'rank': rank, 'filename': filename,
+                            'similarity_score': score,
+                            'percentage_match': round(score * 100, 2)}
+                           for rank, (score, filename) in enumerate(best, 1)]
+                f.write(json.dumps({'job': name, 'results': results}) + '\n')
+    # A finished run has nothing to resume
+    checkpoint.clear()
+    if os.path.exists(vectorizer_path):
+        os.remove(vectorizer_path)
+    print(f"Ranked {len(names) - state['skipped']} of {len(names)} files against "
+          f"{len(jobs)} job descriptions into {args.output}", file=sys.stderr)
+    return 0
+
+
+def _load_checkpoint_vectorizer(checkpoint_path, state):
+    """The vectorizer a checkpointed rank-dir run was scoring with.
+
+    Raises ValueError when the file the checkpoint names is gone or unreadable.
+    """
+    import joblib
+
+    # Checkpoints from before the path was recorded used the default name
+    path = state.setdefault('vectorizer', checkpoint_path + '.vectorizer.joblib')
+    if not path or not os.path.exists(path):
+        raise ValueError(f"checkpoint {checkpoint_path} needs the vectorizer {path}, "
+                         f"which is missing; pass --restart to start over")
+    try:
+        return joblib.load(path)
+    except Exception as e:
+        raise ValueError(f"checkpoint {checkpoint_path} needs the vectorizer {path}, "
+                         f"which could not be read ({e}); pass --restart to start over")
+
+
+def rebuild_index(args):
+    """Refit the resume index from the candidate store, without the original files."""
+    handler = FileHandler(args.upload_folder, max_pages=args.max_pages, max_chars=args.max_chars)
+    version = f'{handler.extraction_version}|{ResumeProcessor().version}'
+    candidates = CandidateStore(args.candidates, version=version)
+    ids, texts, meta = [], [], []
+    for digest, processed in candidates.iter_all():
+        ids.append(digest)
+        texts.append(processed['processed_text'])
+        meta.append({'filename': processed['filename'], 'skills': processed['skills'],
+                     'skill_count': processed['skill_count']})
+    if not ids:
+        print(f"Error: no candidates stored in {args.candidates} for extraction and "
+              f"processing settings {version}", file=sys.stderr)
+        return 2
+    ResumeIndex(args.index).fit(ids, texts, meta)
+    print(f"Indexed {len(ids)} candidates into {args.index}", file=sys.stderr)
+    if args.embeddings:
+        embedder = build_embedder(args.embedding_backend, args.embedding_model, args.embedding_dim)
+        index = VectorIndex(args.embeddings, embedder)
+        index.fit(ids, texts, meta)
+        if index.vectorizer is None:
+            print(f"Stored {len(ids)} candidates in {args.embeddings} unembedded: {embedder.name} "
+                  f"is fitted once there are {index.min_fit_docs}", file=sys.stderr)
+        else:
+            print(f"Embedded {len(ids)} candidates ({embedder.name}) into {args.embeddings}",
+                  file=sys.stderr)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='cli.py', description='Resume Ranker batch tools')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    bulk = sub.add_parser('bulk-score',
+                          help='score many job descriptions against many resumes in one pass')
+    bulk.add_argument('--jd', nargs='+', metavar='FILE', help='job description files')
+    bulk.add_argument('--jd-dir', help='folder of job description files')
+    source = bulk.add_mutually_exclusive_group(required=True)
+    source.add_argument('--resumes', help='folder of resume files')
+    source.add_argument('--index', help='ResumeIndex directory (e.g. data/index)')
+    bulk.add_argument('--top-k', type=int, default=10)
+    bulk.add_argument('--output', help='JSONL file for per-JD rankings (default: stdout)')
+    bulk.add_argument('--matrix', help='also write the full score matrix (.csv or .npy)')
+    bulk.add_argument('--chunk-size', type=int, default=CHUNK_ROWS,
+                      help='resumes multiplied per step (bounds memory)')
+    bulk.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                      help='processes used for extraction')
+    bulk.add_argument('--cache', help='extraction cache file to reuse (optional)')
+    bulk.add_argument('--upload-folder', default='static/uploads', help=argparse.SUPPRESS)
+    bulk.set_defaults(func=bulk_score)
+
+    rank = sub.add_parser('rank-dir',
+                          help='rank a folder or archive of resumes, streaming results to a file')
+    rank.add_argument('--jd', nargs='+', metavar='FILE', help='job description files')
+    rank.add_argument('--jd-dir', help='folder of job description files')
+    rank.add_argument('--resumes', required=True,
+                      help='folder, .zip or .tar(.gz/.bz2/.xz) archive of resume files')
+    rank.add_argument('--output', required=True,
+                      help='.csv, .jsonl or .parquet (a folder of part files) to stream rows to')
+    rank.add_argument('--format', choices=sorted(WRITERS), help='override the output format')
+    rank.add_argument('--rankings', help='JSONL file for each JD\'s top-k, written at the end')
+    rank.add_argument('--top-k', type=int, default=10)
+    rank.add_argument('--batch-size', type=int, default=256,
+                      help='files extracted, scored and checkpointed together')
+    rank.add_argument('--fit-sample', type=int, default=2_000,
+                      help='resumes the TF-IDF vocabulary is fitted on')
+    rank.add_argument('--checkpoint',
+                      help='progress file (default: OUTPUT.checkpoint.json)')
+    rank.add_argument('--restart', action='store_true',
+                      help='ignore an existing checkpoint and start over')
+    rank.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                      help='processes used for extraction')
+    rank.add_argument('--cache', help='extraction cache file to reuse (optional)')
+    rank.add_argument('--max-pages', type=int, default=10, help='pages extracted per file')
+    rank.add_argument('--max-chars', type=int, default=100_000,
+                      help='characters extracted per file')
+    rank.add_argument('--upload-folder', default='static/uploads', help=argparse.SUPPRESS)
+    rank.set_defaults(func=rank_dir)
+
+    rebuild = sub.add_parser('rebuild-index',
+                             help='refit the resume index from the stored candidates')
+    rebuild.add_argument('--candidates', default='data/candidates.sqlite3',
+                         help='candidate store written by the web app')
+    rebuild.add_argument('--index', default='data/index', help='ResumeIndex directory to replace')
+    rebuild.add_argument('--embeddings', metavar='DIR',
+                         help='also rebuild the VectorIndex in DIR (e.g. data/embeddings)')
+    rebuild.add_argument('--embedding-backend', choices=EMBEDDING_BACKENDS, default='auto')
+    rebuild.add_argument('--embedding-model', default='models/embedding_model',
+                         help='local sentence-transformers model directory')
+    rebuild.add_argument('--embedding-dim', type=int, default=256)
+    rebuild.add_argument('--max-pages', type=int, default=10,
+                         help='EXTRACT_MAX_PAGES the candidates were ingested with')
+    rebuild.add_argument('--max-chars', type=int, default=100_000,
+                         help='EXTRACT_MAX_CHARS the candidates were ingested with')
+    rebuild.add_argument('--upload-folder', default='static/uploads', help=argparse.SUPPRESS)
+    rebuild.set_defaults(func=rebuild_index)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
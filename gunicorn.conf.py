@@ -0,0 +1,24 @@
+# gunicorn settings; values can be overridden through the environment.
+import gc
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+
+# Import the app once in the master and fork workers from it, so NLTK,
+# scikit-learn and the skill matcher are loaded once and shared
+# copy-on-write. Set GUNICORN_PRELOAD=0 to load the app in every worker.
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded app is imported and before
+    # the workers are forked.
+    if not preload_app:
+        return
+    from app import warm_up
+    warm_up()
+    # Keep the garbage collector from touching (and so un-sharing) every
+    # object inherited from the master.
+    gc.freeze()
@@ -0,0 +1,152 @@
+# -------------------------------------------------
+#  Purpose: Group near-duplicate resumes (revisions
+#           of the same CV) with MinHash signatures
+#           and LSH banding in a finished ranking.
+# -------------------------------------------------
+
+import logging
+import zlib
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Permutations are (a * x + b) mod 2^32 with odd a over the 32-bit shingle
+# hashes: a bijection computed in native uint32 arithmetic, about 8x faster
+# than modulo a prime in uint64 and just as accurate on CRC32 inputs.
+_MAX_HASH = np.uint32((1 << 32) - 1)
+
+# Shingle hashes multiplied per step; bounds the (num_perm x chunk) block.
+CHUNK_SHINGLES = 65_536
+
+
+class NearDuplicateDetector:
+    """Clusters of resumes whose word shingles overlap by at least ``threshold``.
+
+    Each ``processed_text`` becomes a set of ``shingle_size``-word shingles
+    and a ``num_perm``-value MinHash signature, whose share of equal values
+    estimates the Jaccard similarity of two sets. Signatures are cut into
+    ``bands`` bands; only resumes that agree on a whole band are compared,
+    so clustering stays close to linear in the number of resumes. The
+    defaults (16 bands of 8) catch pairs above about 0.7 similarity with
+    high probability; pairs below ``threshold`` are then dropped.
+    """
+
+    def __init__(self, threshold=0.8, num_perm=128, bands=16, shingle_size=3, seed=1):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        words = rng.randint(0, 1 << 32, size=(2, num_perm), dtype=np.uint64).astype(np.uint32)
+        self._a = (words[0] | np.uint32(1))[:, None]
+        self._b = words[1][:, None]
+
+    # ------------------------------------------------------------------ #
+    #  Signatures                                                         #
+    # ------------------------------------------------------------------ #
+    def shingles(self, text):
+        """CRC32 hashes of the text's word shingles (empty for blank text)."""
+        words = text.split()
+        n = self.shingle_size
+        if len(words) <= n:
+            pieces = [' '.join(words)] if words else []
+        else:
+            pieces = [' '.join(words[i:i + n]) for i in range(len(words) - n + 1)]
+        return np.unique(np.fromiter((zlib.crc32(p.encode('utf-8')) for p in pieces),
+                                     dtype=np.uint32, count=len(pieces)))
+
+    def signatures(self, texts):
+        """(len(texts) x num_perm) MinHash signatures; blank texts get all-max rows."""
+        out = np.full((len(texts), self.num_perm), _MAX_HASH, dtype=np.uint32)
+        hashes, owners = [], []
+        pending = 0
+
+        def flush():
+            values = np.concatenate(hashes)
+            rows = np.concatenate(owners)
+            permuted = self._a * values[None, :]
+            permuted += self._b
+            # Rows are contiguous runs per document
+            starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+            out[rows[starts]] = np.minimum.reduceat(permuted, starts, axis=1).T
+            hashes.clear()
+            owners.clear()
+
+        for i, text in enumerate(texts):
+            values = self.shingles(text)
+            if not len(values):
+                continue
+            hashes.append(values)
+            owners.append(np.full(len(values), i, dtype=np.int64))
+            pending += len(values)
+            if pending >= CHUNK_SHINGLES:
+                flush()
+                pending = 0
+        if hashes:
+            flush()
+        return out
+
+    # ------------------------------------------------------------------ #
+    #  Clustering                                                         #
+    # ------------------------------------------------------------------ #
+    def clusters(self, texts):
+        """Lists of indices into ``texts``, one per cluster, in order of first member."""
+        signatures = self.signatures(texts)
+        blank = (signatures == _MAX_HASH).all(axis=1)
+        parent = list(range(len(texts)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        rows = self.num_perm // self.bands
+        compared = set()
+        for band in range(self.bands):
+            buckets = {}
+            block = signatures[:, band * rows:(band + 1) * rows]
+            for i in np.flatnonzero(~blank).tolist():
+                buckets.setdefault(block[i].tobytes(), []).append(i)
+            for members in buckets.values():
+                first = members[0]
+                for other in members[1:]:
+                    if (first, other) in compared or find(first) == find(other):
+                        continue
+                    compared.add((first, other))
+                    if np.mean(signatures[first] == signatures[other]) >= self.threshold:
+                        parent[find(other)] = find(first)
+
+        groups = {}
+        for i in range(len(texts)):
+            groups.setdefault(find(i), []).append(i)
+        return sorted(groups.values(), key=lambda group: group[0])
+
+    def collapse(self, resumes_data, sims):
+        """Collapse clusters in a finished ranking: ``(sims, resumes)``, one per cluster.
+
+        Scores are computed on the full set first, so grouping never changes
+        any resume's score. Each cluster keeps its best-scoring member (the
+        earliest on ties), in input order; when a cluster has more than one
+        member it is a copy carrying the others' filenames as ``duplicates``.
+        """
+        sims = np.asarray(sims)
+        if len(resumes_data) < 2:
+            return sims, list(resumes_data)
+        texts = [res.get('processed_text', '') for res in resumes_data]
+        keep, representatives = [], []
+        for group in self.clusters(texts):
+            best = max(group, key=lambda i: (sims[i], -i))
+            rep = resumes_data[best]
+            if len(group) > 1:
+                rep = dict(rep, duplicates=[resumes_data[i].get('filename') or f'Resume_{i + 1}'
+                                            for i in group if i != best])
+            keep.append(best)
+            representatives.append(rep)
+        if len(representatives) < len(resumes_data):
+            logger.info("Grouped %d resumes into %d near-duplicate clusters",
+                        len(resumes_data), len(representatives))
+        return sims[keep], representatives
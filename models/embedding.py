@@ -0,0 +1,222 @@
+# -------------------------------------------------
+#  Purpose: Dense, L2-normalised document vectors
+#           for the embedding ranking backend, all
+#           computed locally on CPU.
+# -------------------------------------------------
+
+import importlib.util
+import logging
+import os
+import warnings
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# sentence-transformers (and torch behind it) is optional and only imported
+# when a local model is actually used. Models are never downloaded: point
+# EMBEDDING_MODEL at a directory saved with SentenceTransformer.save().
+SENTENCE_TRANSFORMERS_AVAILABLE = importlib.util.find_spec('sentence_transformers') is not None
+
+BACKENDS = ('auto', 'transformer', 'lsa', 'hashing')
+
+# Runs of word characters, '+' and '#' with inner dots: keeps "c++", "c#"
+# and "node.js" whole, and, unlike the TF-IDF matcher, short words and
+# digits ("go", "r", "3d").
+TOKEN_PATTERN = r'[\w+#]+(?:\.[\w+#]+)*'
+
+
+class Embedder:
+    """Maps texts to float32 rows of unit length, ``batch_size`` texts at a time.
+
+    Backends that learn from the pool (``needs_fit``) must be ``fit`` before
+    ``embed``; the others are usable straight away.
+    """
+
+    name = None
+    needs_fit = False
+
+    def __init__(self, dim=256, batch_size=256):
+        self.dim = dim
+        self.batch_size = batch_size
+
+    def fit(self, texts):
+        return self
+
+    def iter_embed(self, texts):
+        """Yield one ``(batch, dim)`` array per ``batch_size`` texts."""
+        texts = list(texts)
+        for start in range(0, len(texts), self.batch_size):
+            yield _normalize(self._embed_batch(texts[start:start + self.batch_size]))
+
+    def embed(self, texts):
+        batches = list(self.iter_embed(texts))
+        if not batches:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.vstack(batches)
+
+    def _embed_batch(self, texts):
+        raise NotImplementedError
+
+
+class TransformerEmbedder(Embedder):
+    """Sentence-transformers model loaded from a local directory, run on CPU."""
+
+    name = 'transformer'
+
+    def __init__(self, model_path, batch_size=64):
+        self.model_path = model_path
+        self.batch_size = batch_size
+        self._model = None
+
+    @property
+    def dim(self):
+        return self.model.get_sentence_embedding_dimension()
+
+    @property
+    def model(self):
+        if self._model is None:
+            os.environ.setdefault('HF_HUB_OFFLINE', '1')
+            from sentence_transformers import SentenceTransformer
+
+            self._model = SentenceTransformer(self.model_path, device='cpu')
+        return self._model
+
+    def _embed_batch(self, texts):
+        return self.model.encode(texts, batch_size=self.batch_size, convert_to_numpy=True,
+                                 show_progress_bar=False)
+
+    def __getstate__(self):
+        # Saved with the index as a reference to the model directory only
+        state = dict(self.__dict__)
+        state['_model'] = None
+        return state
+
+
+class LSAEmbedder(Embedder):
+    """TF-IDF over a larger vocabulary, projected to ``dim`` latent dimensions.
+
+    Truncated SVD (latent semantic analysis) folds terms that occur in the
+    same resumes onto the same directions, so "k8s" and "kubernetes"
+    resumes land close together even without a shared term. Fitted on (a
+    sample of at most ``fit_sample`` documents of) the pool; new documents
+    are projected with the fitted model.
+    """
+
+    name = 'lsa'
+    needs_fit = True
+
+    def __init__(self, dim=256, batch_size=1024, max_features=20_000, fit_sample=20_000):
+        super().__init__(dim=dim, batch_size=batch_size)
+        self.max_features = max_features
+        self.fit_sample = fit_sample
+        self.vectorizer = None
+        self.components = None
+
+    def fit(self, texts):
+        from sklearn.decomposition import TruncatedSVD
+
+        from models.job_matcher import build_vectorizer
+
+        texts = list(texts)
+        if len(texts) > self.fit_sample:
+            # The latent directions settle long before the whole pool is seen
+            rng = np.random.default_rng(0)
+            texts = [texts[i] for i in sorted(rng.choice(len(texts), self.fit_sample,
+                                                         replace=False))]
+        vectorizer = build_vectorizer(max_features=self.max_features, ngram_range=(1, 2),
+                                      max_df=0.80 if len(texts) >= 5 else 1.0,
+                                      min_df=2 if len(texts) >= 1_000 else 1,
+                                      token_pattern=TOKEN_PATTERN, sublinear_tf=True)
+        tfidf = vectorizer.fit_transform(texts)
+        # The SVD cannot have more components than the matrix has ranks.
+        n_components = max(1, min(self.dim, tfidf.shape[1] - 1, len(texts) - 1))
+        svd = TruncatedSVD(n_components=n_components, algorithm='randomized', random_state=0)
+        with warnings.catch_warnings():
+            # explained_variance_ratio_ is 0/0 for a pool of identical resumes
+            warnings.simplefilter('ignore', RuntimeWarning)
+            svd.fit(tfidf)
+        self.vectorizer = vectorizer
+        # Components are kept as a plain (terms x dim) float32 array so a
+        # worker can memory-map it from the saved index.
+        self.components = np.ascontiguousarray(svd.components_.T, dtype=np.float32)
+        self.dim = self.components.shape[1]
+        return self
+
+    def _embed_batch(self, texts):
+        if self.vectorizer is None:
+            raise ValueError('LSAEmbedder must be fitted before embedding')
+        return self.vectorizer.transform(texts).astype(np.float32) @ self.components
+
+
+class HashingEmbedder(Embedder):
+    """Hashed term counts with a fixed sparse random projection to ``dim``.
+
+    Needs no fitting and keeps no vocabulary, so it works from the first
+    upload; ranking quality is close to plain term matching.
+    """
+
+    name = 'hashing'
+
+    def __init__(self, dim=256, batch_size=1024, n_features=2 ** 18, seed=0):
+        super().__init__(dim=dim, batch_size=batch_size)
+        self.n_features = n_features
+        self.seed = seed
+        self._hasher = None
+        self._projection = None
+
+    def _embed_batch(self, texts):
+        if self._hasher is None:
+            import scipy.sparse as sp
+            from sklearn.feature_extraction.text import HashingVectorizer
+
+            self._hasher = HashingVectorizer(n_features=self.n_features, ngram_range=(1, 2),
+                                             token_pattern=TOKEN_PATTERN, alternate_sign=False,
+                                             stop_words='english')
+            # Each hashed feature adds +-1/2 to four random output dimensions
+            # (a sparse Johnson-Lindenstrauss projection), fixed by the seed.
+            rng = np.random.default_rng(self.seed)
+            cols = rng.integers(0, self.dim, size=(self.n_features, 4))
+            signs = rng.choice(np.array([-0.5, 0.5], dtype=np.float32), size=cols.shape)
+            self._projection = sp.csr_matrix(
+                (signs.ravel(), cols.ravel(), np.arange(0, cols.size + 1, 4)),
+                shape=(self.n_features, self.dim))
+        counts = self._hasher.transform(texts).astype(np.float32)
+        return (counts @ self._projection).toarray()
+
+    def __getstate__(self):
+        # Rebuilt from the seed on first use
+        state = dict(self.__dict__)
+        state['_hasher'] = state['_projection'] = None
+        return state
+
+
+def build_embedder(backend='auto', model_path=None, dim=256):
+    """Embedder for ``backend``; ``auto`` uses ``model_path`` when it can be loaded.
+
+    Without a local model (or without sentence-transformers installed),
+    ``auto`` falls back to the LSA projection of TF-IDF.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"embedding backend must be one of {BACKENDS}, got {backend!r}")
+    has_model = bool(model_path) and os.path.isdir(model_path)
+    if backend == 'transformer' or (backend == 'auto' and has_model):
+        if not SENTENCE_TRANSFORMERS_AVAILABLE:
+            if backend == 'transformer':
+                raise ValueError('the transformer backend needs sentence-transformers installed')
+            logger.warning("sentence-transformers not installed; using LSA embeddings")
+        elif not has_model:
+            raise ValueError(f"no local embedding model at {model_path!r}")
+        else:
+            return TransformerEmbedder(model_path)
+    if backend == 'hashing':
+        return HashingEmbedder(dim=dim)
+    return LSAEmbedder(dim=dim)
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    # Empty documents stay all-zero (similarity 0 to everything)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
@@ -0,0 +1,106 @@
+# -------------------------------------------------
+#  Purpose: Stateless ranking mode: hashed term
+#           counts weighted with IDF from on-disk
+#           document frequencies shared by workers.
+# -------------------------------------------------
+
+import logging
+
+import numpy as np
+
+from models.job_matcher import JobMatcher, build_vectorizer
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class HashingMatcher(JobMatcher):
+    """``JobMatcher`` whose single- and many-JD paths need no fitted vocabulary.
+
+    Documents are turned into term counts with a ``HashingVectorizer`` (the
+    matcher's tokenisation, ``df_store.n_features`` buckets), so a resume's
+    vector never depends on which other resumes are in the request. IDF
+    weights come from corpus-wide counts in ``df_store`` (a ``DFStore``),
+    which only ``observe`` adds to, once per ingested upload; scoring just
+    reads them. The same JD/resume pair therefore scores the same in every
+    request and every worker until new uploads are ingested. Memory does
+    not grow with the vocabulary.
+    """
+
+    def __init__(self, df_store, skill_weight: float = 0.0, skill_mode: str = 'weighted') -> None:
+        super().__init__(skill_weight=skill_weight, skill_mode=skill_mode)
+        self.df_store = df_store
+        self._hashing = None
+
+    @property
+    def hashing(self):
+        """Stateless term-count vectorizer; safe to share between threads."""
+        if self._hashing is None:
+            from sklearn.feature_extraction.text import HashingVectorizer
+
+            params = build_vectorizer().get_params()
+            self._hashing = HashingVectorizer(
+                n_features=self.df_store.n_features, alternate_sign=False, norm=None,
+                dtype=np.float32, lowercase=params['lowercase'],
+                ngram_range=params['ngram_range'], stop_words=params['stop_words'],
+                token_pattern=params['token_pattern'])
+        return self._hashing
+
+    def config(self) -> dict:
+        # IDF changes as the corpus grows; results computed before then differ
+        return {'skill_weight': self.skill_weight, 'skill_mode': self.skill_mode,
+                'hashing': self.hashing.get_params(), 'df_documents': self.df_store.n_docs}
+
+    # ------------------------------------------------------------------ #
+    #  Vectors                                                            #
+    # ------------------------------------------------------------------ #
+    def counts(self, documents: list):
+        """Hashed term counts, one CSR row per document."""
+        return self.hashing.transform(documents).tocsr()
+
+    def observe(self, resumes_data: list) -> int:
+        """Count ingested uploads in the shared document frequencies, once per file digest.
+
+        Resumes without a ``digest`` (demo samples, API bodies) are not
+        uploads and are never counted. Returns how many were new.
+        """
+        uploads = [res for res in resumes_data if isinstance(res, dict) and res.get('digest')]
+        if not uploads:
+            return 0
+        with metrics.span('vectorize'):
+            counts = self.counts(self._resume_documents(uploads))
+        return self.df_store.add([res['digest'] for res in uploads], counts)
+
+    def weigh(self, counts):
+        """TF-IDF rows from term counts, L2-normalised."""
+        from sklearn.preprocessing import normalize
+
+        weighted = counts.copy()
+        weighted.data *= self.df_store.idf(weighted.indices)
+        return normalize(weighted, copy=False)
+
+    def _vectorize_many(self, resumes_data: list, job_descriptions: list):
+        with metrics.span('vectorize'):
+            jd_vecs = self.weigh(self.counts(self._jd_documents(job_descriptions)))
+            resume_vecs = self.weigh(self.counts(self._resume_documents(resumes_data)))
+        return jd_vecs, resume_vecs
+
+    # ------------------------------------------------------------------ #
+    #  Single job-description                                             #
+    # ------------------------------------------------------------------ #
+    def calculate_similarity_scores(
+        self, resumes_data: list, job_description: str
+    ) -> np.ndarray:
+        """Cosine similarities in the original order, blended like ``JobMatcher``'s."""
+        if not resumes_data or not job_description.strip():
+            return np.zeros(len(resumes_data))
+
+        jd_vec, resume_vecs = self._vectorize_many(resumes_data, [job_description])
+        with metrics.span('similarity'):
+            sims = (resume_vecs @ jd_vec.T).toarray().ravel()
+        metrics.RESUMES_SCORED.inc(len(sims))
+        if self.skill_weight:
+            resume_skills = self.skill_scorer.encode(
+                res.get('skills', ()) if isinstance(res, dict) else () for res in resumes_data)
+            sims = self._blend(sims, resume_skills, job_description, self.skill_weight)
+        return sims
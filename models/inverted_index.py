@@ -0,0 +1,158 @@
+# -------------------------------------------------
+#  Purpose: Posting-list view of a ResumeIndex so a
+#           job-description's top-k is found without
+#           scoring every stored resume exactly.
+# -------------------------------------------------
+
+import numpy as np
+
+# Partial scores are float sums taken in a different order than the exact
+# mat-vec; bounds are loosened by this much so rounding never prunes a hit.
+_EPSILON = 1e-6
+
+
+class InvertedIndex:
+    """Term -> (resume rows, weights) posting lists over a TF-IDF matrix.
+
+    ``top_k`` uses MaxScore-style pruning, term at a time: query terms are
+    visited in decreasing order of their largest possible contribution
+    (query weight x the term's highest weight in any resume). Once the
+    terms still to visit cannot lift an unseen resume above the current
+    k-th best partial score, traversal stops, and only resumes whose
+    partial score plus that remainder can still reach the cut-off are
+    scored exactly. The low-IDF terms with the longest posting lists are
+    the ones skipped. Results are the same as exhaustive ranking.
+
+    Must-have skill filters use the ``skills`` lists in the per-resume
+    metadata (``ResumeProcessor.extract_skills`` output).
+    """
+
+    def __init__(self, matrix, meta=()):
+        import scipy.sparse as sp
+
+        self.matrix = matrix
+        csc = sp.csc_matrix(matrix)
+        csc.sort_indices()
+        self.indptr, self.rows, self.weights = csc.indptr, csc.indices, csc.data
+        self.max_weights = np.zeros(csc.shape[1], dtype=np.float64)
+        nonempty = np.flatnonzero(np.diff(self.indptr))
+        if len(nonempty):
+            self.max_weights[nonempty] = np.maximum.reduceat(self.weights,
+                                                             self.indptr[nonempty])
+
+        self.skills = SkillPostings(meta)
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    # ------------------------------------------------------------------ #
+    #  PUBLIC API                                                         #
+    # ------------------------------------------------------------------ #
+    def skill_filter(self, must_have):
+        """Boolean mask of the resumes listing every skill in ``must_have``.
+
+        None when there is nothing to filter on.
+        """
+        return self.skills.mask(must_have, len(self))
+
+    def top_k(self, query, k, allowed=None):
+        """Exact top-``k`` rows for a one-row TF-IDF ``query``.
+
+        Returns ``(rows, scores, scored)``: rows best first (ties by row
+        order, like ``JobMatcher.select_top``), their cosine scores, and
+        how many resumes were scored exactly. ``allowed`` is an optional
+        boolean mask (see ``skill_filter``).
+        """
+        n = len(self)
+        pool = n if allowed is None else int(allowed.sum())
+        k = max(0, min(int(k), pool))
+        if k == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32), 0
+
+        query = query.tocsr()
+        dense_query = query.toarray().ravel()
+        terms, query_weights = query.indices, query.data.astype(np.float64)
+        bounds = query_weights * self.max_weights[terms]
+        order = np.argsort(-bounds, kind='stable')
+        terms, query_weights = terms[order], query_weights[order]
+        # remaining[i]: the most terms i.. can add to any one resume's score
+        remaining = np.append(np.cumsum(bounds[order][::-1])[::-1], 0.0)
+
+        # Phase 1: any resume may still make the top k, so postings are
+        # accumulated over the whole pool. Filtered-out resumes sit at -inf.
+        # Every so often the k best partial scorers are scored exactly; the
+        # lowest of those scores is a lower bound on the final cut-off.
+        scores = np.zeros(n, dtype=np.float64)
+        if allowed is not None:
+            scores[~allowed] = -np.inf
+        threshold = -np.inf
+        checkpoint, i = 1, 0
+        while i < len(terms):
+            self._accumulate(scores, terms[i], query_weights[i])
+            i += 1
+            if i == checkpoint:
+                checkpoint *= 2
+                leaders = np.argpartition(scores, n - k)[n - k:]
+                threshold = max(threshold, self._exact(leaders, dense_query).min() - _EPSILON)
+            if remaining[i] < threshold:
+                break
+
+        # Phase 2: a resume not reached yet cannot make it any more; finish
+        # the survivors only, dropping those that fall out of reach. The
+        # threshold is still -inf when no query term was visited, so the
+        # filtered-out resumes are dropped explicitly.
+        candidates = np.flatnonzero(np.isfinite(scores) & (scores + remaining[i] >= threshold))
+        scores = scores[candidates]
+        positions = np.full(n, -1, dtype=np.int64)
+        while i < len(terms):
+            positions[candidates] = np.arange(len(candidates))
+            start, end = self.indptr[terms[i]], self.indptr[terms[i] + 1]
+            hits = positions[self.rows[start:end]]
+            found = hits >= 0
+            scores[hits[found]] += query_weights[i] * self.weights[start:end][found]
+            positions[candidates] = -1
+            i += 1
+            threshold = max(threshold, np.partition(scores, len(scores) - k)[len(scores) - k]
+                            - _EPSILON)
+            keep = scores + remaining[i] >= threshold
+            candidates, scores = candidates[keep], scores[keep]
+
+        exact = self._exact(candidates, dense_query)
+        best = np.lexsort((candidates, -exact))[:k]
+        return candidates[best], exact[best].astype(np.float32), len(candidates)
+
+    # ------------------------------------------------------------------ #
+    #  Internals                                                          #
+    # ------------------------------------------------------------------ #
+    def _accumulate(self, scores, term, weight):
+        start, end = self.indptr[term], self.indptr[term + 1]
+        scores[self.rows[start:end]] += weight * self.weights[start:end]
+
+    def _exact(self, rows, dense_query):
+        return self.matrix[rows] @ dense_query
+
+
+class SkillPostings:
+    """Skill -> resume rows, from the ``skills`` lists in per-resume metadata."""
+
+    def __init__(self, meta=()):
+        skill_rows = {}
+        for row, res_meta in enumerate(meta):
+            for skill in (res_meta or {}).get('skills', []):
+                skill_rows.setdefault(skill.lower(), []).append(row)
+        self.postings = {skill: np.asarray(rows, dtype=np.int64)
+                         for skill, rows in skill_rows.items()}
+
+    def mask(self, must_have, n):
+        """Boolean mask over ``n`` rows of those listing every skill in ``must_have``.
+
+        None when there is nothing to filter on.
+        """
+        mask = None
+        for skill in must_have or ():
+            rows = self.postings.get(skill.lower().strip())
+            has = np.zeros(n, dtype=bool)
+            if rows is not None:
+                has[rows] = True
+            mask = has if mask is None else mask & has
+        return mask
@@ -5,51 +5,356 @@
 #           job-description using TF-IDF + cosine
 # -------------------------------------------------
 
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import functools
+import logging
+
 import numpy as np
 
+from models.ranking_result import RankingResult
+from models.skill_matcher import get_default_matcher
+from models.skill_scoring import MODES as SKILL_MODES, SkillScorer
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# scikit-learn is imported inside the functions that use it: it is the
+# slowest import of the app and only needed once ranking starts.
+
+# Resume rows multiplied per step in the many-JD paths; bounds the dense
+# (JDs x chunk) block held in memory at once.
+CHUNK_ROWS = 8_192
+
+
+@functools.lru_cache(maxsize=256)
+def _jd_skill_counts(job_description: str) -> tuple:
+    # A request asks for the same JD's skills several times (blend, stored
+    # ranking, results page); scanning it once is enough.
+    return tuple(get_default_matcher().count(job_description).items())
+
+
+def build_vectorizer(**overrides) -> "TfidfVectorizer":
+    """Fresh (unfitted) TF-IDF vectorizer with the matcher's settings."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    params = dict(
+        max_features=1_000,         # limited vocabulary keeps RAM low
+        ngram_range=(1, 3),
+        stop_words="english",
+        min_df=1,
+        max_df=0.80,
+        lowercase=True,
+        token_pattern=r"[a-zA-Z][a-zA-Z+#\.]{2,}",
+    )
+    params.update(overrides)
+    return TfidfVectorizer(**params)
+
 
 class JobMatcher:
-    """Compute similarity between a job-description and many resumes."""
-
-    def __init__(self) -> None:
-        self.vectorizer = TfidfVectorizer(
-            max_features=1_000,         # limited vocabulary keeps RAM low
-            ngram_range=(1, 3),
-            stop_words="english",
-            min_df=1,
-            max_df=0.80,
-            lowercase=True,
-            token_pattern=r"[a-zA-Z][a-zA-Z+#\.]{2,}",
-        )
+    """Compute similarity between a job-description and many resumes.
+
+    With ``skill_weight`` > 0 the single-JD scores blend TF-IDF cosine with
+    how well each resume's extracted skills cover the JD's (``skill_mode``:
+    plain ``coverage`` or IDF/mention ``weighted``, see ``SkillScorer``):
+    ``(1 - skill_weight) * cosine + skill_weight * skill_score``. The
+    many-JD paths stay pure cosine.
+    """
+
+    def __init__(self, skill_weight: float = 0.0, skill_mode: str = 'weighted') -> None:
+        if not 0.0 <= skill_weight <= 1.0:
+            raise ValueError(f"skill_weight must be between 0 and 1, got {skill_weight}")
+        if skill_mode not in SKILL_MODES:
+            raise ValueError(f"skill_mode must be one of {SKILL_MODES}, got {skill_mode!r}")
+        self.skill_weight = skill_weight
+        self.skill_mode = skill_mode
+        self._vectorizer = None
+        self._skill_scorer = None
+        # (metas, encoded skills) of the last ResumeIndex snapshot scored
+        self._index_skills = (None, None)
+
+    @property
+    def vectorizer(self):
+        """Unfitted template; every call fits a clone of it, so concurrent
+        requests never share fitted state."""
+        if self._vectorizer is None:
+            self._vectorizer = build_vectorizer()
+        return self._vectorizer
+
+    @property
+    def skill_scorer(self) -> SkillScorer:
+        if self._skill_scorer is None:
+            self._skill_scorer = SkillScorer()
+        return self._skill_scorer
+
+    def config(self) -> dict:
+        """Settings that change single-JD scores, e.g. for cache keys."""
+        return {'skill_weight': self.skill_weight, 'skill_mode': self.skill_mode,
+                'vectorizer': self.vectorizer.get_params()}
 
     # ------------------------------------------------------------------ #
     #  PUBLIC API                                                         #
     # ------------------------------------------------------------------ #
-    def rank_resumes(self, resumes_data: list, job_description: str) -> list:
+    def rank_resumes(
+        self, resumes_data: list, job_description: str, top_k: int = None, offset: int = 0
+    ) -> RankingResult:
         """
-        Return a list of dicts—one per resume—sorted by highest similarity.
+        Return a ``RankingResult`` with one row per resume, best first.
 
-        Each dict contains:
+        With ``top_k`` only ranks ``offset+1 .. offset+top_k`` are returned
+        (and only those rows are built); by default every resume is.
+
+        Each row (read like a dict, or as attributes) has:
             resume_id          index in the original list
             filename           original filename if provided
-            similarity_score   raw cosine value (0-1)
+            similarity_score   cosine value (0-1), blended with the skill
+                               score when ``skill_weight`` is set
             percentage_match   similarity_score * 100, rounded to 2-dec
             skills             list of skills extracted (if provided)
             skill_count        len(skills)
             rank               1 = best match
+            matched_skills     JD skills the resume lists
+            missing_skills     JD skills it does not
+            skill_coverage     len(matched_skills) / number of JD skills
         """
         # Guard clauses
         if not resumes_data or not job_description.strip():
-            print("DEBUG: rank_resumes – empty input")
-            return []
-
-        # --------------------------------------------------------------- #
-        # 1. Build the corpus: JD first, then every resume’s processed
-        #    text (fall-back to original text if missing).
-        # --------------------------------------------------------------- #
-        documents = [job_description.lower().strip()]
+            logger.debug("rank_resumes – empty input")
+            return self._empty_result()
+
+        sims = self.calculate_similarity_scores(resumes_data, job_description)
+        metas = [res if isinstance(res, dict) else {} for res in resumes_data]
+        return self.rank_scores(sims, metas, top_k=top_k, offset=offset,
+                                jd_skills=self.jd_skills(job_description))
+
+    def rank_index(
+        self, index, job_description: str, top_k: int = None, offset: int = 0,
+        must_have: list = None, skill_weight: float = None
+    ) -> RankingResult:
+        """
+        Rank the resumes stored in a fitted ``ResumeIndex`` (or ``VectorIndex``).
+
+        The index is never refitted: the JD is transformed with the stored
+        vocabulary. Without ``top_k`` every resume is scored with one
+        mat-vec; with it, ``index.search`` narrows the pool to the resumes
+        that can still make the top ``offset + top_k`` and scores only
+        those (exact for ``ResumeIndex``'s posting lists, approximate for
+        ``VectorIndex``'s IVF lists). ``must_have`` keeps only resumes
+        whose extracted skills include every listed skill. Result rows
+        have the same fields as ``rank_resumes``; ``resume_id`` is the
+        index doc id.
+
+        Blended scores (``skill_weight``, default ``self.skill_weight``)
+        have no per-term bounds to prune with, so they are computed for the
+        whole pool, which is still two mat-vecs.
+        """
+        if not len(index) or not job_description.strip():
+            return self._empty_result()
+        skill_weight = self.skill_weight if skill_weight is None else skill_weight
+        jd_skills = self.jd_skills(job_description)
+        offset = max(0, int(offset))
+        if skill_weight or (top_k is None and not must_have):
+            sims, ids, metas = self.score_index(index, job_description, skill_weight)
+            if not must_have:
+                return self.rank_scores(sims, metas, ids, top_k=top_k, offset=offset,
+                                        jd_skills=jd_skills)
+            rows = np.flatnonzero(index.skill_filter(must_have))
+            with metrics.span('rank'):
+                order = rows[self.select_top(sims[rows], top_k, offset)]
+                return RankingResult.from_meta(order, sims[order], metas, ids,
+                                               start_rank=offset + 1, jd_skills=jd_skills)
+
+        k = None if top_k is None else offset + max(0, int(top_k))
+        rows, scores, ids, metas = index.search(job_description, k, must_have)
+        with metrics.span('rank'):
+            return RankingResult.from_meta(rows[offset:], scores[offset:], metas, ids,
+                                           start_rank=offset + 1, jd_skills=jd_skills)
+
+    def rank_scores(
+        self, sims: np.ndarray, metas: list, ids: list = None,
+        top_k: int = None, offset: int = 0, jd_skills=None
+    ) -> RankingResult:
+        """Build a ``RankingResult`` from a precomputed similarity vector.
+
+        With ``jd_skills`` the rows also report matched and missing skills.
+        """
+        with metrics.span('rank'):
+            order = self.select_top(sims, top_k, offset)
+            results = RankingResult.from_meta(order, np.asarray(sims)[order], metas, ids,
+                                              start_rank=max(0, int(offset)) + 1,
+                                              jd_skills=jd_skills)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            top3 = [f"{r['filename']} – {r['percentage_match']}%" for r in results[:3]]
+            logger.debug("Final ranking (top-3): %s", top3)
+
+        return results
+
+    def score_index(self, index, job_description: str, skill_weight: float = None) -> tuple:
+        """``index.score`` blended with skill scores: ``(sims, ids, meta)``."""
+        sims, ids, metas = index.score(job_description)
+        skill_weight = self.skill_weight if skill_weight is None else skill_weight
+        if skill_weight and len(sims):
+            cached_metas, resume_skills = self._index_skills
+            if cached_metas is not metas:
+                # ResumeIndex replaces its meta list on every change
+                resume_skills = self.skill_scorer.encode(m.get('skills', ()) for m in metas)
+                self._index_skills = (metas, resume_skills)
+            sims = self._blend(sims, resume_skills, job_description, skill_weight)
+        return sims, ids, metas
+
+    @staticmethod
+    def jd_skills(job_description: str) -> dict:
+        """Skills named in a JD, with how often each is mentioned."""
+        return dict(_jd_skill_counts(job_description))
+
+    # ------------------------------------------------------------------ #
+    #  Many job-descriptions × many resumes                               #
+    # ------------------------------------------------------------------ #
+    def score_matrix(
+        self, resumes_data: list, job_descriptions: list, chunk_size: int = CHUNK_ROWS
+    ) -> np.ndarray:
+        """
+        Dense float32 (JDs × resumes) cosine matrix from a single TF-IDF fit.
+
+        The sparse product is taken ``chunk_size`` resumes at a time so the
+        only large allocation is the returned matrix itself; use
+        ``rank_many`` when per-JD top-k lists are enough.
+        """
+        if not resumes_data or not job_descriptions:
+            return np.zeros((len(job_descriptions), len(resumes_data)), dtype=np.float32)
+        jd_vecs, resume_vecs = self._vectorize_many(resumes_data, job_descriptions)
+        return self._product(jd_vecs, resume_vecs, chunk_size)
+
+    def score_matrix_index(
+        self, index, job_descriptions: list, chunk_size: int = CHUNK_ROWS
+    ) -> np.ndarray:
+        """Like ``score_matrix`` but against a fitted ``ResumeIndex``."""
+        matrix, vectorizer, _, _ = index.snapshot()
+        if matrix is None or not job_descriptions:
+            return np.zeros((len(job_descriptions), len(index)), dtype=np.float32)
+        with metrics.span('vectorize'):
+            jd_vecs = vectorizer.transform(self._jd_documents(job_descriptions)).astype(np.float32)
+        return self._product(jd_vecs, matrix, chunk_size)
+
+    def rank_many(
+        self, resumes_data: list, job_descriptions: list, top_k: int = 10,
+        chunk_size: int = CHUNK_ROWS
+    ) -> list:
+        """
+        Per-JD top-k results: one list per JD of ``RankingResult.to_dicts()``
+        rows (``rank_resumes`` fields as plain dicts, ready for JSON).
+
+        Scores are produced chunk by chunk and merged into a running
+        (JDs × top_k) selection, so memory stays bounded by
+        ``len(job_descriptions) * (chunk_size + top_k)`` floats.
+        """
+        if not resumes_data or not job_descriptions:
+            return [[] for _ in job_descriptions]
+        jd_vecs, resume_vecs = self._vectorize_many(resumes_data, job_descriptions)
+        metas = [res if isinstance(res, dict) else {} for res in resumes_data]
+        best_idx, best_sims = self._top_k_chunked(jd_vecs, resume_vecs, top_k, chunk_size)
+        with metrics.span('rank'):
+            return self._many_results(best_idx, best_sims, metas)
+
+    def rank_many_index(
+        self, index, job_descriptions: list, top_k: int = 10, chunk_size: int = CHUNK_ROWS
+    ) -> list:
+        """Like ``rank_many`` (lists of plain-dict rows) but against a fitted ``ResumeIndex``."""
+        matrix, vectorizer, ids, metas = index.snapshot()
+        if matrix is None or not job_descriptions:
+            return [[] for _ in job_descriptions]
+        with metrics.span('vectorize'):
+            jd_vecs = vectorizer.transform(self._jd_documents(job_descriptions)).astype(np.float32)
+        best_idx, best_sims = self._top_k_chunked(jd_vecs, matrix, top_k, chunk_size)
+        with metrics.span('rank'):
+            return self._many_results(best_idx, best_sims, metas, ids)
+
+    def fit_vectorizer(self, resumes_data: list, job_descriptions: list):
+        """Clone of the matcher's vectorizer fitted on these resumes and JDs.
+
+        For scoring resumes that arrive later with ``score_fitted`` against
+        one fixed vocabulary and IDF, e.g. a sample of a large batch run.
+        """
+        from sklearn.base import clone
+
+        documents = self._jd_documents(job_descriptions) + self._resume_documents(resumes_data)
+        vectorizer = clone(self.vectorizer)
+        if len(documents) < 5:
+            # max_df=0.80 would reject every term of a tiny sample
+            vectorizer.set_params(max_df=1.0)
+        with metrics.span('vectorize'):
+            return vectorizer.fit(documents)
+
+    def score_fitted(
+        self, vectorizer, resumes_data: list, job_descriptions: list,
+        chunk_size: int = CHUNK_ROWS
+    ) -> np.ndarray:
+        """Dense float32 (JDs × resumes) cosine matrix from a fitted vectorizer."""
+        if not resumes_data or not job_descriptions:
+            return np.zeros((len(job_descriptions), len(resumes_data)), dtype=np.float32)
+        with metrics.span('vectorize'):
+            jd_vecs = vectorizer.transform(self._jd_documents(job_descriptions)).astype(np.float32)
+            resume_vecs = vectorizer.transform(
+                self._resume_documents(resumes_data)).tocsr().astype(np.float32)
+        return self._product(jd_vecs, resume_vecs, chunk_size)
+
+    @staticmethod
+    def select_top(sims: np.ndarray, top_k: int = None, offset: int = 0) -> np.ndarray:
+        """
+        Row indices holding ranks ``offset+1 .. offset+top_k``, best first.
+
+        Uses ``np.argpartition`` so only the selected rows are sorted. Ties
+        keep their original order, matching a stable full sort.
+        """
+        sims = np.asarray(sims)
+        n = len(sims)
+        offset = max(0, int(offset))
+        end = n if top_k is None else min(n, offset + max(0, int(top_k)))
+        if offset >= end:
+            return np.empty(0, dtype=np.intp)
+
+        if end < n:
+            candidates = np.argpartition(-sims, end - 1)[:end]
+            # Rows tied with the cut-off score may have been split arbitrarily;
+            # pull all of them in so the tie-break stays stable.
+            cutoff = sims[candidates].min()
+            candidates = np.union1d(np.flatnonzero(sims > cutoff),
+                                    np.flatnonzero(sims == cutoff))
+        else:
+            candidates = np.arange(n)
+        order = candidates[np.lexsort((candidates, -sims[candidates]))]
+        return order[offset:end]
+
+    @staticmethod
+    def summarize(sims: np.ndarray, strong_threshold: float = 70.0) -> dict:
+        """Highest / average / strong-match figures for the results header."""
+        pct = np.round(np.asarray(sims, dtype=np.float64) * 100, 2)
+        if not len(pct):
+            return {"highest_match": 0, "average_match": 0, "strong_matches": 0}
+        return {
+            "highest_match": float(pct.max()),
+            "average_match": round(float(pct.mean()), 1),
+            "strong_matches": int((pct >= strong_threshold).sum()),
+        }
+
+    # ------------------------------------------------------------------ #
+    #  Internals                                                          #
+    # ------------------------------------------------------------------ #
+    def _blend(self, sims, resume_skills, job_description: str, skill_weight: float):
+        jd_skills = self.jd_skills(job_description)
+        if not jd_skills:
+            # Nothing to cover; a flat skill score would only shrink cosine
+            return sims
+        with metrics.span('skills'):
+            skill_scores = self.skill_scorer.score(resume_skills, jd_skills)[self.skill_mode]
+            return SkillScorer.blend(sims, skill_scores, skill_weight)
+
+    @staticmethod
+    def _empty_result() -> RankingResult:
+        return RankingResult.from_meta([], [], [])
+
+    @staticmethod
+    def _resume_documents(resumes_data: list) -> list:
+        documents = []
         for res in resumes_data:
             text = (
                 res.get("processed_text", "") if isinstance(res, dict) else str(res)
@@ -57,68 +362,94 @@ class JobMatcher:
             if not text:
                 text = (res.get("original_text", "") if isinstance(res, dict) else "").lower()
             documents.append(text.lower())
+        return documents
 
-        # --------------------------------------------------------------- #
-        # 2. TF-IDF vectorisation and cosine similarity
-        # --------------------------------------------------------------- #
-        tfidf = self.vectorizer.fit_transform(documents)
-        job_vec = tfidf[0:1]          # first row = Job Description
-        resume_vecs = tfidf[1:]       # remaining rows = resumes
-
-        sims = cosine_similarity(job_vec, resume_vecs).flatten()
-        # sims is a numpy array of floats in [0,1]
-
-        # --------------------------------------------------------------- #
-        # 3. Assemble result objects
-        # --------------------------------------------------------------- #
-        results = []
-        for idx, score in enumerate(sims):
-            pct = round(float(score) * 100, 2)  # to percentage, two decimals
-            res_meta = resumes_data[idx] if isinstance(resumes_data[idx], dict) else {}
-
-            results.append(
-                {
-                    "resume_id": idx,
-                    "filename": res_meta.get("filename", f"Resume_{idx+1}"),
-                    "similarity_score": float(score),
-                    "percentage_match": pct,
-                    "skills": res_meta.get("skills", []),
-                    "skill_count": res_meta.get("skill_count", 0),
-                }
-            )
-
-        # --------------------------------------------------------------- #
-        # 4. Sort & rank (most similar first)
-        # --------------------------------------------------------------- #
-        results.sort(key=lambda r: r["similarity_score"], reverse=True)
-        for rank, obj in enumerate(results, 1):
-            obj["rank"] = rank
-
-        # Optional DEBUG snippet (no nested f-strings!)
-        top3 = [f"{r['filename']} – {r['percentage_match']}%" for r in results[:3]]
-        print("DEBUG: Final ranking (top-3):", top3)
+    @staticmethod
+    def _jd_documents(job_descriptions: list) -> list:
+        return [jd.lower().strip() for jd in job_descriptions]
 
-        return results
+    def _vectorize_many(self, resumes_data: list, job_descriptions: list):
+        """One fit over every JD and resume; returns (JD rows, resume rows)."""
+        from sklearn.base import clone
+
+        documents = self._jd_documents(job_descriptions) + self._resume_documents(resumes_data)
+        with metrics.span('vectorize'):
+            tfidf = clone(self.vectorizer).fit_transform(documents).tocsr().astype(np.float32)
+        n_jds = len(job_descriptions)
+        return tfidf[:n_jds], tfidf[n_jds:]
+
+    @staticmethod
+    def _product(jd_vecs, resume_vecs, chunk_size: int) -> np.ndarray:
+        # TF-IDF rows are L2-normalised, so the dot product is the cosine.
+        out = np.empty((jd_vecs.shape[0], resume_vecs.shape[0]), dtype=np.float32)
+        with metrics.span('similarity'):
+            jd_t = jd_vecs.T.tocsc()
+            for start in range(0, resume_vecs.shape[0], chunk_size):
+                block = resume_vecs[start:start + chunk_size] @ jd_t
+                out[:, start:start + block.shape[0]] = block.toarray().T
+        metrics.RESUMES_SCORED.inc(out.size)
+        return out
+
+    @staticmethod
+    def _top_k_chunked(jd_vecs, resume_vecs, top_k: int, chunk_size: int):
+        with metrics.span('similarity'):
+            result = JobMatcher._select_top_chunked(jd_vecs, resume_vecs, top_k, chunk_size)
+        metrics.RESUMES_SCORED.inc(jd_vecs.shape[0] * resume_vecs.shape[0])
+        return result
+
+    @staticmethod
+    def _select_top_chunked(jd_vecs, resume_vecs, top_k: int, chunk_size: int):
+        n_jds, n_res = jd_vecs.shape[0], resume_vecs.shape[0]
+        k = max(0, min(int(top_k), n_res))
+        best_idx = np.empty((n_jds, 0), dtype=np.int64)
+        best_sims = np.empty((n_jds, 0), dtype=np.float32)
+        jd_t = jd_vecs.T.tocsc()
+        for start in range(0, n_res, chunk_size):
+            block = (resume_vecs[start:start + chunk_size] @ jd_t).toarray().T
+            cols = np.arange(start, start + block.shape[1], dtype=np.int64)
+            cand_sims = np.hstack([best_sims, block])
+            cand_idx = np.hstack([best_idx, np.broadcast_to(cols, block.shape)])
+            if cand_sims.shape[1] > k:
+                keep = np.argpartition(-cand_sims, k - 1, axis=1)[:, :k] if k else \
+                    np.empty((n_jds, 0), dtype=np.intp)
+                cand_sims = np.take_along_axis(cand_sims, keep, axis=1)
+                cand_idx = np.take_along_axis(cand_idx, keep, axis=1)
+            best_sims, best_idx = cand_sims, cand_idx
+        # Best first; ties by original position.
+        order = np.lexsort((best_idx, -best_sims))
+        return (np.take_along_axis(best_idx, order, axis=1),
+                np.take_along_axis(best_sims, order, axis=1))
+
+    @staticmethod
+    def _many_results(best_idx, best_sims, metas: list, ids: list = None) -> list:
+        return [RankingResult.from_meta(row_idx, row_sims, metas, ids).to_dicts()
+                for row_idx, row_sims in zip(best_idx, best_sims)]
 
     # ------------------------------------------------------------------ #
-    #  Helper: raw similarity vector (not used by the app, but handy)
+    #  Helper: raw similarity vector in the original order
     # ------------------------------------------------------------------ #
     def calculate_similarity_scores(
         self, resumes_data: list, job_description: str
     ) -> np.ndarray:
-        """Return a NumPy array of cosine similarities in the original order."""
+        """Return a NumPy array of cosine similarities in the original order.
+
+        Blended with skill coverage when ``skill_weight`` is set.
+        """
         if not resumes_data or not job_description.strip():
             return np.zeros(len(resumes_data))
 
-        docs = [job_description.lower().strip()]
-        for res in resumes_data:
-            text = (
-                res.get("processed_text", "") if isinstance(res, dict) else str(res)
-            ).strip()
-            if not text:
-                text = (res.get("original_text", "") if isinstance(res, dict) else "").lower()
-            docs.append(text.lower())
+        from sklearn.base import clone
+        from sklearn.metrics.pairwise import cosine_similarity
+
+        docs = [job_description.lower().strip()] + self._resume_documents(resumes_data)
 
-        tfidf = self.vectorizer.fit_transform(docs)
-        sims = cosine_similarity(tfidf[0:1], tfidf[1:]).flatten()
+        with metrics.span('vectorize'):
+            tfidf = clone(self.vectorizer).fit_transform(docs)
+        with metrics.span('similarity'):
+            sims = cosine_similarity(tfidf[0:1], tfidf[1:]).flatten()
+        metrics.RESUMES_SCORED.inc(len(sims))
+        if self.skill_weight:
+            resume_skills = self.skill_scorer.encode(
+                res.get('skills', ()) if isinstance(res, dict) else () for res in resumes_data)
+            sims = self._blend(sims, resume_skills, job_description, self.skill_weight)
         return sims
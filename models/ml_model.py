@@ -1,34 +1,153 @@
+# -------------------------------------------------
+#  Purpose: Random-forest resume classifier: parallel
+#           training, cached TF-IDF features and a
+#           joblib model file for shared serving.
+# -------------------------------------------------
+
+import hashlib
+import json
+import logging
+import os
+
+import joblib
+import numpy as np
+from sklearn.base import clone
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.metrics import classification_report, confusion_matrix
-import pickle, os
+
+from models.job_matcher import build_vectorizer
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
 
 class ResumeClassifier:
-    def __init__(self):
-        self.model = RandomForestClassifier(n_estimators=100, random_state=42)
+    """Random forest over TF-IDF features of processed resumes.
+
+    ``train``/``predict`` accept a feature matrix, or processed resume dicts
+    (or plain texts) which are turned into TF-IDF rows with the classifier's
+    own vectorizer. ``n_jobs`` cores are used for the trees and for the
+    cross-validation folds. With ``feature_cache_dir`` the fitted vectorizer
+    and training matrix are kept on disk, so re-training on the same corpus
+    skips vectorization.
+    """
+
+    def __init__(self, n_estimators=100, n_jobs=-1, random_state=42, feature_cache_dir=None):
+        self.n_jobs = n_jobs
+        self.model = RandomForestClassifier(n_estimators=n_estimators, random_state=random_state,
+                                            n_jobs=n_jobs)
+        self.vectorizer = None
+        self.feature_cache_dir = feature_cache_dir
         self.is_trained = False
 
-    def train(self, X, y):
+    # ------------------------------------------------------------------ #
+    #  Features                                                           #
+    # ------------------------------------------------------------------ #
+    @staticmethod
+    def _documents(resumes):
+        return [(res if isinstance(res, str) else res.get('processed_text', '')).lower()
+                for res in resumes]
+
+    def fit_features(self, resumes):
+        """Fit the vectorizer on ``resumes`` and return their feature matrix."""
+        documents = self._documents(resumes)
+        vectorizer = build_vectorizer(max_features=5_000)
+        path = None
+        if self.feature_cache_dir:
+            digest = hashlib.sha256(json.dumps(vectorizer.get_params(), sort_keys=True,
+                                               default=str).encode('utf-8'))
+            for document in documents:
+                digest.update(hashlib.sha256(document.encode('utf-8')).digest())
+            path = os.path.join(self.feature_cache_dir, f'{digest.hexdigest()}.joblib')
+            if os.path.exists(path):
+                logger.info("Using cached features %s", path)
+                self.vectorizer, X = joblib.load(path)
+                return X
+
+        with metrics.span('vectorize'):
+            X = vectorizer.fit_transform(documents).tocsr().astype(np.float32)
+        self.vectorizer = vectorizer
+        if path:
+            os.makedirs(self.feature_cache_dir, exist_ok=True)
+            joblib.dump((vectorizer, X), path + '.tmp')
+            os.replace(path + '.tmp', path)
+        return X
+
+    def features(self, X):
+        """``X`` as a feature matrix; resumes/texts go through the fitted vectorizer."""
+        if not isinstance(X, (list, tuple)):
+            return X
+        if self.vectorizer is None:
+            raise ValueError('Model was trained on a feature matrix; pass features')
+        with metrics.span('vectorize'):
+            return self.vectorizer.transform(self._documents(X)).astype(np.float32)
+
+    # ------------------------------------------------------------------ #
+    #  Training                                                           #
+    # ------------------------------------------------------------------ #
+    def train(self, X, y, cv=5):
+        if isinstance(X, (list, tuple)):
+            X = self.fit_features(X)
         X_tr, X_te, y_tr, y_te = train_test_split(X, y, test_size=0.2, stratify=y,
                                                   random_state=42)
         self.model.fit(X_tr, y_tr)
         self.is_trained = True
+        y_pred = self.model.predict(X_te)
+        # Folds run in parallel, each growing its trees on one core
+        fold_model = clone(self.model).set_params(n_jobs=1)
         return {
             'train_acc': self.model.score(X_tr, y_tr),
-            'test_acc':  self.model.score(X_te, y_te),
-            'cv_mean':   cross_val_score(self.model, X, y, cv=5).mean(),
-            'report':    classification_report(y_te, self.model.predict(X_te)),
-            'cm':        confusion_matrix(y_te, self.model.predict(X_te)).tolist()
+            'test_acc':  float(np.mean(y_pred == np.asarray(y_te))),
+            'cv_mean':   cross_val_score(fold_model, X, y, cv=cv, n_jobs=self.n_jobs).mean(),
+            'report':    classification_report(y_te, y_pred),
+            'cm':        confusion_matrix(y_te, y_pred).tolist()
         }
 
+    # ------------------------------------------------------------------ #
+    #  Prediction                                                         #
+    # ------------------------------------------------------------------ #
     def predict(self, X):
         if not self.is_trained:
             raise ValueError('Model not trained')
-        return self.model.predict(X)
+        return self.model.predict(self.features(X))
+
+    def predict_batch(self, resumes, chunk_size=1_024):
+        """Labels and confidences for a whole upload: ``(labels, confidence)`` arrays.
+
+        Resumes are vectorized and scored ``chunk_size`` at a time, one
+        forest pass per chunk.
+        """
+        if not self.is_trained:
+            raise ValueError('Model not trained')
+        labels = np.empty(len(resumes), dtype=self.model.classes_.dtype)
+        confidence = np.empty(len(resumes), dtype=np.float32)
+        for start in range(0, len(resumes), chunk_size):
+            proba = self.model.predict_proba(self.features(list(resumes[start:start + chunk_size])))
+            best = proba.argmax(axis=1)
+            labels[start:start + len(best)] = self.model.classes_[best]
+            confidence[start:start + len(best)] = proba[np.arange(len(best)), best]
+        return labels, confidence
 
+    # ------------------------------------------------------------------ #
+    #  Persistence                                                        #
+    # ------------------------------------------------------------------ #
     def save(self, path='model.pkl'):
-        pickle.dump(self.model, open(path,'wb'))
+        """Uncompressed joblib file, so ``load`` can memory-map its arrays."""
+        joblib.dump({'model': self.model, 'vectorizer': self.vectorizer}, path + '.tmp')
+        os.replace(path + '.tmp', path)
 
-    def load(self, path='model.pkl'):
+    def load(self, path='model.pkl', mmap_mode='r'):
+        """Load a saved model; arrays stay on disk (read-only) with ``mmap_mode``.
+
+        Loaded before gunicorn forks (``preload_app``), the forest is shared
+        by every worker. Plain pickles from older versions still load.
+        """
         if not os.path.exists(path): raise FileNotFoundError(path)
-        self.model = pickle.load(open(path,'rb')); self.is_trained = True
+        saved = joblib.load(path, mmap_mode=mmap_mode)
+        if isinstance(saved, dict):
+            self.model, self.vectorizer = saved['model'], saved.get('vectorizer')
+        else:
+            self.model, self.vectorizer = saved, None
+        self.is_trained = True
+        return self
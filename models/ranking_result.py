@@ -0,0 +1,211 @@
+# -------------------------------------------------
+#  Purpose: Columnar ranking results; one NumPy
+#           column per field instead of one dict
+#           per resume.
+# -------------------------------------------------
+
+from collections.abc import Sequence
+
+import numpy as np
+
+
+class RankingResult(Sequence):
+    """Ranked resumes, best first, stored column by column.
+
+    Scores, source rows and ranks are NumPy arrays; ids and filenames are
+    object arrays pointing at the strings the caller already holds; skills
+    are interned once per result and kept as a packed bitset (one bit per
+    distinct skill per resume). Indexing yields ``ResultRow`` views that
+    read the columns on demand and behave like the old per-resume dicts
+    (``row['filename']``, ``row.filename``, ``row.to_dict()``).
+
+    When built with the JD's skills (``jd_skills``), rows also report which
+    of them each resume covers. When any meta lists near-duplicate
+    ``duplicates`` (see ``NearDuplicateDetector``), rows carry that list too.
+    """
+
+    FIELDS = ('resume_id', 'filename', 'similarity_score', 'percentage_match',
+              'skills', 'skill_count', 'rank')
+    SKILL_FIELDS = ('matched_skills', 'missing_skills', 'skill_coverage')
+
+    def __init__(self, rows, scores, ids, filenames, skill_names, skill_bits, skill_counts,
+                 start_rank=1, jd_skills=None, duplicates=None):
+        self.rows = rows
+        self.scores = scores
+        self.ids = ids
+        self.filenames = filenames
+        self.skill_names = skill_names
+        self.skill_bits = skill_bits
+        self.skill_counts = skill_counts
+        self.start_rank = start_rank
+        self.jd_skills = tuple(jd_skills) if jd_skills is not None else None
+        self.duplicates = duplicates
+
+    @property
+    def fields(self):
+        fields = self.FIELDS + self.SKILL_FIELDS if self.jd_skills is not None else self.FIELDS
+        return fields + ('duplicates',) if self.duplicates is not None else fields
+
+    @classmethod
+    def from_meta(cls, rows, scores, metas, ids=None, start_rank=1, jd_skills=None):
+        """Columns for ``rows`` (indices into ``metas``/``ids``) scored ``scores``."""
+        rows = np.asarray(rows, dtype=np.int64)
+        scores = np.asarray(scores, dtype=np.float32)
+        filenames = np.empty(len(rows), dtype=object)
+        skill_counts = np.empty(len(rows), dtype=np.int32)
+        duplicates = np.empty(len(rows), dtype=object)
+        vocabulary = {}
+        bit_rows, bit_cols = [], []
+        for i, row in enumerate(rows.tolist()):
+            res_meta = metas[row]
+            filenames[i] = res_meta.get('filename')
+            skill_counts[i] = res_meta.get('skill_count', 0)
+            duplicates[i] = res_meta.get('duplicates')
+            for skill in res_meta.get('skills', ()):
+                bit_rows.append(i)
+                bit_cols.append(vocabulary.setdefault(skill, len(vocabulary)))
+
+        skill_bits = np.zeros((len(rows), (len(vocabulary) + 7) // 8), dtype=np.uint8)
+        if bit_rows:
+            cols = np.asarray(bit_cols, dtype=np.int64)
+            # Same bit order as np.packbits: the first skill is the high bit.
+            np.bitwise_or.at(skill_bits, (np.asarray(bit_rows), cols >> 3),
+                             (0x80 >> (cols & 7)).astype(np.uint8))
+
+        if ids is None:
+            ids = rows
+        else:
+            ids_column = np.empty(len(rows), dtype=object)
+            ids_column[:] = [ids[row] for row in rows.tolist()]
+            ids = ids_column
+        if not any(duplicates):
+            duplicates = None
+        return cls(rows, scores, ids, filenames, tuple(vocabulary), skill_bits, skill_counts,
+                   start_rank, jd_skills, duplicates)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, _, step = i.indices(len(self))
+            if step != 1:
+                raise ValueError('RankingResult slices must be contiguous')
+            return RankingResult(self.rows[i], self.scores[i], self.ids[i], self.filenames[i],
+                                 self.skill_names, self.skill_bits[i], self.skill_counts[i],
+                                 self.start_rank + start, self.jd_skills,
+                                 None if self.duplicates is None else self.duplicates[i])
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('result index out of range')
+        return ResultRow(self, i)
+
+    @property
+    def ranks(self):
+        return np.arange(self.start_rank, self.start_rank + len(self), dtype=np.int64)
+
+    @property
+    def percentages(self):
+        return np.round(self.scores.astype(np.float64) * 100, 2)
+
+    def skills_of(self, i):
+        bits = np.unpackbits(self.skill_bits[i])[:len(self.skill_names)]
+        return [self.skill_names[j] for j in np.flatnonzero(bits)]
+
+    def has_skill(self, skill):
+        """Boolean mask of the results listing ``skill``."""
+        try:
+            j = self.skill_names.index(skill)
+        except ValueError:
+            return np.zeros(len(self), dtype=bool)
+        return (self.skill_bits[:, j >> 3] & (0x80 >> (j & 7))) != 0
+
+    def to_dicts(self):
+        return [row.to_dict() for row in self]
+
+
+class ResultRow:
+    """Lazy view of one ``RankingResult`` row, readable like a dict."""
+
+    __slots__ = ('_result', '_i')
+
+    def __init__(self, result, i):
+        self._result = result
+        self._i = i
+
+    @property
+    def resume_id(self):
+        value = self._result.ids[self._i]
+        return int(value) if isinstance(value, np.integer) else value
+
+    @property
+    def filename(self):
+        name = self._result.filenames[self._i]
+        return name if name is not None else f"Resume_{int(self._result.rows[self._i]) + 1}"
+
+    @property
+    def similarity_score(self):
+        return float(self._result.scores[self._i])
+
+    @property
+    def percentage_match(self):
+        return round(float(self._result.scores[self._i]) * 100, 2)  # two decimals
+
+    @property
+    def skills(self):
+        return self._result.skills_of(self._i)
+
+    @property
+    def skill_count(self):
+        return int(self._result.skill_counts[self._i])
+
+    @property
+    def rank(self):
+        return self._result.start_rank + self._i
+
+    @property
+    def duplicates(self):
+        """Filenames of near-duplicates ranked through this resume."""
+        duplicates = self._result.duplicates
+        return list(duplicates[self._i] or ()) if duplicates is not None else []
+
+    @property
+    def matched_skills(self):
+        jd_skills = self._result.jd_skills
+        if jd_skills is None:
+            return None
+        have = set(self.skills)
+        return [skill for skill in jd_skills if skill in have]
+
+    @property
+    def missing_skills(self):
+        jd_skills = self._result.jd_skills
+        if jd_skills is None:
+            return None
+        have = set(self.skills)
+        return [skill for skill in jd_skills if skill not in have]
+
+    @property
+    def skill_coverage(self):
+        jd_skills = self._result.jd_skills
+        if not jd_skills:
+            return None if jd_skills is None else 0.0
+        return round(len(self.matched_skills) / len(jd_skills), 4)
+
+    def __getitem__(self, key):
+        if key not in self._result.fields:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self._result.fields else default
+
+    def keys(self):
+        return self._result.fields
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in self._result.fields}
+
+    def __repr__(self):
+        return f'ResultRow({self.to_dict()!r})'
@@ -0,0 +1,503 @@
+# -------------------------------------------------
+#  Purpose: Fitted TF-IDF index over the stored
+#           candidate pool, persisted to disk so a
+#           new job-description is scored with one
+#           transform + one sparse mat-vec.
+# -------------------------------------------------
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+
+# scipy.sparse and joblib are imported where used to keep app start-up light.
+from models.job_matcher import build_vectorizer
+from utils import metrics
+from utils.sqlite_store import SQLiteConnections
+
+logger = logging.getLogger(__name__)
+
+
+class ResumeIndex:
+    """TF-IDF matrix of stored resumes that supports incremental add/remove.
+
+    Vocabulary and IDF weights are fitted once over the pool. Documents added
+    later are transformed with the existing vocabulary; once more than
+    ``refit_ratio`` of the pool has been added since the last fit,
+    ``needs_refit`` turns true and ``refit`` rebuilds the index so new terms
+    are picked up. Refitting transforms the whole pool, so ``add`` never
+    does it: callers run ``refit`` off the request path.
+
+    On disk the index is a directory holding ``docs.sqlite3`` (one row per
+    document: id, processed text, metadata and its L2-normalised CSR row)
+    and the fitted vectorizer, ``model-<token>.joblib``. Adding documents
+    inserts their rows and nothing else; the vectorizer file is only written
+    by a fit. Writers serialise on a SQLite write transaction, and readers
+    pick up rows other processes appended (or reload everything after a
+    fit or removal), so one directory can be shared by every gunicorn
+    worker.
+    """
+
+    # Data files named in the state table; others are swept after a refit
+    FILE_PREFIXES = ('model-',)
+
+    def __init__(self, index_dir=None, refit_ratio=0.25):
+        self.index_dir = index_dir
+        self.refit_ratio = refit_ratio
+        self._lock = threading.RLock()
+        self._inverted = None
+        self._db = None
+        self._reset()
+        if index_dir:
+            # Loaded on first use (see reload_if_changed), not at import time.
+            os.makedirs(index_dir, exist_ok=True)
+            self._db = SQLiteConnections(self._path('docs.sqlite3'))
+            conn = self._db.get()
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS docs ('
+                ' seq INTEGER PRIMARY KEY AUTOINCREMENT,'
+                ' id TEXT NOT NULL UNIQUE,'
+                ' text TEXT NOT NULL,'
+                ' meta TEXT NOT NULL,'
+                ' indices BLOB,'
+                ' data BLOB)'
+            )
+            conn.execute('CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value)')
+            conn.execute("INSERT OR IGNORE INTO state(key, value) VALUES ('generation', 0)")
+
+    def _reset(self):
+        self.vectorizer = None
+        self._model_file = None
+        self.matrix = None
+        self.ids = []
+        self.meta = []
+        self.texts = []
+        self._positions = {}
+        self.added_since_fit = 0
+        # (generation, last seq) of the database as of the last load; the
+        # generation changes on every write other than an append.
+        self._generation = None
+        self._last_seq = 0
+
+    def __len__(self):
+        self.reload_if_changed()
+        return len(self.ids)
+
+    def __contains__(self, doc_id):
+        self.reload_if_changed()
+        return doc_id in self._positions
+
+    # ------------------------------------------------------------------ #
+    #  Building                                                          #
+    # ------------------------------------------------------------------ #
+    def fit(self, ids, texts, meta=None):
+        """(Re)build the index from scratch over ``texts``."""
+        ids, texts = list(ids), list(texts)
+        meta = list(meta) if meta is not None else [{} for _ in ids]
+        with self._write_lock() as conn:
+            self._fit(conn, ids, texts, meta)
+
+    def _fit(self, conn, ids, texts, meta):
+        if not ids:
+            self._remove(conn, self.ids)
+            return
+        model, rows = self._fit_model(texts)
+        self._replace(conn, model, ids, texts, meta, rows)
+
+    def _fit_model(self, texts):
+        """Fitted vectorizer over ``texts`` and their rows."""
+        # max_df=0.80 would reject every term of a one- or two-document pool.
+        vectorizer = build_vectorizer(max_df=0.80 if len(texts) >= 5 else 1.0)
+        return vectorizer, vectorizer.fit_transform(texts).tocsr().astype(np.float32)
+
+    def _encode(self, model, texts):
+        return model.transform(texts).tocsr().astype(np.float32)
+
+    def add(self, ids, texts, meta=None):
+        """Add or replace documents using the already fitted vocabulary.
+
+        Ids already indexed with the same text are left alone, so only new
+        or changed documents are transformed and written.
+        """
+        ids, texts = list(ids), list(texts)
+        meta = list(meta) if meta is not None else [{} for _ in ids]
+        with self._write_lock() as conn:
+            new = {}
+            for doc_id, text, doc_meta in zip(ids, texts, meta):
+                position = self._positions.get(doc_id)
+                if position is None or self.texts[position] != text:
+                    new[doc_id] = (text, doc_meta)
+            if not new:
+                return
+            ids = list(new)
+            texts = [text for text, _ in new.values()]
+            meta = [doc_meta for _, doc_meta in new.values()]
+            self._remove(conn, [doc_id for doc_id in ids if doc_id in self._positions])
+            if self.vectorizer is None and self._fit_on_add(len(self.ids) + len(ids)):
+                # Nothing to transform with yet; fitting the first batch is cheap.
+                self._fit(conn, self.ids + ids, self.texts + texts, self.meta + meta)
+                return
+            rows = self._encode(self.vectorizer, texts) if self.vectorizer is not None else None
+            self._append(conn, ids, texts, meta, rows)
+
+    def _fit_on_add(self, n):
+        """Whether ``add`` may fit a model over a pool of ``n`` documents."""
+        return True
+
+    def _append(self, conn, ids, texts, meta, rows):
+        """Append documents and their encoded ``rows`` (None: stored unencoded)."""
+        start = len(self.ids)
+        seqs = self._insert(conn, ids, texts, meta)
+        # New lists rather than in-place extends: score() snapshots
+        # may still be reading the old ones.
+        if rows is not None:
+            self.matrix = self._write_rows(conn, seqs, start, rows)
+        self.ids = self.ids + ids
+        self.texts = self.texts + texts
+        self.meta = self.meta + meta
+        for offset, doc_id in enumerate(ids):
+            self._positions[doc_id] = start + offset
+        if rows is None:
+            return
+        self.added_since_fit += len(ids)
+        if conn is not None:
+            conn.execute("INSERT OR REPLACE INTO state(key, value) "
+                         "VALUES ('added_since_fit', ?)", (self.added_since_fit,))
+        self._rows_added(conn, start, rows)
+
+    def needs_refit(self):
+        """Whether more than ``refit_ratio`` of the pool was added since the last fit."""
+        self.reload_if_changed()
+        with self._lock:
+            return self._needs_refit()
+
+    def _needs_refit(self):
+        return self.vectorizer is not None and self.added_since_fit > self.refit_ratio * len(self.ids)
+
+    def refit(self):
+        """Refit over the whole pool if ``needs_refit``; returns whether it did.
+
+        The new model is fitted without holding the write lock, so uploads
+        carry on meanwhile; documents they add are transformed with it just
+        before the swap.
+        """
+        if not self.needs_refit():
+            return False
+        with self._lock:
+            ids, texts, generation = self.ids, self.texts, self._generation
+        model, rows = self._fit_model(texts)
+        with self._write_lock() as conn:
+            if self._generation != generation or not self._needs_refit():
+                # Changed by a removal or another refit; the next call starts over.
+                self._discard_rows(rows)
+                return False
+            if len(self.ids) > len(ids):
+                rows = self._concat(rows, self._encode(model, self.texts[len(ids):]))
+            self._replace(conn, model, self.ids, self.texts, self.meta, rows)
+        logger.info("Refitted %s over %d resumes", type(self).__name__, len(self.ids))
+        return True
+
+    def remove(self, ids):
+        """Drop documents from the index; unknown ids are ignored."""
+        with self._write_lock() as conn:
+            self._remove(conn, list(ids))
+
+    def _remove(self, conn, ids):
+        doomed = {self._positions[doc_id] for doc_id in ids if doc_id in self._positions}
+        if not doomed:
+            return
+        if conn is not None:
+            conn.executemany('DELETE FROM docs WHERE id = ?', [(self.ids[i],) for i in doomed])
+            self._bump(conn)
+        keep = np.asarray([i for i in range(len(self.ids)) if i not in doomed], dtype=np.int64)
+        if not len(keep):
+            if conn is not None:
+                conn.execute("DELETE FROM state WHERE key != 'generation'")
+            self._reset()
+            return
+        if self.matrix is not None:
+            self.matrix = self._remove_rows(conn, keep)
+        self.ids = [self.ids[i] for i in keep]
+        self.texts = [self.texts[i] for i in keep]
+        self.meta = [self.meta[i] for i in keep]
+        self._positions = {doc_id: i for i, doc_id in enumerate(self.ids)}
+
+    def _replace(self, conn, model, ids, texts, meta, rows):
+        """Make ``ids`` (encoded by ``model`` as ``rows``) the whole index."""
+        if conn is not None:
+            conn.execute('DELETE FROM docs')
+            seqs = self._insert(conn, ids, texts, meta)
+            self._bump(conn)
+            conn.executemany('INSERT OR REPLACE INTO state(key, value) VALUES (?, ?)',
+                             [('model', self._save_model(model)), ('added_since_fit', 0),
+                              *self._model_state(model, rows).items()])
+        else:
+            seqs = None
+        self.vectorizer = model
+        self.matrix = self._write_rows(conn, seqs, 0, rows)
+        self.ids, self.texts, self.meta = list(ids), list(texts), list(meta)
+        self._positions = {doc_id: i for i, doc_id in enumerate(self.ids)}
+        self.added_since_fit = 0
+        self._rows_added(conn, 0, rows)
+
+    def _insert(self, conn, ids, texts, meta):
+        """Insert document rows and return their sequence numbers."""
+        if conn is None:
+            return None
+        return [conn.execute('INSERT INTO docs(id, text, meta) VALUES (?, ?, ?)',
+                             (doc_id, text, json.dumps(doc_meta))).lastrowid
+                for doc_id, text, doc_meta in zip(ids, texts, meta)]
+
+    # ------------------------------------------------------------------ #
+    #  Scoring                                                           #
+    # ------------------------------------------------------------------ #
+    def snapshot(self):
+        """``(matrix, vectorizer, ids, meta)`` as of now, safe to use unlocked.
+
+        Writers replace these attributes instead of mutating them, so the
+        returned objects stay consistent with each other.
+        """
+        self.reload_if_changed()
+        with self._lock:
+            return self.matrix, self.vectorizer, self.ids, self.meta
+
+    def score(self, job_description):
+        """Cosine similarity of every indexed resume to ``job_description``.
+
+        Returns ``(sims, ids, meta)`` taken from one consistent snapshot.
+        """
+        matrix, vectorizer, ids, meta = self.snapshot()
+        if matrix is None or not job_description.strip():
+            return np.zeros(len(ids), dtype=np.float32), ids, meta
+        with metrics.span('vectorize'):
+            query = vectorizer.transform([job_description.lower().strip()]).astype(np.float32)
+        # Rows are L2-normalised, so the dot product is the cosine.
+        with metrics.span('similarity'):
+            sims = np.asarray((matrix @ query.T).todense()).ravel()
+        metrics.RESUMES_SCORED.inc(len(sims))
+        return sims, ids, meta
+
+    def inverted(self):
+        """``(InvertedIndex, vectorizer, ids, meta)`` for pruned top-k retrieval.
+
+        The posting lists are built on first use after each change to the
+        matrix and shared by every caller until the next one.
+        """
+        from models.inverted_index import InvertedIndex
+
+        matrix, vectorizer, ids, meta = self.snapshot()
+        if matrix is None:
+            return None, vectorizer, ids, meta
+        with self._lock:
+            inverted = self._inverted
+            if inverted is None or inverted.matrix is not matrix:
+                inverted = self._inverted = InvertedIndex(matrix, meta)
+        return inverted, vectorizer, ids, meta
+
+    def search(self, job_description, k=None, must_have=None):
+        """Best ``k`` resumes for a JD, found through the posting lists.
+
+        Returns ``(rows, scores, ids, meta)``: rows best first, their cosine
+        scores, and the snapshot the rows index into. Same results as
+        ranking ``score`` exhaustively; ``must_have`` keeps only resumes
+        listing every given skill.
+        """
+        inverted, vectorizer, ids, meta = self.inverted()
+        if inverted is None or not job_description.strip():
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32), ids, meta
+        allowed = inverted.skill_filter(must_have)
+        k = len(inverted) if k is None else k
+        with metrics.span('vectorize'):
+            query = vectorizer.transform([job_description.lower().strip()]).astype(np.float32)
+        with metrics.span('similarity'):
+            rows, scores, scored = inverted.top_k(query, k, allowed)
+        metrics.RESUMES_SCORED.inc(scored)
+        return rows, scores, ids, meta
+
+    def skill_filter(self, must_have):
+        """Mask of the resumes listing every skill in ``must_have`` (None: no filter)."""
+        inverted = self.inverted()[0]
+        return None if inverted is None else inverted.skill_filter(must_have)
+
+    # ------------------------------------------------------------------ #
+    #  Persistence                                                       #
+    # ------------------------------------------------------------------ #
+    def _path(self, name):
+        return os.path.join(self.index_dir, name)
+
+    @staticmethod
+    def _version(conn):
+        return conn.execute(
+            "SELECT (SELECT value FROM state WHERE key = 'generation'),"
+            " (SELECT COALESCE(MAX(seq), 0) FROM docs)"
+        ).fetchone()
+
+    def _bump(self, conn):
+        conn.execute("UPDATE state SET value = value + 1 WHERE key = 'generation'")
+
+    @contextmanager
+    def _write_lock(self):
+        """In-process lock plus, on disk, a write transaction over an up-to-date copy."""
+        with self._lock:
+            if self._db is None:
+                yield None
+                return
+            conn = self._db.get()
+            try:
+                with conn:
+                    conn.execute('BEGIN IMMEDIATE')
+                    # Another process may have written since we last loaded.
+                    self._catch_up(conn)
+                    self._remove_stale_files()
+                    yield conn
+                    self._generation, self._last_seq = self._version(conn)
+            except BaseException:
+                # The in-memory copy may be ahead of what was committed.
+                self._generation = None
+                raise
+
+    def reload_if_changed(self):
+        if self._db is None:
+            return
+        try:
+            conn = self._db.get()
+            if self._version(conn) == (self._generation, self._last_seq):
+                return
+            with self._lock, conn:
+                # One read transaction, so rows and state agree
+                conn.execute('BEGIN')
+                self._catch_up(conn)
+        except (OSError, ValueError, sqlite3.Error) as e:
+            # Keep serving the copy we have.
+            logger.warning("Could not reload %s: %s", type(self).__name__, e)
+
+    def _catch_up(self, conn):
+        generation, last_seq = self._version(conn)
+        if generation == self._generation and last_seq == self._last_seq:
+            return
+        state = dict(conn.execute('SELECT key, value FROM state'))
+        if generation == self._generation and self.vectorizer is not None:
+            # Only appends since our copy: read just the new rows.
+            after, start = self._last_seq, len(self.ids)
+        else:
+            after, start = 0, 0
+        rows = conn.execute('SELECT id, text, meta FROM docs WHERE seq > ? ORDER BY seq',
+                            (after,)).fetchall()
+        if not start:
+            vectorizer, model_file = self.vectorizer, self._model_file
+            self._reset()
+            if state.get('model') is not None:
+                self.vectorizer, self._model_file = (
+                    (vectorizer, model_file) if state['model'] == model_file
+                    else (self._load_model(state['model'], state), state['model']))
+        ids = [doc_id for doc_id, _, _ in rows]
+        texts = [text for _, text, _ in rows]
+        meta = [json.loads(doc_meta) for _, _, doc_meta in rows]
+        if self.vectorizer is not None:
+            self.matrix = self._read_rows(conn, after, start, len(rows), state)
+        if start:
+            self.ids, self.texts, self.meta = self.ids + ids, self.texts + texts, self.meta + meta
+            for offset, doc_id in enumerate(ids):
+                self._positions[doc_id] = start + offset
+        else:
+            self.ids, self.texts, self.meta = ids, texts, meta
+            self._positions = {doc_id: i for i, doc_id in enumerate(self.ids)}
+        self.added_since_fit = state.get('added_since_fit', 0)
+        self._generation, self._last_seq = generation, last_seq
+
+    def load(self):
+        """Reload everything from disk."""
+        with self._lock:
+            self._generation = None
+        self.reload_if_changed()
+
+    # Row storage: CSR rows live in the docs table, the vectorizer in a
+    # joblib file named in the state table. VectorIndex overrides these.
+    def _write_rows(self, conn, seqs, start, rows):
+        """Persist ``rows`` for docs ``seqs`` (placed from ``start``); returns the new matrix."""
+        if conn is not None:
+            conn.executemany(
+                'UPDATE docs SET indices = ?, data = ? WHERE seq = ?',
+                [(rows.indices[rows.indptr[i]:rows.indptr[i + 1]].astype(np.int32).tobytes(),
+                  rows.data[rows.indptr[i]:rows.indptr[i + 1]].astype(np.float32).tobytes(), seq)
+                 for i, seq in enumerate(seqs)]
+            )
+        return rows if start == 0 else self._concat(self.matrix, rows)
+
+    def _read_rows(self, conn, after, start, count, state):
+        """The matrix with the ``count`` stored rows after seq ``after`` placed from ``start``."""
+        import scipy.sparse as sp
+
+        indices, data = [], []
+        for ind, val in conn.execute('SELECT indices, data FROM docs WHERE seq > ? ORDER BY seq',
+                                     (after,)):
+            indices.append(np.frombuffer(ind, dtype=np.int32))
+            data.append(np.frombuffer(val, dtype=np.float32))
+        if len(indices) != count:
+            raise ValueError('index rows are out of sync')
+        indptr = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum([len(ind) for ind in indices], out=indptr[1:])
+        rows = sp.csr_matrix((np.concatenate(data) if data else np.zeros(0, np.float32),
+                              np.concatenate(indices) if indices else np.zeros(0, np.int32),
+                              indptr), shape=(count, int(state['dim'])))
+        return rows if start == 0 else self._concat(self.matrix, rows)
+
+    def _remove_rows(self, conn, keep):
+        return self.matrix[keep]
+
+    def _rows_added(self, conn, start, rows):
+        """Called once ``rows`` are in the index from position ``start``."""
+
+    def _discard_rows(self, rows):
+        """Called with rows fitted by a refit that was abandoned."""
+
+    @staticmethod
+    def _concat(rows, more):
+        import scipy.sparse as sp
+
+        return sp.vstack([rows, more], format='csr')
+
+    def _model_state(self, model, rows):
+        return {'dim': int(rows.shape[1])}
+
+    def _save_model(self, model):
+        import joblib
+
+        name = f'model-{uuid.uuid4().hex}.joblib'
+        joblib.dump(model, self._path(name + '.tmp'))
+        os.replace(self._path(name + '.tmp'), self._path(name))
+        self._model_file = name
+        return name
+
+    def _load_model(self, name, state):
+        import joblib
+
+        return joblib.load(self._path(name))
+
+    def _current_files(self):
+        return {self._model_file}
+
+    def _remove_stale_files(self):
+        """Delete data files the committed state no longer names.
+
+        Runs inside the write transaction, so no other writer can be about
+        to commit a file this would delete. ``.tmp`` files may belong to a
+        refit still running elsewhere and are only swept once a day old.
+        """
+        current = self._current_files()
+        for name in os.listdir(self.index_dir):
+            if not name.startswith(self.FILE_PREFIXES) or name in current:
+                continue
+            try:
+                if (name.endswith('.tmp')
+                        and time.time() - os.path.getmtime(self._path(name)) < 24 * 3600):
+                    continue
+                os.remove(self._path(name))
+            except OSError:
+                pass
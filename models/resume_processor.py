@@ -1,42 +1,33 @@
-import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-import numpy as np
+import logging
+
+from utils import metrics
 from utils.text_preprocessing import TextPreprocessor
+from models.skill_matcher import get_default_matcher
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever process_resume output can change for the same text; the
+# taxonomy and NLTK resources are part of ``ResumeProcessor.version`` already.
+PROCESSOR_VERSION = '1'
 
 
 class ResumeProcessor:
     def __init__(self):
         self.preprocessor = TextPreprocessor()
-        self.vectorizer = TfidfVectorizer(
-            max_features=5000,
-            ngram_range=(1, 2),
-            stop_words='english'
-        )
+        self.skill_matcher = get_default_matcher()
+
+    @property
+    def version(self):
+        """Key for stored ``process_resume`` output (see ``CandidateStore``)"""
+        return f'{PROCESSOR_VERSION}:{self.preprocessor.version}:{self.skill_matcher.version}'
 
     def extract_skills(self, text):
         """Extract technical skills from resume text"""
-        skills_keywords = [
-            'python', 'java', 'javascript', 'sql', 'mongodb', 'react', 'angular',
-            'machine learning', 'data science', 'artificial intelligence', 'ai',
-            'flask', 'django', 'nodejs', 'express', 'html', 'css', 'bootstrap',
-            'git', 'docker', 'kubernetes', 'aws', 'azure', 'gcp', 'cloud',
-            'pandas', 'numpy', 'scikit-learn', 'tensorflow', 'pytorch',
-            'mysql', 'postgresql', 'redis', 'spark', 'hadoop', 'big data',
-            'tableau', 'power bi', 'excel', 'api', 'rest', 'json', 'xml',
-            'linux', 'windows', 'devops', 'ci/cd', 'agile', 'scrum',
-            'spring', 'hibernate', 'microservices', 'web development',
-            'mobile development', 'android', 'ios', 'swift', 'kotlin'
-        ]
-
-        text_lower = text.lower()
-        found_skills = []
-
-        for skill in skills_keywords:
-            if skill in text_lower:
-                found_skills.append(skill)
+        return self.skill_matcher.extract(text)
 
-        # Remove duplicates and return
-        return list(set(found_skills))
+    def extract_skill_matches(self, text):
+        """Skill occurrences with positions (``SkillMatch`` tuples)"""
+        return self.skill_matcher.find(text)
 
     def process_resume(self, resume_text):
         """Process individual resume"""
@@ -48,30 +39,36 @@ class ResumeProcessor:
                     'original_text': resume_text,
                     'processed_text': '',
                     'skills': [],
-                    'skill_count': 0
+                    'skill_count': 0,
+                    'skill_counts': {}
                 }
 
             # Preprocess text for matching
-            processed_text = self.preprocessor.preprocess_text(cleaned_text)
+            with metrics.span('preprocess'):
+                processed_text = self.preprocessor.preprocess_text(cleaned_text)
 
-            # Extract skills from original text (better detection)
-            skills = self.extract_skills(cleaned_text)
+            # Extract skills from original text (better detection), one pass
+            with metrics.span('skills'):
+                skill_counts = self.skill_matcher.count(cleaned_text)
+            skills = list(skill_counts)
 
-            print(f"DEBUG: Processed text length: {len(processed_text)}")
-            print(f"DEBUG: Skills found: {skills}")
+            logger.debug("Processed text length: %d", len(processed_text))
+            logger.debug("Skills found: %s", skills)
 
             return {
                 'original_text': resume_text,
                 'processed_text': processed_text if processed_text.strip() else cleaned_text.lower(),
                 'skills': skills,
-                'skill_count': len(skills)
+                'skill_count': len(skills),
+                'skill_counts': dict(skill_counts)
             }
         except Exception as e:
-            print(f"Error processing resume: {e}")
+            logger.exception("Error processing resume: %s", e)
             # Return fallback processing
             return {
                 'original_text': resume_text,
                 'processed_text': resume_text.lower(),
                 'skills': [],
-                'skill_count': 0
+                'skill_count': 0,
+                'skill_counts': {}
             }
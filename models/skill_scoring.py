@@ -0,0 +1,95 @@
+# -------------------------------------------------
+#  Purpose: Score how well each resume's extracted
+#           skills cover the job-description's, for
+#           every resume at once with sparse algebra.
+# -------------------------------------------------
+
+import numpy as np
+
+from models.skill_matcher import get_default_matcher
+
+MODES = ('coverage', 'weighted')
+
+
+class SkillScorer:
+    """Skill-overlap scores over a fixed skill vocabulary.
+
+    Resumes become rows of a binary CSR matrix (resumes x skills); the JD
+    becomes one weight vector over the same columns, so coverage, missing
+    counts and weighted coverage for the whole pool are each one sparse
+    mat-vec. ``weighted`` weights every JD skill by how often the JD
+    mentions it times its smoothed IDF in the pool, so rare skills the JD
+    stresses count most.
+    """
+
+    def __init__(self, vocabulary=None):
+        self.vocabulary = list(vocabulary if vocabulary is not None
+                               else get_default_matcher().skills)
+        self.columns = {skill: j for j, skill in enumerate(self.vocabulary)}
+
+    def encode(self, skill_lists):
+        """Binary float32 CSR matrix, one row per skills list.
+
+        Skills outside the vocabulary are ignored.
+        """
+        import scipy.sparse as sp
+
+        columns = self.columns
+        indices, indptr = [], [0]
+        for skills in skill_lists:
+            indices.extend({columns[s] for s in skills if s in columns})
+            indptr.append(len(indices))
+        data = np.ones(len(indices), dtype=np.float32)
+        return sp.csr_matrix((data, np.asarray(indices, dtype=np.int32), indptr),
+                             shape=(len(indptr) - 1, len(self.vocabulary)))
+
+    def jd_weights(self, jd_skill_counts, resume_matrix):
+        """Weight per vocabulary column for a JD, normalised to sum to 1.
+
+        ``jd_skill_counts`` maps JD skills to mention counts (a plain list
+        counts each skill once).
+        """
+        if not isinstance(jd_skill_counts, dict):
+            jd_skill_counts = dict.fromkeys(jd_skill_counts, 1)
+        weights = np.zeros(len(self.vocabulary), dtype=np.float64)
+        cols = [self.columns[s] for s in jd_skill_counts if s in self.columns]
+        if not cols:
+            return weights
+        counts = [jd_skill_counts[self.vocabulary[j]] for j in cols]
+        n = resume_matrix.shape[0]
+        df = np.asarray(resume_matrix[:, cols].sum(axis=0)).ravel()
+        weights[cols] = np.asarray(counts) * (np.log((1 + n) / (1 + df)) + 1)
+        return weights / weights.sum()
+
+    def score(self, resume_matrix, jd_skill_counts):
+        """Per-resume arrays: ``matched``, ``missing``, ``coverage``, ``weighted``.
+
+        All zeros when the JD names no known skill.
+        """
+        n = resume_matrix.shape[0]
+        if not isinstance(jd_skill_counts, dict):
+            jd_skill_counts = dict.fromkeys(jd_skill_counts, 1)
+        required = np.zeros(len(self.vocabulary), dtype=np.float32)
+        required[[self.columns[s] for s in jd_skill_counts if s in self.columns]] = 1
+        wanted = int(required.sum())
+        if not wanted:
+            zeros = np.zeros(n, dtype=np.float32)
+            return {'matched': zeros.astype(np.int32), 'missing': zeros.astype(np.int32),
+                    'coverage': zeros, 'weighted': zeros}
+        matched = (resume_matrix @ required).astype(np.int32)
+        weighted = resume_matrix @ self.jd_weights(jd_skill_counts, resume_matrix)
+        return {
+            'matched': matched,
+            'missing': wanted - matched,
+            'coverage': (matched / wanted).astype(np.float32),
+            'weighted': weighted.astype(np.float32),
+        }
+
+    @staticmethod
+    def blend(cosine, skill_scores, skill_weight):
+        """``(1 - skill_weight) * cosine + skill_weight * skill_scores``."""
+        cosine = np.asarray(cosine, dtype=np.float32)
+        if not skill_weight:
+            return cosine
+        return ((1 - skill_weight) * cosine
+                + skill_weight * np.asarray(skill_scores, dtype=np.float32)).astype(np.float32)
@@ -0,0 +1,445 @@
+# -------------------------------------------------
+#  Purpose: Embedding index over the stored
+#           candidate pool: float32 vectors in a
+#           memory-mapped file, searched through
+#           IVF (inverted file) lists.
+# -------------------------------------------------
+
+import logging
+import os
+import uuid
+
+import numpy as np
+
+from models.embedding import LSAEmbedder
+from models.inverted_index import SkillPostings
+from models.job_matcher import JobMatcher
+from models.resume_index import ResumeIndex
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Rows scored per step when the whole pool is scored
+CHUNK_ROWS = 16_384
+
+
+class IVFLists:
+    """Coarse k-means partition of unit vectors for approximate search.
+
+    Every vector belongs to the list of its closest centroid (spherical
+    k-means, so closest = highest dot product). A query scores the
+    centroids, then only the vectors in its ``nprobe`` best lists.
+    """
+
+    def __init__(self, centroids, assignments):
+        self.centroids = centroids
+        self.assignments = assignments
+        self.order = np.argsort(assignments, kind='stable')
+        self.offsets = np.searchsorted(assignments[self.order],
+                                       np.arange(len(centroids) + 1))
+
+    def __len__(self):
+        return len(self.centroids)
+
+    @classmethod
+    def train(cls, vectors, nlist, iterations=10, sample_per_list=64, seed=0):
+        """k-means on a sample of at most ``sample_per_list * nlist`` vectors."""
+        import scipy.sparse as sp
+
+        rng = np.random.default_rng(seed)
+        n = vectors.shape[0]
+        nlist = max(1, min(int(nlist), n))
+        sample = np.sort(rng.choice(n, size=min(n, sample_per_list * nlist), replace=False))
+        data = np.asarray(vectors[sample], dtype=np.float32)
+        centroids = data[rng.choice(len(data), size=nlist, replace=False)]
+        for _ in range(iterations):
+            labels = np.argmax(data @ centroids.T, axis=1)
+            members = sp.csr_matrix((np.ones(len(data), dtype=np.float32),
+                                     (labels, np.arange(len(data)))),
+                                    shape=(nlist, len(data)))
+            sums = np.asarray(members @ data)
+            norms = np.linalg.norm(sums, axis=1)
+            empty = norms == 0
+            if empty.any():
+                # Re-seed empty lists from random sample points
+                sums[empty] = data[rng.choice(len(data), size=int(empty.sum()))]
+                norms[empty] = np.linalg.norm(sums[empty], axis=1)
+            centroids = sums / np.maximum(norms, 1e-12)[:, None]
+        centroids = centroids.astype(np.float32)
+        return cls(centroids, cls.assign(centroids, vectors))
+
+    @staticmethod
+    def assign(centroids, vectors):
+        labels = np.empty(vectors.shape[0], dtype=np.int32)
+        for start in range(0, vectors.shape[0], CHUNK_ROWS):
+            block = np.asarray(vectors[start:start + CHUNK_ROWS])
+            labels[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        return labels
+
+    def extend(self, vectors):
+        """New lists with ``vectors`` appended to their closest lists."""
+        return IVFLists(self.centroids, np.concatenate(
+            [self.assignments, self.assign(self.centroids, vectors)]))
+
+    def subset(self, keep):
+        return IVFLists(self.centroids, self.assignments[keep])
+
+    def candidates(self, query, nprobe, allowed=None, min_rows=0):
+        """Rows in the ``nprobe`` lists closest to ``query``, in row order.
+
+        More lists are probed until at least ``min_rows`` rows (that pass
+        ``allowed``) are found or every list has been visited.
+        """
+        ranked = np.argsort(-(self.centroids @ query))
+        nprobe = max(1, min(int(nprobe), len(self)))
+        while True:
+            probed = ranked[:nprobe]
+            rows = np.concatenate([self.order[self.offsets[i]:self.offsets[i + 1]]
+                                   for i in probed])
+            if allowed is not None:
+                rows = rows[allowed[rows]]
+            if len(rows) >= min_rows or nprobe >= len(self):
+                return np.sort(rows)
+            nprobe *= 2
+
+
+class VectorIndex(ResumeIndex):
+    """Dense embeddings of stored resumes, searched approximately.
+
+    Same interface as ``ResumeIndex`` (``fit``/``add``/``remove``/``score``/
+    ``search``), so ``JobMatcher.rank_index`` ranks either. Documents are
+    embedded with ``embedder`` (see ``models/embedding.py``) a batch at a
+    time. Once the pool has ``ivf_min`` resumes an IVF partition with about
+    ``sqrt(n)`` lists is trained; ``search`` then scores only the resumes in
+    the ``nprobe`` lists closest to the JD. Below that, or when a skill
+    filter leaves few resumes, search is exact.
+
+    Embedders that learn from the pool (LSA) are not fitted on fewer than
+    ``min_fit_docs`` resumes: until then documents are stored unembedded and
+    ``score``/``search`` answer from ``fallback`` (the exact TF-IDF
+    ``ResumeIndex`` over the same pool), or score zero without one. Fitting,
+    refitting and IVF training happen in ``refit``, which callers run off
+    the request path once ``needs_refit`` says so; ``add`` only embeds and
+    appends.
+
+    On disk: ``docs.sqlite3`` as for ``ResumeIndex`` (without the CSR
+    columns), the fitted embedder ``model-<token>.joblib``,
+    ``vectors-<token>.f32`` (raw float32 rows in document order,
+    memory-mapped by every reader, so gunicorn workers share one copy in the
+    page cache; new rows are appended in place) and ``ivf-<token>.npz``.
+    Adding documents appends their vectors and rows only.
+
+    ``preprocess`` is applied to job descriptions before embedding; pass
+    the function that produced the indexed texts so both sides match.
+    """
+
+    FILE_PREFIXES = ('model-', 'vectors-', 'ivf-')
+
+    def __init__(self, index_dir=None, embedder=None, refit_ratio=0.25, preprocess=None,
+                 ivf_min=20_000, nprobe=32, min_fit_docs=500, fallback=None):
+        self.embedder = embedder if embedder is not None else LSAEmbedder()
+        self.preprocess = preprocess
+        self.ivf_min = ivf_min
+        self.nprobe = nprobe
+        self.min_fit_docs = min_fit_docs
+        self.fallback = fallback
+        super().__init__(index_dir, refit_ratio)
+
+    def _reset(self):
+        super()._reset()
+        # self.vectorizer holds the fitted copy of self.embedder
+        self.ivf = None
+        self._skills = None
+        self._ivf_trained_on = 0
+        self._vectors_file = None
+        self._ivf_file = None
+
+    # ------------------------------------------------------------------ #
+    #  Building                                                          #
+    # ------------------------------------------------------------------ #
+    def _fit_model(self, texts):
+        import copy
+
+        embedder = copy.deepcopy(self.embedder)
+        if embedder.needs_fit:
+            with metrics.span('vectorize'):
+                embedder.fit(texts)
+        # Straight to a staged file, a batch at a time; refit() calls this
+        # without the write lock held.
+        return embedder, self._stage_vectors(embedder.iter_embed(texts), embedder.dim)
+
+    def _encode(self, model, texts):
+        return model.embed(texts)
+
+    def _fit_on_add(self, n):
+        # An embedder that learns from the pool is fitted by refit()
+        return not self.embedder.needs_fit
+
+    def _fit(self, conn, ids, texts, meta):
+        if self.embedder.needs_fit and len(ids) < self.min_fit_docs:
+            self._remove(conn, self.ids)
+            self._append(conn, ids, texts, meta, None)
+            return
+        super()._fit(conn, ids, texts, meta)
+
+    def _needs_refit(self):
+        n = len(self.ids)
+        if self.vectorizer is None:
+            return self.embedder.needs_fit and n >= self.min_fit_docs
+        if self.vectorizer.needs_fit and super()._needs_refit():
+            return True
+        # No lists yet, or the pool has doubled since they were trained
+        return n >= self.ivf_min and (self.ivf is None or n >= 2 * self._ivf_trained_on)
+
+    def refit(self):
+        """Fit or refit the embedder when due, else retrain stale IVF lists.
+
+        Returns whether anything was rebuilt. Like the embedder, the lists
+        are trained without holding the write lock; rows added meanwhile
+        are assigned to them before the swap.
+        """
+        self.reload_if_changed()
+        with self._lock:
+            if not self._needs_refit():
+                return False
+            if self.vectorizer is None or (self.vectorizer.needs_fit
+                                           and ResumeIndex._needs_refit(self)):
+                refit_model = True
+            else:
+                refit_model = False
+                matrix, generation = self.matrix, self._generation
+        if refit_model:
+            return super().refit()
+        n = len(matrix)
+        with metrics.span('vectorize'):
+            ivf = IVFLists.train(matrix, nlist=int(np.sqrt(n)))
+        with self._write_lock() as conn:
+            if self._generation != generation:
+                return False
+            if len(self.ids) > n:
+                ivf = ivf.extend(self.matrix[n:])
+            self.ivf, self._ivf_trained_on = ivf, n
+            self._save_ivf(conn)
+            if conn is not None:
+                # Other workers reload to pick up the new lists
+                self._bump(conn)
+        logger.info("Trained %d IVF lists over %d resumes", len(ivf), n)
+        return True
+
+    def _rows_added(self, conn, start, rows):
+        if not start:
+            self._train_ivf(conn)
+        elif self.ivf is not None:
+            # Kept in memory only; readers assign appended rows themselves.
+            # refit() retrains the lists once the pool has doubled.
+            self.ivf = self.ivf.extend(rows)
+
+    def _train_ivf(self, conn):
+        n = len(self.ids)
+        if n < self.ivf_min:
+            self.ivf, self._ivf_trained_on = None, 0
+        else:
+            with metrics.span('vectorize'):
+                self.ivf = IVFLists.train(self.matrix, nlist=int(np.sqrt(n)))
+            self._ivf_trained_on = n
+            logger.info("Trained %d IVF lists over %d resumes", len(self.ivf), n)
+        self._save_ivf(conn)
+
+    # ------------------------------------------------------------------ #
+    #  Scoring                                                           #
+    # ------------------------------------------------------------------ #
+    def score(self, job_description):
+        """Cosine similarity of every indexed resume: ``(sims, ids, meta)``."""
+        matrix, embedder, ids, meta = self.snapshot()
+        if matrix is None and ids and self.fallback is not None:
+            return self.fallback.score(job_description)
+        if matrix is None or not job_description.strip():
+            return np.zeros(len(ids), dtype=np.float32), ids, meta
+        query = self._embed_query(embedder, job_description)
+        with metrics.span('similarity'):
+            sims = self._dot(matrix, None, query)
+        metrics.RESUMES_SCORED.inc(len(sims))
+        return sims, ids, meta
+
+    def search(self, job_description, k=None, must_have=None):
+        """Approximate best ``k`` resumes: ``(rows, scores, ids, meta)``, best first.
+
+        Scores are exact cosines; only resumes outside the probed IVF lists
+        can be missed.
+        """
+        matrix, embedder, ids, meta = self.snapshot()
+        if matrix is None and ids and self.fallback is not None:
+            return self.fallback.search(job_description, k, must_have)
+        with self._lock:
+            ivf = self.ivf
+        if ivf is not None and len(ivf.assignments) != len(ids):
+            ivf = None  # changed under us; the next call sees the new lists
+        if matrix is None or not job_description.strip():
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32), ids, meta
+        allowed = self._skill_postings(meta).mask(must_have, len(ids))
+        k = len(ids) if k is None else max(0, int(k))
+        query = self._embed_query(embedder, job_description)
+        with metrics.span('similarity'):
+            n_allowed = len(ids) if allowed is None else int(allowed.sum())
+            if ivf is None or k >= n_allowed or n_allowed <= self.nprobe * len(ids) / len(ivf):
+                # Scanning the probed lists would cost about as much as this
+                rows = np.arange(len(ids)) if allowed is None else np.flatnonzero(allowed)
+            else:
+                rows = ivf.candidates(query, self.nprobe, allowed, min_rows=k)
+            scores = self._dot(matrix, rows, query)
+            best = JobMatcher.select_top(scores, k)
+        metrics.RESUMES_SCORED.inc(len(rows))
+        return rows[best], scores[best], ids, meta
+
+    def skill_filter(self, must_have):
+        """Mask of the resumes listing every skill in ``must_have`` (None: no filter)."""
+        matrix, _, ids, meta = self.snapshot()
+        if matrix is None and ids and self.fallback is not None:
+            return self.fallback.skill_filter(must_have)
+        return self._skill_postings(meta).mask(must_have, len(ids))
+
+    def inverted(self):
+        raise TypeError('VectorIndex has no term posting lists; use search()')
+
+    def _embed_query(self, embedder, job_description):
+        text = (self.preprocess(job_description) if self.preprocess is not None
+                else job_description.lower().strip())
+        with metrics.span('vectorize'):
+            return embedder.embed([text])[0]
+
+    @staticmethod
+    def _dot(matrix, rows, query):
+        """``matrix[rows] @ query`` (all rows if None), a chunk of rows at a time."""
+        n = matrix.shape[0] if rows is None else len(rows)
+        out = np.empty(n, dtype=np.float32)
+        for start in range(0, n, CHUNK_ROWS):
+            block = (matrix[start:start + CHUNK_ROWS] if rows is None
+                     else matrix[rows[start:start + CHUNK_ROWS]])
+            out[start:start + len(block)] = block @ query
+        return out
+
+    def _skill_postings(self, meta):
+        with self._lock:
+            cached = self._skills
+            if cached is None or cached[0] is not meta:
+                cached = self._skills = (meta, SkillPostings(meta))
+        return cached[1]
+
+    # ------------------------------------------------------------------ #
+    #  Persistence                                                       #
+    # ------------------------------------------------------------------ #
+    def _stage_vectors(self, batches, dim):
+        """Rows from ``batches`` in a new ``.tmp`` vectors file (an array without a directory)."""
+        if not self.index_dir:
+            batches = list(batches)
+            return np.vstack(batches) if batches else np.zeros((0, dim), dtype=np.float32)
+        path = self._path(f'vectors-{uuid.uuid4().hex}.f32.tmp')
+        n = 0
+        with open(path, 'wb') as f:
+            for batch in batches:
+                np.ascontiguousarray(batch, dtype=np.float32).tofile(f)
+                n += len(batch)
+        return self._map_vectors(path, n, dim)
+
+    def _append_vectors(self, path, start, vectors):
+        """Append rows after the first ``start`` rows of ``path`` in place and map the result."""
+        dim = vectors.shape[1]
+        with open(path, 'r+b') as f:
+            # Drop rows a crashed writer appended without committing
+            f.truncate(start * dim * 4)
+            f.seek(0, os.SEEK_END)
+            np.ascontiguousarray(vectors, dtype=np.float32).tofile(f)
+        return self._map_vectors(path, start + len(vectors), dim)
+
+    @staticmethod
+    def _map_vectors(path, n, dim):
+        if not n:
+            return np.zeros((0, dim), dtype=np.float32)
+        if os.path.getsize(path) < n * dim * 4:
+            raise ValueError('index files are out of sync')
+        return np.memmap(path, dtype=np.float32, mode='r', shape=(n, dim))
+
+    def _concat(self, rows, more):
+        if isinstance(rows, np.memmap):
+            return self._append_vectors(rows.filename, len(rows), more)
+        return np.vstack([rows, more])
+
+    def _write_rows(self, conn, seqs, start, rows):
+        if conn is None:
+            matrix = rows if start == 0 else np.vstack([self.matrix, rows])
+        elif start:
+            matrix = self._append_vectors(self._path(self._vectors_file), start, rows)
+        else:
+            if not (isinstance(rows, np.memmap) and rows.filename.endswith('.tmp')):
+                rows = self._stage_vectors(
+                    (rows[i:i + CHUNK_ROWS] for i in range(0, len(rows), CHUNK_ROWS)),
+                    rows.shape[1])
+            name = os.path.basename(rows.filename)[:-len('.tmp')]
+            # Readers still mapping an older file keep their copy
+            os.replace(rows.filename, self._path(name))
+            matrix = self._map_vectors(self._path(name), len(rows), rows.shape[1])
+            self._vectors_file = name
+            conn.execute("INSERT OR REPLACE INTO state(key, value) VALUES ('vectors', ?)", (name,))
+        return matrix
+
+    def _discard_rows(self, rows):
+        if isinstance(rows, np.memmap) and rows.filename.endswith('.tmp'):
+            os.remove(rows.filename)
+
+    def _remove_rows(self, conn, keep):
+        ivf = self.ivf.subset(keep) if self.ivf is not None else None
+        vectors = self.matrix
+        rows = self._stage_vectors((np.asarray(vectors[keep[start:start + CHUNK_ROWS]])
+                                    for start in range(0, len(keep), CHUNK_ROWS)),
+                                   vectors.shape[1])
+        matrix = self._write_rows(conn, None, 0, rows)
+        self.ivf = ivf
+        self._save_ivf(conn)
+        return matrix
+
+    def _read_rows(self, conn, after, start, count, state):
+        n = start + count
+        self._vectors_file = state['vectors']
+        matrix = self._map_vectors(self._path(self._vectors_file), n, int(state['dim']))
+        if state.get('ivf') != self._ivf_file:
+            self.ivf, self._ivf_trained_on, self._ivf_file = None, 0, state.get('ivf')
+            if self._ivf_file:
+                with np.load(self._path(self._ivf_file)) as ivf:
+                    self.ivf = IVFLists(ivf['centroids'], ivf['assignments'])
+                    self._ivf_trained_on = int(ivf['trained_on'])
+        if self.ivf is not None:
+            assigned = len(self.ivf.assignments)
+            if assigned > n:
+                self.ivf, self._ivf_trained_on, self._ivf_file = None, 0, None
+            elif assigned < n:
+                self.ivf = self.ivf.extend(matrix[assigned:])
+        return matrix
+
+    def _save_ivf(self, conn):
+        if conn is None:
+            return
+        if self.ivf is None:
+            self._ivf_file = None
+            conn.execute("DELETE FROM state WHERE key = 'ivf'")
+            return
+        name = f'ivf-{uuid.uuid4().hex}.npz'
+        np.savez(self._path(name + '.tmp.npz'), centroids=self.ivf.centroids,
+                 assignments=self.ivf.assignments, trained_on=np.int64(self._ivf_trained_on))
+        os.replace(self._path(name + '.tmp.npz'), self._path(name))
+        self._ivf_file = name
+        conn.execute("INSERT OR REPLACE INTO state(key, value) VALUES ('ivf', ?)", (name,))
+
+    def _model_state(self, model, rows):
+        return {'dim': int(rows.shape[1]), 'embedder': model.name}
+
+    def _load_model(self, name, state):
+        import joblib
+
+        if state.get('embedder') != self.embedder.name:
+            raise ValueError(f"index was built with {state.get('embedder')!r} embeddings, "
+                             f"not {self.embedder.name!r}; rebuild it")
+        # Arrays inside the pickle (LSA components) are mapped, not copied
+        return joblib.load(self._path(name), mmap_mode='r')
+
+    def _current_files(self):
+        return {self._model_file, self._vectors_file, self._ivf_file}
@@ -0,0 +1,63 @@
+"""CandidateStore: round trips, version keying and the processor/taxonomy version."""
+import pytest
+
+from models.resume_processor import ResumeProcessor
+from models.skill_matcher import SkillMatcher
+from utils.candidate_store import CandidateStore
+
+
+def processed(n):
+    return {'filename': f'{n}.pdf', 'original_text': f'resume {n} python sql',
+            'processed_text': f'resum {n} python sql', 'skills': ['Python', 'SQL'],
+            'skill_counts': {'Python': 1, 'SQL': 1}}
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'candidates.sqlite3')
+
+
+def test_round_trip(path):
+    store = CandidateStore(path, version='v1')
+    store.put_many([(f'd{i}', processed(i)) for i in range(3)])
+    got = store.get('d1')
+    assert got['filename'] == '1.pdf'
+    assert got['processed_text'] == 'resum 1 python sql'
+    assert got['skills'] == ['Python', 'SQL'] and got['skill_count'] == 2
+    assert store.text('d1') == 'resume 1 python sql'
+    assert sorted(store.get_many(['d0', 'd2', 'missing'])) == ['d0', 'd2']
+    assert [digest for digest, _ in store.iter_all(batch_size=2)] == ['d0', 'd1', 'd2']
+    assert len(store) == 3
+
+
+def test_other_versions_count_as_missing(path):
+    CandidateStore(path, version='v1').put('d0', processed(0))
+    store = CandidateStore(path, version='v2')
+    assert store.get('d0') is None
+    assert store.text('d0') is None
+    assert list(store.iter_all()) == [] and len(store) == 0
+    assert store.stats() == {'candidates': 0, 'stale': 1, 'version': 'v2'}
+
+    store.put('d0', processed(0))
+    assert CandidateStore(path, version='v1').get('d0') is None
+    assert store.get('d0') is not None
+
+
+def test_remove(path):
+    store = CandidateStore(path, version='v1')
+    store.put_many([(f'd{i}', processed(i)) for i in range(3)])
+    store.remove(['d1', 'missing'])
+    assert sorted(store.get_many(['d0', 'd1', 'd2'])) == ['d0', 'd2']
+
+
+def test_taxonomy_changes_the_processor_version():
+    base = SkillMatcher({'Python': ['python'], 'SQL': ['sql']})
+    assert SkillMatcher({'SQL': ['sql'], 'Python': ['python']}).version == base.version
+    assert SkillMatcher({'Python': ['python', 'py'], 'SQL': ['sql']}).version != base.version
+    assert SkillMatcher({'Python': ['python']}).version != base.version
+
+    processor = ResumeProcessor()
+    version = processor.version
+    processor.skill_matcher = base
+    assert processor.version != version
+    assert processor.version.endswith(base.version)
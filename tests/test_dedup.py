@@ -0,0 +1,103 @@
+"""MinHash signatures and LSH clustering against direct computations."""
+import random
+import zlib
+
+import numpy as np
+import pytest
+
+import models.dedup as dedup
+from models.dedup import NearDuplicateDetector
+
+VOCABULARY = [f'w{i}' for i in range(2000)]
+
+
+def text(rng, n=120):
+    return ' '.join(rng.choice(VOCABULARY) for _ in range(n))
+
+
+def revise(rng, base, edits=2):
+    words = base.split()
+    for _ in range(edits):
+        words[rng.randrange(len(words))] = rng.choice(VOCABULARY)
+    return ' '.join(words)
+
+
+def reference_signature(detector, text):
+    words = text.split()
+    n = detector.shingle_size
+    # Texts of at most n words are one shingle
+    pieces = [' '.join(words[i:i + n]) for i in range(max(1, len(words) - n + 1))]
+    hashes = {zlib.crc32(p.encode('utf-8')) for p in pieces}
+    if not words:
+        return [(1 << 32) - 1] * detector.num_perm
+    return [min((int(a) * h + int(b)) % (1 << 32) for h in hashes)
+            for a, b in zip(detector._a.ravel(), detector._b.ravel())]
+
+
+def jaccard(detector, a, b):
+    a, b = set(detector.shingles(a).tolist()), set(detector.shingles(b).tolist())
+    return len(a & b) / len(a | b)
+
+
+@pytest.mark.parametrize('chunk', [7, 100, dedup.CHUNK_SHINGLES])
+def test_signatures_match_direct_minhash(monkeypatch, chunk):
+    monkeypatch.setattr(dedup, 'CHUNK_SHINGLES', chunk)
+    rng = random.Random(0)
+    texts = [text(rng, n) for n in (50, 1, 2, 3, 4, 0, 80)] + ['   ']
+    detector = NearDuplicateDetector(num_perm=32, bands=8)
+    signatures = detector.signatures(texts)
+    for row, doc in zip(signatures, texts):
+        assert row.tolist() == reference_signature(detector, doc)
+
+
+def test_signature_agreement_estimates_jaccard():
+    rng = random.Random(1)
+    detector = NearDuplicateDetector(num_perm=256, bands=32)
+    base = text(rng, 200)
+    for edits in (1, 5, 20, 60):
+        other = revise(rng, base, edits)
+        a, b = detector.signatures([base, other])
+        assert abs(np.mean(a == b) - jaccard(detector, base, other)) < 0.1
+
+
+def test_clusters_group_revisions_only():
+    rng = random.Random(2)
+    texts, families = [], []
+    for family in range(8):
+        base = text(rng)
+        members = [base] + [revise(rng, base) for _ in range(family % 3)]
+        families.append(list(range(len(texts), len(texts) + len(members))))
+        texts.extend(members)
+    order = list(range(len(texts)))
+    rng.shuffle(order)
+    shuffled = [texts[i] for i in order]
+    position = {old: new for new, old in enumerate(order)}
+
+    detector = NearDuplicateDetector(threshold=0.8)
+    for members in families:
+        for i in members[1:]:
+            assert jaccard(detector, texts[members[0]], texts[i]) > 0.9
+    expected = sorted((sorted(position[i] for i in members) for members in families),
+                      key=lambda group: group[0])
+    assert detector.clusters(shuffled) == expected
+
+
+def test_blank_texts_are_never_grouped():
+    assert NearDuplicateDetector().clusters(['', '  ', 'a b c d']) == [[0], [1], [2]]
+
+
+def test_collapse_keeps_the_best_member():
+    rng = random.Random(3)
+    base, other = text(rng), text(rng)
+    resumes = [{'filename': 'v1.pdf', 'processed_text': base},
+               {'filename': 'other.pdf', 'processed_text': other},
+               {'filename': None, 'processed_text': revise(rng, base)},
+               {'filename': 'v3.pdf', 'processed_text': revise(rng, base)}]
+    sims = np.array([0.5, 0.9, 0.7, 0.7])
+    kept_sims, kept = NearDuplicateDetector().collapse(resumes, sims)
+    # One resume per cluster, clusters in order of their first member; the
+    # earliest of the tied best members represents the revisions.
+    assert kept_sims.tolist() == [0.7, 0.9]
+    assert kept[0] == dict(resumes[2], duplicates=['v1.pdf', 'v3.pdf'])
+    assert kept[1] is resumes[1]
+    assert 'duplicates' not in resumes[2]
@@ -0,0 +1,72 @@
+"""DFStore: counts match a direct document-frequency count, each document once."""
+import sqlite3
+
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+from utils.df_store import DFStore
+
+FEATURES = 64
+
+
+def random_counts(rng, n):
+    return sp.random(n, FEATURES, density=0.2, format='csr', random_state=rng,
+                     data_rvs=lambda size: rng.integers(1, 4, size)).astype(np.float64)
+
+
+def document_frequencies(counts):
+    return (counts.toarray() > 0).sum(axis=0)
+
+
+@pytest.fixture
+def folder(tmp_path):
+    return str(tmp_path / 'df')
+
+
+def test_counts_match_a_direct_count(folder):
+    rng = np.random.default_rng(0)
+    counts = random_counts(rng, 30)
+    keys = [f'd{i}' for i in range(30)]
+    store = DFStore(folder, n_features=FEATURES)
+    assert store.add(keys[:20], counts[:20]) == 20
+    # Already counted, repeated within the call, or new
+    assert store.add(keys[10:30] + ['d25'], sp.vstack([counts[10:30], counts[25]])) == 10
+
+    assert store.n_docs == 30
+    np.testing.assert_array_equal(store._counts[:-1], document_frequencies(counts))
+    columns = np.arange(FEATURES)
+    df = document_frequencies(counts)
+    np.testing.assert_allclose(store.idf(columns), np.log(31 / (1 + df)) + 1, rtol=1e-6)
+
+    # Another process maps the same counts
+    other = DFStore(folder, n_features=FEATURES)
+    assert other.n_docs == 30 and other.add(keys[:5], counts[:5]) == 0
+
+
+def test_failed_insert_leaves_counts_unchanged(folder):
+    rng = np.random.default_rng(1)
+    counts = random_counts(rng, 5)
+    store = DFStore(folder, n_features=FEATURES)
+    store.add(['a'], counts[:1])
+    before = np.array(store._counts)
+
+    conn = sqlite3.connect(f'{folder}/docs.sqlite3')
+    conn.execute("CREATE TRIGGER fail BEFORE INSERT ON docs "
+                 "BEGIN SELECT RAISE(ABORT, 'full'); END")
+    conn.commit()
+    with pytest.raises(sqlite3.Error):
+        store.add(['b', 'c'], counts[1:3])
+    np.testing.assert_array_equal(store._counts, before)
+
+    conn.execute('DROP TRIGGER fail')
+    conn.commit()
+    conn.close()
+    assert store.add(['b', 'c'], counts[1:3]) == 2
+    np.testing.assert_array_equal(store._counts[:-1], document_frequencies(counts[:3]))
+
+
+def test_feature_count_mismatch(folder):
+    DFStore(folder, n_features=FEATURES)
+    with pytest.raises(ValueError):
+        DFStore(folder, n_features=FEATURES * 2)
@@ -0,0 +1,96 @@
+"""DiskCache LRU and TTL eviction against an in-memory reference."""
+import pickle
+import random
+from collections import OrderedDict
+
+import pytest
+
+import utils.disk_cache as disk_cache
+from utils.disk_cache import DiskCache
+
+
+class Clock:
+    """Stands in for the ``time`` module so every operation gets its own instant."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        self.now += 1
+        return self.now
+
+
+class ReferenceCache:
+    """What DiskCache should hold: an OrderedDict in access order."""
+
+    def __init__(self, max_bytes, ttl):
+        self.max_bytes, self.ttl = max_bytes, ttl
+        self.entries = OrderedDict()  # key -> (value, size, created)
+
+    def get(self, key, now):
+        entry = self.entries.get(key)
+        if entry is not None and self.ttl is not None and entry[2] < now - self.ttl:
+            del self.entries[key]
+            entry = None
+        if entry is None:
+            return None
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def set(self, key, value, created, now):
+        size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        if size > self.max_bytes:
+            return
+        self.entries.pop(key, None)
+        self.entries[key] = (value, size, created)
+        if self.ttl is not None:
+            for old in [k for k, (_, _, created) in self.entries.items()
+                        if created < now - self.ttl]:
+                del self.entries[old]
+        while sum(size for _, size, _ in self.entries.values()) > self.max_bytes:
+            self.entries.popitem(last=False)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(disk_cache, 'time', clock)
+    return clock
+
+
+@pytest.mark.parametrize('ttl', [None, 40])
+@pytest.mark.parametrize('seed', range(3))
+def test_matches_reference_lru(tmp_path, clock, seed, ttl):
+    rng = random.Random(seed)
+    cache = DiskCache(str(tmp_path / 'cache.sqlite3'), max_bytes=2000, ttl=ttl)
+    reference = ReferenceCache(2000, ttl)
+    for _ in range(400):
+        key = f'k{rng.randrange(30)}'
+        if rng.random() < 0.5:
+            value = 'x' * rng.randrange(2500)
+            cache.set(key, value)
+            # DiskCache reads the clock for the write, then again to evict
+            reference.set(key, value, clock.now - 1, clock.now)
+        else:
+            got = cache.get(key)
+            assert got == reference.get(key, clock.now)
+        stats = cache.stats()
+        assert stats['entries'] == len(reference.entries)
+        assert stats['bytes'] <= 2000
+
+
+def test_hit_and_miss_counters(tmp_path, clock):
+    cache = DiskCache(str(tmp_path / 'cache.sqlite3'))
+    cache.set('a', 1)
+    assert cache.get('a') == 1 and cache.get('b', 'default') == 'default'
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['hit_rate']) == (1, 1, 0.5)
+
+
+def test_other_versions_are_dropped_on_open(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    DiskCache(path, version='1').set('a', 1)
+    assert DiskCache(path, version='1').get('a') == 1
+    assert DiskCache(path, version='2').get('a') is None
+    assert DiskCache(path, version='1').get('a') is None
+
@@ -0,0 +1,106 @@
+"""Streaming DOCX extraction against python-docx's reading of the same files."""
+import io
+
+import pytest
+
+from utils.file_handler import FileHandler, iter_docx_part
+
+docx = pytest.importorskip('docx')
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+MC_NS = 'http://schemas.openxmlformats.org/markup-compatibility/2006'
+
+
+def reference_paragraphs(path):
+    """Header paragraphs, then body paragraphs and table cells in document order."""
+    from docx.table import Table
+    from docx.text.paragraph import Paragraph
+
+    document = docx.Document(path)
+    texts = [p.text for p in document.sections[0].header.paragraphs]
+    for child in document.element.body.iterchildren():
+        if child.tag == f'{{{W_NS}}}p':
+            texts.append(Paragraph(child, document).text)
+        elif child.tag == f'{{{W_NS}}}tbl':
+            for row in Table(child, document).rows:
+                for cell in row.cells:
+                    texts.extend(p.text for p in cell.paragraphs)
+    return texts
+
+
+@pytest.fixture
+def resume(tmp_path):
+    document = docx.Document()
+    document.sections[0].header.paragraphs[0].text = 'Jane Doe | jane@example.com'
+    document.add_heading('Experience', level=1)
+    paragraph = document.add_paragraph('Senior engineer: ')
+    paragraph.add_run('Python').bold = True
+    paragraph.add_run('\tSQL')
+    paragraph.add_run().add_break()
+    paragraph.add_run('Docker, Kubernetes')
+    table = document.add_table(rows=2, cols=2)
+    for r, row in enumerate(table.rows):
+        for c, cell in enumerate(row.cells):
+            cell.text = f'cell {r}{c}'
+    table.rows[1].cells[1].add_paragraph('second paragraph in a cell')
+    document.add_paragraph('')
+    for i in range(50):
+        document.add_paragraph(f'Bullet {i}: built services in Go and Rust')
+    path = str(tmp_path / 'resume.docx')
+    document.save(path)
+    return path
+
+
+def test_paragraphs_match_python_docx(resume, tmp_path):
+    handler = FileHandler(str(tmp_path / 'uploads'))
+    assert list(handler.iter_docx_paragraphs(resume)) == reference_paragraphs(resume)
+    assert handler.extract_text(resume) == '\n'.join(reference_paragraphs(resume))
+
+
+@pytest.mark.parametrize('max_chars', [1, 10, 40, 333, 10_000])
+def test_max_chars_truncates_the_full_text(resume, tmp_path, max_chars):
+    full = '\n'.join(reference_paragraphs(resume))
+    text = FileHandler(str(tmp_path / 'uploads'), max_chars=max_chars).extract_text(resume)
+    assert full.startswith(text)
+    # The cut may fall on a separator, which is not kept
+    assert len(text) in (min(max_chars, len(full)), max_chars - 1)
+
+
+def test_text_boxes_come_before_their_anchor_and_fallbacks_are_skipped():
+    xml = (f'<w:document xmlns:w="{W_NS}" xmlns:mc="{MC_NS}"><w:body>'
+           '<w:p><w:r><w:t>Before</w:t></w:r></w:p>'
+           '<w:p><w:r><w:t>Anchor </w:t></w:r><w:r><mc:AlternateContent>'
+           '<mc:Choice><w:txbxContent><w:p><w:r><w:t>In the box</w:t></w:r></w:p>'
+           '</w:txbxContent></mc:Choice>'
+           '<mc:Fallback><w:txbxContent><w:p><w:r><w:t>VML copy</w:t></w:r></w:p>'
+           '</w:txbxContent></mc:Fallback></mc:AlternateContent></w:r>'
+           '<w:r><w:t>text</w:t><w:tab/><w:t>end</w:t></w:r></w:p>'
+           '</w:body></w:document>')
+    assert list(iter_docx_part(io.BytesIO(xml.encode()))) == [
+        'Before', 'In the box', 'Anchor text\tend']
+
+
+def test_parts_are_read_incrementally():
+    body = ''.join(f'<w:p><w:r><w:t>paragraph {i}</w:t></w:r></w:p>' for i in range(20_000))
+    data = f'<w:document xmlns:w="{W_NS}"><w:body>{body}</w:body></w:document>'.encode()
+
+    class Counting(io.BytesIO):
+        consumed = 0
+
+        def read(self, size=-1):
+            chunk = super().read(size)
+            self.consumed += len(chunk)
+            return chunk
+
+    stream = Counting(data)
+    paragraphs = iter_docx_part(stream)
+    assert next(paragraphs) == 'paragraph 0'
+    assert stream.consumed < len(data) // 2
+    assert sum(1 for _ in paragraphs) == 19_999
+
+
+def test_broken_files_are_reported_as_errors(tmp_path):
+    path = tmp_path / 'broken.docx'
+    path.write_bytes(b'not a zip file')
+    text = FileHandler(str(tmp_path / 'uploads')).extract_text_from_docx(str(path))
+    assert text.startswith('Error processing DOCX')
@@ -0,0 +1,85 @@
+"""IngestionPipeline: pooled and stored results match ingesting each file in turn."""
+import random
+
+import pytest
+
+from models.resume_processor import ResumeProcessor
+from utils.candidate_store import CandidateStore
+from utils.file_handler import FileHandler
+from utils.ingestion import IngestionPipeline, ingest_file
+
+WORDS = ('python java docker kubernetes react sql aws machine learning flask django '
+         'spark scala golang rust terraform linux pandas numpy tableau excel').split()
+
+
+@pytest.fixture
+def handler(tmp_path):
+    return FileHandler(str(tmp_path / 'uploads'))
+
+
+@pytest.fixture
+def items(tmp_path):
+    rng = random.Random(0)
+    folder = tmp_path / 'resumes'
+    folder.mkdir()
+    items = []
+    for i in range(6):
+        path = folder / f'r{i}.txt'
+        path.write_text('Software engineer. ' + ' '.join(rng.choice(WORDS) for _ in range(40)))
+        items.append((f'r{i}.txt', str(path)))
+    (folder / 'short.txt').write_text('too short')
+    items.insert(2, ('short.txt', str(folder / 'short.txt')))
+    # The same contents uploaded under another name
+    items.append(('copy.txt', items[0][1]))
+    return items
+
+
+def reference(items, handler, processor):
+    return [ingest_file(item, handler, processor) for item in items]
+
+
+def test_sequential_run_matches_ingesting_each_file(items, handler):
+    processor = ResumeProcessor()
+    results = IngestionPipeline(handler, processor, workers=1).run(items)
+    assert results == reference(items, handler, processor)
+    assert [r['filename'] for r in results] == [name for name, _ in items]
+    assert results[2]['processed'] is None and results[2]['category'] == 'warning'
+    assert all('original_text' not in r['processed'] for r in results if r['processed'])
+
+
+def test_pool_returns_the_same_results_in_order(items, handler):
+    processor = ResumeProcessor()
+    pipeline = IngestionPipeline(handler, processor, workers=2)
+    try:
+        assert pipeline.run(items) == reference(items, handler, processor)
+    finally:
+        pipeline.shutdown()
+
+
+def test_stored_candidates_are_not_extracted_again(items, handler, tmp_path, monkeypatch):
+    processor = ResumeProcessor()
+    store = CandidateStore(str(tmp_path / 'candidates.sqlite3'), version='test')
+    first = IngestionPipeline(handler, processor, workers=1, candidates=store).run(items)
+    expected = reference(items, handler, processor)
+    for got, want in zip(first, expected):
+        if want['processed'] is not None:
+            assert got['processed'].pop('digest') == handler.file_digest(
+                dict(items)[got['filename']])
+        assert got == want
+    assert len(store) == 6
+
+    opened = []
+    extract_text = handler.extract_text
+
+    def tracking_extract_text(path):
+        opened.append(path)
+        return extract_text(path)
+
+    monkeypatch.setattr(handler, 'extract_text', tracking_extract_text)
+    second = IngestionPipeline(handler, processor, workers=1, candidates=store).run(items)
+    # Only the file too short to store is read again
+    assert opened == [dict(items)['short.txt']]
+    for got, want in zip(second, expected):
+        if got['processed'] is not None:
+            got['processed'].pop('digest')
+        assert got == want
@@ -0,0 +1,78 @@
+"""InvertedIndex.top_k must return exactly what brute-force ranking returns."""
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+from models.inverted_index import InvertedIndex, SkillPostings
+
+
+def random_matrix(rng, n, terms, density=0.05):
+    matrix = sp.random(n, terms, density=density, format='csr', dtype=np.float64,
+                       random_state=rng)
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sp.csr_matrix(sp.diags(1 / norms) @ matrix).astype(np.float32)
+
+
+def brute_force(matrix, query, k, allowed=None):
+    """Rows best first with ties by row order, like JobMatcher.select_top."""
+    scores = matrix @ query.toarray().ravel()
+    rows = np.arange(matrix.shape[0]) if allowed is None else np.flatnonzero(allowed)
+    order = np.lexsort((rows, -scores[rows]))[:k]
+    return rows[order], scores[rows[order]]
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('k', [1, 5, 40, 500])
+def test_top_k_matches_brute_force(seed, k):
+    rng = np.random.default_rng(seed)
+    matrix = random_matrix(rng, 300, 80)
+    index = InvertedIndex(matrix)
+    query = random_matrix(rng, 1, 80, density=0.1)
+    rows, scores, scored = index.top_k(query, k)
+    expected_rows, expected_scores = brute_force(matrix, query, k)
+    assert rows.tolist() == expected_rows.tolist()
+    np.testing.assert_allclose(scores, expected_scores, rtol=1e-5, atol=1e-6)
+    assert scored <= matrix.shape[0]
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_top_k_with_mask_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    matrix = random_matrix(rng, 300, 80)
+    allowed = rng.random(300) < 0.2
+    query = random_matrix(rng, 1, 80, density=0.1)
+    rows, _, _ = InvertedIndex(matrix).top_k(query, 20, allowed)
+    assert rows.tolist() == brute_force(matrix, query, 20, allowed)[0].tolist()
+    assert allowed[rows].all()
+
+
+def test_empty_query_returns_pool_in_row_order():
+    matrix = random_matrix(np.random.default_rng(0), 10, 20, density=0.3)
+    query = sp.csr_matrix((1, 20), dtype=np.float32)
+    rows, scores, _ = InvertedIndex(matrix).top_k(query, 3)
+    assert rows.tolist() == [0, 1, 2]
+    assert not scores.any()
+
+
+def test_empty_query_never_returns_filtered_rows():
+    matrix = random_matrix(np.random.default_rng(0), 3, 20, density=0.3)
+    query = sp.csr_matrix((1, 20), dtype=np.float32)
+    allowed = np.array([False, False, True])
+    rows, _, _ = InvertedIndex(matrix).top_k(query, 3, allowed)
+    assert rows.tolist() == [2]
+
+
+def test_nothing_allowed_returns_nothing():
+    matrix = random_matrix(np.random.default_rng(0), 5, 20, density=0.3)
+    query = random_matrix(np.random.default_rng(1), 1, 20, density=0.5)
+    rows, _, scored = InvertedIndex(matrix).top_k(query, 3, np.zeros(5, dtype=bool))
+    assert len(rows) == 0 and scored == 0
+
+
+def test_skill_mask_requires_every_skill():
+    meta = [{'skills': ['Python', 'SQL']}, {'skills': ['python']}, {}, {'skills': ['sql']}]
+    postings = SkillPostings(meta)
+    assert postings.mask(['python', ' SQL '], 4).tolist() == [True, False, False, False]
+    assert postings.mask(['rust'], 4).tolist() == [False] * 4
+    assert postings.mask(None, 4) is None
@@ -0,0 +1,101 @@
+"""JobQueue: results, failures, progress events and heartbeat-based staleness."""
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from utils.job_queue import JobQueue
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'jobs.sqlite3')
+
+
+def wait_for(queue, job_id, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f'job {job_id} did not finish')
+
+
+def test_result_and_events(path):
+    def work(job, names):
+        for name in names:
+            job.file_done(name, error='unreadable' if name == 'b' else None, data={'n': name})
+        return {'ranked': len(names) - 1}
+
+    queue = JobQueue(path)
+    job_id = queue.submit(work, 3, ['a', 'b', 'c'])
+    job = wait_for(queue, job_id)
+    assert job['status'] == 'done' and job['result'] == {'ranked': 2}
+    assert (job['total'], job['processed'], job['failed']) == (3, 3, 1)
+    events = queue.events(job_id)
+    assert [(e['seq'], e['filename'], e['ok']) for e in events] == [
+        (1, 'a', True), (2, 'b', False), (3, 'c', True)]
+    assert events[1]['message'] == 'unreadable' and events[2]['data'] == {'n': 'c'}
+    assert [e['seq'] for e in queue.events(job_id, after=2)] == [3]
+    # Any other process sharing the file sees the same job.
+    assert JobQueue(path).get(job_id)['result'] == {'ranked': 2}
+
+
+def test_failure_is_recorded(path):
+    def work(job):
+        raise RuntimeError('boom')
+
+    queue = JobQueue(path)
+    job = wait_for(queue, queue.submit(work, 0))
+    assert job['status'] == 'failed' and job['error'] == 'boom'
+    assert queue.get('unknown') is None
+
+
+def test_heartbeat_keeps_a_long_job_alive(path):
+    release = threading.Event()
+    queue = JobQueue(path, heartbeat_interval=0.05, stale_after=0.3)
+    job_id = queue.submit(lambda job: release.wait(5), 0)
+    time.sleep(0.6)
+    assert queue.get(job_id)['status'] == 'running'
+    release.set()
+    assert wait_for(queue, job_id)['status'] == 'done'
+
+
+def test_job_without_a_heartbeat_is_reported_failed(path):
+    release = threading.Event()
+    # The heartbeat never fires before the job counts as stale.
+    queue = JobQueue(path, heartbeat_interval=60, stale_after=0.1)
+    job_id = queue.submit(lambda job: release.wait(5), 0)
+    time.sleep(0.3)
+    job = queue.get(job_id)
+    assert job['status'] == 'failed'
+    assert 'stopped before it finished' in job['error']
+    release.set()
+
+
+def test_old_files_gain_a_heartbeat_column(path):
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE jobs (id TEXT PRIMARY KEY, kind TEXT NOT NULL, '
+                 'status TEXT NOT NULL, total INTEGER NOT NULL, '
+                 'processed INTEGER NOT NULL DEFAULT 0, failed INTEGER NOT NULL DEFAULT 0, '
+                 'pid INTEGER, created REAL NOT NULL, updated REAL NOT NULL, error TEXT, '
+                 'result TEXT)')
+    conn.execute("INSERT INTO jobs(id, kind, status, total, created, updated) "
+                 "VALUES ('old', 'ranking', 'running', 1, ?, ?)", (time.time(), time.time()))
+    conn.commit()
+    conn.close()
+
+    queue = JobQueue(path)
+    assert queue.get('old')['status'] == 'failed'
+    assert wait_for(queue, queue.submit(lambda job: 1, 0))['result'] == 1
+
+
+def test_old_jobs_are_pruned(path):
+    queue = JobQueue(path, retention_seconds=0.05)
+    job_id = queue.submit(lambda job: job.file_done('a'), 1)
+    wait_for(queue, job_id)
+    time.sleep(0.1)
+    wait_for(queue, queue.submit(lambda job: None, 0))
+    assert queue.get(job_id) is None and queue.events(job_id) == []
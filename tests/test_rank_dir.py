@@ -0,0 +1,86 @@
+"""cli.py rank-dir: an interrupted run resumed from its checkpoint writes what
+an uninterrupted run writes, and a checkpoint missing its vectorizer is refused."""
+import json
+import os
+import random
+
+import pytest
+
+import cli
+from utils.ingestion import IngestionPipeline
+
+WORDS = ('python java docker kubernetes react sql aws machine learning flask django '
+         'spark scala golang rust terraform linux pandas numpy tableau excel').split()
+
+
+@pytest.fixture
+def workdir(tmp_path):
+    rng = random.Random(0)
+    resumes = tmp_path / 'resumes'
+    resumes.mkdir()
+    for i in range(12):
+        (resumes / f'r{i:02}.txt').write_text(
+            'Experienced engineer. ' + ' '.join(rng.choice(WORDS) for _ in range(60)))
+    (tmp_path / 'jd.txt').write_text('Python developer with SQL, Flask and Docker experience')
+    return tmp_path
+
+
+def rank_dir(workdir, output, *extra):
+    return cli.main(['rank-dir', '--jd', str(workdir / 'jd.txt'),
+                     '--resumes', str(workdir / 'resumes'), '--output', str(output),
+                     '--rankings', str(output) + '.top.jsonl', '--batch-size', '4',
+                     '--fit-sample', '4', '--workers', '1',
+                     '--upload-folder', str(workdir / 'uploads'), *extra])
+
+
+def interrupt_after(monkeypatch, batches):
+    run = IngestionPipeline.run
+    calls = []
+
+    def failing_run(self, items):
+        calls.append(1)
+        if len(calls) > batches:
+            raise KeyboardInterrupt
+        return run(self, items)
+
+    monkeypatch.setattr(IngestionPipeline, 'run', failing_run)
+
+
+def read(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+def test_resumed_run_matches_an_uninterrupted_one(workdir, monkeypatch):
+    assert rank_dir(workdir, workdir / 'full.jsonl') == 0
+    expected = read(workdir / 'full.jsonl')
+    assert len(expected.splitlines()) == 12
+
+    output = workdir / 'resumed.jsonl'
+    with monkeypatch.context() as patch:
+        interrupt_after(patch, 2)
+        with pytest.raises(KeyboardInterrupt):
+            rank_dir(workdir, output)
+    state = json.loads(read(str(output) + '.checkpoint.json'))
+    assert state['done'] == 8 and os.path.exists(state['vectorizer'])
+
+    assert rank_dir(workdir, output) == 0
+    assert read(output) == expected
+    assert read(str(output) + '.top.jsonl') == read(workdir / 'full.jsonl.top.jsonl')
+    assert not os.path.exists(str(output) + '.checkpoint.json')
+    assert not os.path.exists(state['vectorizer'])
+
+
+def test_missing_vectorizer_asks_for_restart(workdir, monkeypatch, capsys):
+    output = workdir / 'out.jsonl'
+    with monkeypatch.context() as patch:
+        interrupt_after(patch, 1)
+        with pytest.raises(KeyboardInterrupt):
+            rank_dir(workdir, output)
+    os.remove(json.loads(read(str(output) + '.checkpoint.json'))['vectorizer'])
+
+    capsys.readouterr()
+    assert rank_dir(workdir, output) == 2
+    assert 'pass --restart' in capsys.readouterr().err
+    assert rank_dir(workdir, output, '--restart') == 0
+    assert len(read(output).splitlines()) == 12
@@ -0,0 +1,48 @@
+"""RankingCache: key normalisation, stored values and expiry."""
+from types import SimpleNamespace
+
+import numpy as np
+
+import utils.disk_cache as disk_cache
+from utils.ranking_cache import RankingCache
+
+
+def test_key_ignores_case_and_whitespace_only():
+    resumes = [('a.pdf', 'd1'), ('b.pdf', 'd2')]
+    key = RankingCache.key('Python  Developer', resumes, {'mode': 'tfidf'})
+    assert key == RankingCache.key(' python developer', resumes, {'mode': 'tfidf'})
+    assert key != RankingCache.key('python developer', resumes[::-1], {'mode': 'tfidf'})
+    assert key != RankingCache.key('python developer', resumes, {'mode': 'hashing'})
+    assert key != RankingCache.key('java developer', resumes, {'mode': 'tfidf'})
+
+
+def test_round_trip_keeps_only_ranking_fields(tmp_path):
+    cache = RankingCache(str(tmp_path / 'rankings.sqlite3'))
+    assert cache.get('k') is None
+    cache.set('k', [0.5, 0.25], [
+        {'filename': 'a.pdf', 'skills': ['Python'], 'skill_count': 1, 'processed_text': 'x'},
+        {'filename': 'b.pdf', 'duplicates': ['c.pdf']}])
+    sims, meta = cache.get('k')
+    np.testing.assert_array_equal(sims, np.array([0.5, 0.25], dtype=np.float32))
+    assert meta == [{'filename': 'a.pdf', 'skills': ['Python'], 'skill_count': 1},
+                    {'filename': 'b.pdf', 'skills': [], 'skill_count': 0,
+                     'duplicates': ['c.pdf']}]
+
+
+def test_entries_expire_after_ttl(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(disk_cache, 'time', SimpleNamespace(time=lambda: now[0]))
+    cache = RankingCache(str(tmp_path / 'rankings.sqlite3'), ttl=5)
+    cache.set('k', [1.0], [{'filename': 'a.pdf'}])
+    now[0] += 4
+    assert cache.get('k') is not None
+    now[0] += 2
+    assert cache.get('k') is None
+    assert cache.stats()['expirations'] == 1
+
+
+def test_other_versions_miss(tmp_path):
+    path = str(tmp_path / 'rankings.sqlite3')
+    RankingCache(path, version='a').set('k', [1.0], [{'filename': 'a.pdf'}])
+    assert RankingCache(path, version='a').get('k') is not None
+    assert RankingCache(path, version='b').get('k') is None
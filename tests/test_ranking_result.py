@@ -0,0 +1,120 @@
+"""RankingResult columns, skill bitsets and pagination against plain per-resume dicts."""
+import random
+
+import numpy as np
+import pytest
+
+from models.job_matcher import JobMatcher
+from models.ranking_result import RankingResult
+
+SKILLS = [f'skill{i}' for i in range(21)]  # more than two bytes of bits
+
+
+def metas(n, seed=0):
+    rng = random.Random(seed)
+    result = []
+    for i in range(n):
+        skills = rng.sample(SKILLS, rng.randrange(len(SKILLS) + 1))
+        meta = {'filename': f'{i}.pdf', 'skills': skills, 'skill_count': len(skills)}
+        if i % 7 == 3:
+            meta['duplicates'] = [f'{i}-copy.pdf']
+        result.append(meta)
+    result[5]['filename'] = None
+    return result
+
+
+def reference(sims, metas, jd_skills):
+    """The per-resume dicts rank_resumes used to build: stable sort, best first."""
+    order = sorted(range(len(sims)), key=lambda i: -sims[i])
+    rows = []
+    for rank, i in enumerate(order, 1):
+        meta = metas[i]
+        have = set(meta['skills'])
+        matched = [s for s in jd_skills if s in have]
+        rows.append({'resume_id': i, 'filename': meta['filename'] or f'Resume_{i + 1}',
+                     'similarity_score': float(np.float32(sims[i])),
+                     'percentage_match': round(float(np.float32(sims[i])) * 100, 2),
+                     'skills': sorted(meta['skills']), 'skill_count': meta['skill_count'],
+                     'rank': rank, 'matched_skills': matched,
+                     'missing_skills': [s for s in jd_skills if s not in have],
+                     'skill_coverage': round(len(matched) / len(jd_skills), 4),
+                     'duplicates': meta.get('duplicates', [])})
+    return rows
+
+
+def normalized(rows):
+    return [dict(row, skills=sorted(row['skills'])) for row in rows]
+
+
+def scores(n, seed=0):
+    # Few distinct values, so ties are common
+    return np.random.default_rng(seed).integers(0, 10, n).astype(np.float32) / 10
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_rows_match_reference_dicts(seed):
+    n = 40
+    sims, meta = scores(n, seed), metas(n, seed)
+    jd_skills = ['skill0', 'skill9', 'skill20']
+    result = JobMatcher().rank_scores(sims, meta, jd_skills=jd_skills)
+    assert normalized(result.to_dicts()) == reference(sims, meta, jd_skills)
+    row = result[0]
+    assert row['filename'] == row.filename and row.get('nope', 'x') == 'x'
+    with pytest.raises(KeyError):
+        row['nope']
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_skill_bitset(seed):
+    n = 30
+    meta = metas(n, seed)
+    result = RankingResult.from_meta(np.arange(n)[::-1], scores(n, seed), meta)
+    for i, row in enumerate(np.arange(n)[::-1]):
+        assert sorted(result.skills_of(i)) == sorted(meta[row]['skills'])
+    for skill in SKILLS + ['unknown']:
+        expected = [skill in meta[row]['skills'] for row in np.arange(n)[::-1]]
+        assert result.has_skill(skill).tolist() == expected
+
+
+@pytest.mark.parametrize('top_k', [1, 3, 7, 100])
+def test_pages_concatenate_to_the_full_ranking(top_k):
+    n = 50
+    sims, meta = scores(n), metas(n)
+    matcher = JobMatcher()
+    full = matcher.rank_scores(sims, meta)
+    pages, duplicates = [], []
+    for offset in range(0, n + top_k, top_k):
+        page = matcher.rank_scores(sims, meta, top_k=top_k, offset=offset)
+        assert page.ranks.tolist() == list(range(offset + 1, offset + 1 + len(page)))
+        # A page without near-duplicates has no ``duplicates`` column
+        pages.extend({key: row[key] for key in RankingResult.FIELDS} for row in page)
+        duplicates.extend(row.duplicates for row in page)
+    assert normalized(pages) == normalized(
+        [{key: row[key] for key in RankingResult.FIELDS} for row in full])
+    assert duplicates == [row.duplicates for row in full]
+
+
+def test_slices_keep_ranks_and_columns():
+    n = 20
+    sims, meta = scores(n), metas(n)
+    result = JobMatcher().rank_scores(sims, meta, jd_skills=['skill1'])
+    full = result.to_dicts()
+    assert normalized(result[5:12].to_dicts()) == normalized(full[5:12])
+    assert normalized([result[-1].to_dict()]) == normalized(full[-1:])
+    with pytest.raises(ValueError):
+        result[::2]
+    with pytest.raises(IndexError):
+        result[n]
+
+
+def test_select_top_matches_a_stable_sort():
+    sims = scores(200, seed=4)
+    expected = np.argsort(-sims, kind='stable')
+    for top_k, offset in [(10, 0), (10, 15), (5, 195), (30, 300), (None, 20)]:
+        end = None if top_k is None else offset + top_k
+        assert JobMatcher.select_top(sims, top_k, offset).tolist() == expected[offset:end].tolist()
+
+
+def test_empty_result():
+    result = RankingResult.from_meta([], [], [])
+    assert len(result) == 0 and result.to_dicts() == [] and not result.has_skill('x').any()
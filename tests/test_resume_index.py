@@ -0,0 +1,125 @@
+"""ResumeIndex: incremental adds, sharing one directory, refits and removal,
+checked against an index fitted from scratch in memory."""
+import os
+import random
+
+import numpy as np
+import pytest
+
+from models.resume_index import ResumeIndex
+
+WORDS = ('python java docker kubernetes react sql aws machine learning flask django '
+         'spark scala golang rust terraform linux pandas numpy tableau excel').split()
+JD = 'python developer with sql, flask and docker'
+
+
+def documents(n, seed=0):
+    rng = random.Random(seed)
+    return [' '.join(rng.choice(WORDS) for _ in range(40)) for _ in range(n)]
+
+
+def ids(prefix, n):
+    return [f'{prefix}{i}' for i in range(n)]
+
+
+@pytest.fixture
+def folder(tmp_path):
+    return str(tmp_path / 'index')
+
+
+def test_adds_score_like_the_fitted_vocabulary(folder):
+    texts = documents(20)
+    index = ResumeIndex(folder)
+    index.add(ids('a', 10), texts[:10])
+    index.add(ids('b', 2), texts[10:12])
+    sims, doc_ids, _ = index.score(JD)
+    expected = index.vectorizer.transform(texts[:12]) @ index.vectorizer.transform([JD]).T
+    np.testing.assert_allclose(sims, expected.toarray().ravel(), rtol=1e-5, atol=1e-6)
+    assert doc_ids == ids('a', 10) + ids('b', 2)
+
+
+def test_other_instances_see_appends_and_reload_the_same_scores(folder):
+    texts = documents(15)
+    writer, reader = ResumeIndex(folder), ResumeIndex(folder)
+    writer.add(ids('a', 10), texts[:10])
+    assert len(reader) == 10
+    writer.add(ids('b', 2), texts[10:12])
+    assert len(reader) == 12
+    np.testing.assert_allclose(reader.score(JD)[0], writer.score(JD)[0])
+    np.testing.assert_allclose(ResumeIndex(folder).score(JD)[0], writer.score(JD)[0])
+
+
+def test_unchanged_documents_are_not_rewritten(folder):
+    texts = documents(10)
+    index = ResumeIndex(folder)
+    index.add(ids('a', 10), texts)
+    version = (index._generation, index._last_seq)
+    index.add(ids('a', 3), texts[:3])
+    assert (index._generation, index._last_seq) == version
+    assert len(index) == 10
+
+
+def test_changed_text_replaces_the_document(folder):
+    texts = documents(10)
+    index = ResumeIndex(folder)
+    index.add(ids('a', 10), texts)
+    index.add(['a0'], ['golang rust terraform'])
+    reader = ResumeIndex(folder)
+    assert len(reader) == 10
+    assert reader.texts[reader._positions['a0']] == 'golang rust terraform'
+
+
+def test_refit_matches_a_fresh_fit(folder):
+    texts = documents(30)
+    index = ResumeIndex(folder)
+    index.add(ids('a', 10), texts[:10])
+    assert not index.needs_refit()
+    index.add(ids('b', 20), texts[10:])
+    assert index.needs_refit()
+    assert index.refit()
+    assert not index.needs_refit()
+
+    fresh = ResumeIndex()
+    fresh.fit(ids('a', 10) + ids('b', 20), texts)
+    np.testing.assert_allclose(ResumeIndex(folder).score(JD)[0], fresh.score(JD)[0],
+                               rtol=1e-5, atol=1e-6)
+
+
+def test_remove(folder):
+    texts = documents(10)
+    index = ResumeIndex(folder)
+    index.add(ids('a', 10), texts, [{'filename': f'{i}.pdf'} for i in range(10)])
+    index.remove(['a1', 'a5', 'unknown'])
+    reader = ResumeIndex(folder)
+    assert len(reader) == 8
+    assert reader.ids == [i for i in ids('a', 10) if i not in ('a1', 'a5')]
+    assert [m['filename'] for m in reader.meta] == [f'{i}.pdf' for i in range(10)
+                                                    if i not in (1, 5)]
+    np.testing.assert_allclose(
+        reader.score(JD)[0],
+        (reader.vectorizer.transform(reader.texts) @ reader.vectorizer.transform([JD]).T)
+        .toarray().ravel(), rtol=1e-5, atol=1e-6)
+    index.remove(reader.ids)
+    assert len(ResumeIndex(folder)) == 0
+
+
+def test_search_matches_exhaustive_scoring(folder):
+    texts = documents(50)
+    index = ResumeIndex(folder)
+    index.add(ids('a', 50), texts, [{'skills': ['python'] if i % 3 else []} for i in range(50)])
+    sims = index.score(JD)[0]
+    rows, scores, _, _ = index.search(JD, k=10)
+    expected = np.lexsort((np.arange(50), -sims))[:10]
+    assert rows.tolist() == expected.tolist()
+    np.testing.assert_allclose(scores, sims[expected], rtol=1e-5, atol=1e-6)
+
+    rows, _, _, _ = index.search(JD, k=10, must_have=['python'])
+    allowed = np.flatnonzero(np.arange(50) % 3)
+    assert rows.tolist() == allowed[np.lexsort((allowed, -sims[allowed]))][:10].tolist()
+
+
+def test_in_memory_index_writes_nothing(tmp_path):
+    index = ResumeIndex()
+    index.add(ids('a', 5), documents(5))
+    assert len(index) == 5
+    assert not os.listdir(tmp_path)
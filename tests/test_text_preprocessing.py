@@ -0,0 +1,123 @@
+"""TextPreprocessor output must match the original pipeline exactly, with
+either tokenizer, on the sample resumes and on edge cases."""
+import os
+import re
+
+import pytest
+
+from utils import text_preprocessing
+from utils.file_handler import FileHandler
+from utils.text_preprocessing import TextPreprocessor
+
+SAMPLES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                       'static', 'uploads')
+
+EDGE_CASES = [
+    '',
+    '   \n\t ',
+    None,
+    '!!! ... ??? --- ***',
+    '.,;:',
+    'C++ C# .NET F#. developer',
+    'Skills: C++, C#, .NET, ASP.NET, Node.js, Vue.js. Ended with C#.',
+    'Résumé of José Müller: naïve café, Zürich, 東京, Ελληνικά, Привет мир.',
+    'Worked 3.5 yrs. B.Sc. in CS from U.S. univ. ... then more..',
+    'I cannot wait, gonna ship, gotta test, wanna build. Lemme know, gimme wanna',
+    'Sentence one. Sentence two! Question three? Final period.',
+    'trailing ellipsis...',
+    'a. b. c. d. e.',
+    'ends with hash#. and #tag # alone',
+    'under_score snake_case_name __init__. 2019-2023 10+ years',
+    'x' * 9,
+]
+
+
+def sample_texts():
+    handler = FileHandler(SAMPLES)
+    return [handler.extract_text(os.path.join(SAMPLES, name))
+            for name in sorted(os.listdir(SAMPLES)) if handler.allowed_file(name)]
+
+
+DOCUMENTS = sample_texts() + EDGE_CASES
+
+
+def legacy_preprocess(text, stop_words, stemmer, word_tokenize):
+    """The pipeline before TextPreprocessor was optimized."""
+    if not isinstance(text, str):
+        return ''
+    text = text.lower()
+    text = re.sub(r'[^\w\s+#\.]', ' ', text)
+    text = ' '.join(text.split())
+    if len(text.strip()) < 10:
+        return text
+    if word_tokenize is not None:
+        try:
+            tokens = word_tokenize(text)
+        except Exception:
+            tokens = text.split()
+    else:
+        tokens = text.split()
+    tokens = [t for t in tokens if t not in stop_words and len(t) > 1]
+    if stemmer:
+        tokens = [stemmer.stem(t) for t in tokens]
+    processed = ' '.join(tokens)
+    return processed if processed.strip() else text
+
+
+def with_tokenizers(tokenizer, sent_tokenize, word_tokenize):
+    """A preprocessor using the given NLTK tokenizers instead of the installed ones."""
+    preprocessor = TextPreprocessor(tokenizer=tokenizer)
+    preprocessor._load()
+    preprocessor._sent_tokenize = sent_tokenize
+    preprocessor._word_tokenize = word_tokenize
+    return preprocessor
+
+
+def test_samples_are_loaded():
+    assert len(DOCUMENTS) > len(EDGE_CASES)
+
+
+@pytest.mark.parametrize('text', DOCUMENTS)
+def test_default_path_matches_legacy_pipeline(text):
+    preprocessor = TextPreprocessor()
+    legacy_stemmer = type(preprocessor.stemmer)() if preprocessor.stemmer else None
+    expected = legacy_preprocess(text, preprocessor.stop_words, legacy_stemmer,
+                                 text_preprocessing.load_nltk()['word_tokenize'])
+    assert preprocessor.preprocess_text(text) == expected
+
+
+@pytest.mark.parametrize('text', DOCUMENTS)
+def test_regex_tokenizer_matches_installed_nltk(text):
+    assert (TextPreprocessor(tokenizer='regex').preprocess_text(text)
+            == TextPreprocessor(tokenizer='nltk').preprocess_text(text))
+
+
+@pytest.mark.parametrize('text', DOCUMENTS)
+def test_regex_tokenizer_matches_word_tokenize(text):
+    # punkt's data may not be installed: an untrained PunktSentenceTokenizer
+    # and NLTKWordTokenizer exercise the same code as word_tokenize.
+    pytest.importorskip('nltk')
+    from nltk.tokenize import NLTKWordTokenizer
+    from nltk.tokenize.punkt import PunktSentenceTokenizer
+
+    sentences = PunktSentenceTokenizer()
+    words = NLTKWordTokenizer()
+
+    def word_tokenize(value):
+        return [token for sentence in sentences.tokenize(value)
+                for token in words.tokenize(sentence)]
+
+    nltk_path = with_tokenizers('nltk', sentences.tokenize, word_tokenize)
+    regex_path = with_tokenizers('regex', sentences.tokenize, word_tokenize)
+    cleaned = nltk_path.clean_text(text)
+    assert (regex_path.tokenize_and_remove_stopwords(cleaned)
+            == nltk_path.tokenize_and_remove_stopwords(cleaned))
+    assert regex_path.preprocess_text(text) == nltk_path.preprocess_text(text)
+    assert regex_path.preprocess_text(text) == legacy_preprocess(
+        text, nltk_path.stop_words, nltk_path.stemmer, word_tokenize)
+
+
+def test_preprocess_many_matches_preprocess_text():
+    preprocessor = TextPreprocessor(tokenizer='regex')
+    assert (list(preprocessor.preprocess_many(DOCUMENTS))
+            == [preprocessor.preprocess_text(text) for text in DOCUMENTS])
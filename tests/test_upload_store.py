@@ -0,0 +1,127 @@
+"""UploadStore: content-addressed dedup, and GC against a reference policy."""
+import io
+import os
+import random
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import utils.upload_store as upload_store
+from utils.upload_store import UploadStore
+
+
+class Unseekable(io.RawIOBase):
+    def __init__(self, data):
+        self._stream = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def readinto(self, buffer):
+        data = self._stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [time.time()]
+    monkeypatch.setattr(upload_store, 'time',
+                        SimpleNamespace(time=lambda: now[0], monotonic=lambda: now[0]))
+    return now
+
+
+def make_store(tmp_path, **kwargs):
+    kwargs.setdefault('gc_interval_seconds', 1e9)
+    return UploadStore(str(tmp_path / 'blobs'), str(tmp_path / 'uploads.sqlite3'), **kwargs)
+
+
+def test_same_bytes_are_stored_once(tmp_path):
+    store = make_store(tmp_path)
+    digest, path, is_new = store.save(io.BytesIO(b'resume one'), 'a.pdf')
+    assert is_new and open(path, 'rb').read() == b'resume one'
+    assert store.digest_of(path) == digest
+    assert store.save(io.BytesIO(b'resume one'), 'b.pdf') == (digest, path, False)
+    assert store.save(Unseekable(b'resume one'), 'c.pdf') == (digest, path, False)
+
+    other, other_path, is_new = store.save(Unseekable(b'resume two'), 'a.pdf')
+    assert is_new and other != digest and open(other_path, 'rb').read() == b'resume two'
+    assert store.lookup('a.pdf') in (path, other_path)
+    assert store.lookup('b.pdf') == path and store.lookup('missing.pdf') is None
+    assert store.stats()['blobs'] == 2 and store.stats()['uploads'] == 4
+    assert store.digest_of(str(tmp_path / 'elsewhere' / digest[:2] / f'{digest}.pdf')) is None
+    # Nothing but blobs is left in the folder (no temporary files)
+    files = [name for _, _, names in os.walk(store.folder) for name in names]
+    assert sorted(files) == sorted([os.path.basename(path), os.path.basename(other_path)])
+
+
+def reference_gc(blobs, now, retention, max_bytes, min_age):
+    """Digests that should survive: ``blobs`` maps digest -> (size, last_used)."""
+    protected = now - min_age
+    alive = dict(blobs)
+    if retention is not None:
+        alive = {d: b for d, b in alive.items() if b[1] >= min(protected, now - retention)}
+    if max_bytes is not None:
+        total = sum(size for size, _ in alive.values())
+        for digest in sorted(alive, key=lambda d: alive[d][1]):
+            if total <= max_bytes or alive[digest][1] >= protected:
+                break
+            total -= alive.pop(digest)[0]
+    return set(alive)
+
+
+@pytest.mark.parametrize('retention, max_bytes', [(500, None), (None, 300), (500, 300)])
+@pytest.mark.parametrize('seed', range(3))
+def test_gc_matches_reference(tmp_path, clock, seed, retention, max_bytes):
+    rng = random.Random(seed)
+    store = make_store(tmp_path, max_bytes=max_bytes, retention_seconds=retention,
+                       min_age_seconds=100)
+    blobs, paths = {}, {}
+    for i in range(20):
+        clock[0] += rng.randrange(1, 60)
+        data = f'resume {i} '.encode() * rng.randrange(1, 8)
+        digest, path, _ = store.save(io.BytesIO(data), f'{i}.pdf')
+        blobs[digest] = (len(data), clock[0])
+        paths[digest] = path
+    clock[0] += 150
+
+    survivors = reference_gc(blobs, clock[0], retention, max_bytes, 100)
+    assert store.gc() == len(blobs) - len(survivors)
+    assert {d for d, p in paths.items() if os.path.exists(p)} == survivors
+    assert store.stats()['blobs'] == len(survivors)
+
+
+def test_reupload_refreshes_a_blob(tmp_path, clock):
+    store = make_store(tmp_path, retention_seconds=500, min_age_seconds=10)
+    _, path, _ = store.save(io.BytesIO(b'old resume'), 'a.pdf')
+    clock[0] += 400
+    store.save(io.BytesIO(b'old resume'), 'again.pdf')
+    clock[0] += 400
+    assert store.gc() == 0 and os.path.exists(path)
+    clock[0] += 200
+    assert store.gc() == 1 and not os.path.exists(path)
+    assert store.lookup('a.pdf') is None
+
+
+def test_gc_removes_orphans_and_stale_temp_files(tmp_path, clock):
+    store = make_store(tmp_path, min_age_seconds=100)
+    _, kept, _ = store.save(io.BytesIO(b'indexed'), 'a.pdf')
+    orphan = store.path_for('f' * 64, '.pdf')
+    os.makedirs(os.path.dirname(orphan), exist_ok=True)
+    temp, fresh_temp, other = (os.path.join(store.folder, name)
+                               for name in ('x.tmp', 'y.tmp', 'notes.txt'))
+    for path in (orphan, temp, fresh_temp, other):
+        open(path, 'wb').close()
+    old = clock[0] - 1000
+    for path in (kept, orphan, temp, other):
+        os.utime(path, (old, old))
+    clock[0] += 200
+    os.utime(fresh_temp, (clock[0], clock[0]))
+
+    assert store.gc() == 2
+    assert not os.path.exists(orphan) and not os.path.exists(temp)
+    assert os.path.exists(kept) and os.path.exists(fresh_temp) and os.path.exists(other)
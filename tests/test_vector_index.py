@@ -0,0 +1,130 @@
+"""VectorIndex and its IVF lists, checked against exhaustive dot products."""
+import random
+
+import numpy as np
+import pytest
+
+from models.embedding import HashingEmbedder, LSAEmbedder
+from models.resume_index import ResumeIndex
+from models.vector_index import IVFLists, VectorIndex
+
+WORDS = ('python java docker kubernetes react sql aws machine learning flask django '
+         'spark scala golang rust terraform linux pandas numpy tableau excel').split()
+JD = 'python developer with sql, flask and docker'
+
+
+def documents(n, seed=0):
+    rng = random.Random(seed)
+    return [' '.join(rng.choice(WORDS) for _ in range(30)) for _ in range(n)]
+
+
+def ids(prefix, n):
+    return [f'{prefix}{i}' for i in range(n)]
+
+
+def unit_vectors(n, dim, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def embedder():
+    return HashingEmbedder(dim=32, n_features=2 ** 12)
+
+
+@pytest.fixture
+def folder(tmp_path):
+    return str(tmp_path / 'vectors')
+
+
+def test_ivf_lists_partition_by_closest_centroid():
+    vectors = unit_vectors(500, 16)
+    ivf = IVFLists.train(vectors, nlist=12)
+    assert len(ivf) == 12
+    np.testing.assert_array_equal(ivf.assignments, np.argmax(vectors @ ivf.centroids.T, axis=1))
+    np.testing.assert_allclose(np.linalg.norm(ivf.centroids, axis=1), 1, rtol=1e-5)
+
+    query = unit_vectors(1, 16, seed=1)[0]
+    probed = np.argsort(-(ivf.centroids @ query))[:3]
+    expected = np.flatnonzero(np.isin(ivf.assignments, probed))
+    np.testing.assert_array_equal(ivf.candidates(query, 3), expected)
+    np.testing.assert_array_equal(ivf.candidates(query, len(ivf)), np.arange(500))
+
+    allowed = np.arange(500) % 5 == 0
+    rows = ivf.candidates(query, 1, allowed, min_rows=60)
+    assert len(rows) >= 60 and allowed[rows].all()
+
+    more = unit_vectors(50, 16, seed=2)
+    extended = ivf.extend(more)
+    np.testing.assert_array_equal(extended.assignments[500:],
+                                  np.argmax(more @ ivf.centroids.T, axis=1))
+
+
+def test_search_probing_every_list_is_exact(folder):
+    texts = documents(120)
+    index = VectorIndex(folder, embedder(), ivf_min=50, nprobe=1000)
+    index.add(ids('a', 120), texts, [{'skills': ['python'] if i % 4 else []}
+                                     for i in range(120)])
+    assert index.ivf is not None and len(index.ivf) == int(np.sqrt(120))
+
+    vectors = embedder().embed(texts)
+    query = embedder().embed([JD.lower()])[0]
+    sims = vectors @ query
+    np.testing.assert_allclose(index.score(JD)[0], sims, rtol=1e-5, atol=1e-6)
+
+    rows, scores, _, _ = index.search(JD, k=10)
+    np.testing.assert_allclose(scores, np.sort(sims)[::-1][:10], rtol=1e-5, atol=1e-6)
+
+    rows, scores, _, _ = index.search(JD, k=10, must_have=['python'])
+    allowed = np.flatnonzero(np.arange(120) % 4)
+    assert set(rows.tolist()) <= set(allowed.tolist())
+    np.testing.assert_allclose(scores, np.sort(sims[allowed])[::-1][:10], rtol=1e-5, atol=1e-6)
+
+
+def test_search_with_few_lists_scores_candidates_exactly(folder):
+    texts = documents(200, seed=3)
+    index = VectorIndex(folder, embedder(), ivf_min=50, nprobe=2)
+    index.add(ids('a', 200), texts)
+    vectors = embedder().embed(texts)
+    query = embedder().embed([JD.lower()])[0]
+    rows, scores, _, _ = index.search(JD, k=5)
+    np.testing.assert_allclose(scores, vectors[rows] @ query, rtol=1e-5, atol=1e-6)
+    candidates = index.ivf.candidates(query, 2, min_rows=5)
+    best = candidates[np.argsort(-(vectors[candidates] @ query), kind='stable')[:5]]
+    assert sorted(rows.tolist()) == sorted(best.tolist())
+
+
+def test_appends_are_seen_by_other_instances(folder):
+    texts = documents(90, seed=5)
+    writer = VectorIndex(folder, embedder(), ivf_min=50)
+    writer.add(ids('a', 60), texts[:60])
+    reader = VectorIndex(folder, embedder(), ivf_min=50)
+    assert len(reader) == 60
+    writer.add(ids('b', 30), texts[60:])
+    assert len(reader) == 90
+    np.testing.assert_allclose(reader.score(JD)[0], writer.score(JD)[0], rtol=1e-6)
+    assert len(writer.ivf.assignments) == 90
+
+    # The pool has not doubled since the lists were trained on 60
+    assert not writer.needs_refit()
+    writer.add(ids('c', 30), documents(30, seed=6))
+    assert writer.needs_refit() and writer.refit()
+    assert writer._ivf_trained_on == 120
+    fresh = VectorIndex(folder, embedder(), ivf_min=50)
+    assert len(fresh) == 120 and len(fresh.ivf) == int(np.sqrt(120))
+
+
+def test_unfitted_embedder_answers_from_the_fallback(folder, tmp_path):
+    texts = documents(40, seed=7)
+    fallback = ResumeIndex(str(tmp_path / 'tfidf'))
+    fallback.add(ids('a', 40), texts)
+    index = VectorIndex(folder, LSAEmbedder(dim=8), min_fit_docs=30, fallback=fallback)
+    index.add(ids('a', 20), texts[:20])
+    assert index.matrix is None and not index.needs_refit()
+    np.testing.assert_allclose(index.score(JD)[0], fallback.score(JD)[0])
+
+    index.add(ids('b', 20), texts[20:])
+    assert index.needs_refit() and index.refit()
+    assert index.matrix.shape == (40, index.vectorizer.dim)
+    sims = index.score(JD)[0]
+    np.testing.assert_allclose(sims, index.vectorizer.embed(texts) @ index._embed_query(
+        index.vectorizer, JD), rtol=1e-4, atol=1e-5)
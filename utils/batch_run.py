@@ -0,0 +1,250 @@
+# -------------------------------------------------
+#  Purpose: Building blocks for directory-scale
+#           batch ranking (cli.py rank-dir): resume
+#           sources, streamed result writers and a
+#           resumable checkpoint.
+# -------------------------------------------------
+
+import csv
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tarfile
+import zipfile
+
+from werkzeug.utils import secure_filename
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+FIELDS = ('job', 'filename', 'similarity_score', 'percentage_match', 'skill_count', 'skills')
+
+TAR_SUFFIXES = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+
+# ---------------------------------------------------------------------- #
+#  Sources                                                               #
+# ---------------------------------------------------------------------- #
+class ResumeSource:
+    """Resume files in a directory tree, a zip archive or a tar archive.
+
+    ``names`` lists the supported files once, in a fixed order (sorted for
+    directories and zips, archive order for tars so compressed tars are
+    read front to back), so a run can be resumed by position.
+    ``materialize`` turns a slice of those names into ``(name, path)``
+    pairs for ``IngestionPipeline``; archive members are copied into a
+    scratch folder one batch at a time.
+    """
+
+    def __init__(self, path, allowed_file):
+        self.path = path
+        self.allowed_file = allowed_file
+        lower = path.lower()
+        if os.path.isdir(path):
+            self.kind = 'dir'
+        elif lower.endswith('.zip'):
+            self.kind = 'zip'
+        elif lower.endswith(TAR_SUFFIXES):
+            self.kind = 'tar'
+        else:
+            raise ValueError(f"{path} is not a directory, .zip or .tar archive")
+        self._archive = None
+        self._members = None
+
+    def names(self):
+        if self.kind == 'dir':
+            names = []
+            for root, dirs, files in os.walk(self.path):
+                dirs.sort()
+                for name in files:
+                    if self.allowed_file(name):
+                        names.append(os.path.relpath(os.path.join(root, name), self.path))
+            return sorted(names)
+        if self.kind == 'zip':
+            return sorted(info.filename for info in self._open().infolist()
+                          if not info.is_dir() and self.allowed_file(info.filename))
+        self._members = {member.name: member for member in self._open().getmembers()
+                         if member.isfile() and self.allowed_file(member.name)}
+        return list(self._members)
+
+    def materialize(self, names, scratch_dir):
+        """``(name, path)`` pairs for ``names``; archive members land in ``scratch_dir``."""
+        if self.kind == 'dir':
+            return [(name, os.path.join(self.path, name)) for name in names]
+        items = []
+        for i, name in enumerate(names):
+            # Own file names: member paths are never trusted on disk
+            target = os.path.join(scratch_dir,
+                                  f'{i:06d}_{secure_filename(os.path.basename(name)) or "file"}')
+            if self.kind == 'zip':
+                src = self._open().open(name)
+            else:
+                if self._members is None:
+                    self.names()
+                src = self._open().extractfile(self._members[name])
+            with src, open(target, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            items.append((name, target))
+        return items
+
+    def close(self):
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+
+    def _open(self):
+        if self._archive is None:
+            self._archive = (zipfile.ZipFile(self.path) if self.kind == 'zip'
+                             else tarfile.open(self.path))
+        return self._archive
+
+
+# ---------------------------------------------------------------------- #
+#  Writers                                                               #
+# ---------------------------------------------------------------------- #
+class _TextWriter:
+    """Appends rows to one file; ``state`` is the byte offset of the last flush."""
+
+    def __init__(self, path, state=None):
+        self.path = path
+        if state:
+            # Rows written after the last checkpoint are dropped and redone
+            with open(path, 'r+b') as f:
+                f.truncate(state['bytes'])
+            self.file = open(path, 'a', newline='', encoding='utf-8')
+        else:
+            self.file = open(path, 'w', newline='', encoding='utf-8')
+            self._start()
+
+    def _start(self):
+        pass
+
+    def flush(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return {'bytes': self.file.tell()}
+
+    def close(self):
+        self.file.close()
+
+
+class CsvResultWriter(_TextWriter):
+    def _start(self):
+        self._writer().writerow(FIELDS)
+
+    def _writer(self):
+        return csv.writer(self.file)
+
+    def write(self, rows):
+        writer = self._writer()
+        for row in rows:
+            writer.writerow([row[field] if field != 'skills' else '; '.join(row['skills'])
+                             for field in FIELDS])
+
+
+class JsonlResultWriter(_TextWriter):
+    def write(self, rows):
+        for row in rows:
+            self.file.write(json.dumps({field: row[field] for field in FIELDS}) + '\n')
+
+
+class ParquetResultWriter:
+    """A directory of Parquet part files, one per flush, readable as one dataset."""
+
+    def __init__(self, path, state=None):
+        if not PARQUET_AVAILABLE:
+            raise ValueError('Parquet output needs pyarrow installed')
+        self.path = path
+        self.parts = state['parts'] if state else 0
+        os.makedirs(path, exist_ok=True)
+        for name in os.listdir(path):
+            # Parts from an interrupted run after its last checkpoint
+            number = name[5:10]
+            if name.startswith('part-') and number.isdigit() and int(number) >= self.parts:
+                os.remove(os.path.join(path, name))
+        self.rows = []
+
+    def write(self, rows):
+        self.rows.extend({field: row[field] for field in FIELDS} for row in rows)
+
+    def flush(self):
+        if self.rows:
+            table = pyarrow.Table.from_pylist(self.rows)
+            pyarrow.parquet.write_table(table, os.path.join(self.path,
+                                                            f'part-{self.parts:05d}.parquet'))
+            self.parts += 1
+            self.rows = []
+        return {'parts': self.parts}
+
+    def close(self):
+        self.flush()
+
+
+WRITERS = {'csv': CsvResultWriter, 'jsonl': JsonlResultWriter, 'parquet': ParquetResultWriter}
+
+
+def output_format(path):
+    """``csv``, ``jsonl`` or ``parquet`` from the output path's extension."""
+    ext = os.path.splitext(path.rstrip('/'))[1].lower().lstrip('.')
+    fmt = {'ndjson': 'jsonl', 'pq': 'parquet'}.get(ext, ext)
+    if fmt not in WRITERS:
+        raise ValueError(f"cannot tell the output format of {path}; use --format")
+    return fmt
+
+
+def open_writer(path, fmt, state=None):
+    return WRITERS[fmt](path, state)
+
+
+# ---------------------------------------------------------------------- #
+#  Checkpoint                                                            #
+# ---------------------------------------------------------------------- #
+class Checkpoint:
+    """JSON progress file of a batch run, replaced atomically on every save.
+
+    ``fingerprint`` identifies the run's inputs and settings; a checkpoint
+    written for different ones is refused rather than resumed.
+    """
+
+    def __init__(self, path, fingerprint):
+        self.path = path
+        self.fingerprint = fingerprint
+
+    @staticmethod
+    def fingerprint_of(*parts):
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(json.dumps(part, sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()
+
+    def load(self):
+        """The saved state, or None when there is nothing to resume."""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None
+        if state.get('fingerprint') != self.fingerprint:
+            raise ValueError(f"checkpoint {self.path} belongs to a run with other inputs "
+                             f"or settings; pass --restart to discard it")
+        return state
+
+    def save(self, state):
+        state = dict(state, fingerprint=self.fingerprint)
+        with open(self.path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(self.path + '.tmp', self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,154 @@
+import json
+import logging
+import sqlite3
+import time
+import zlib
+
+from utils.sqlite_store import SQLiteConnections
+
+logger = logging.getLogger(__name__)
+
+
+class CandidateStore:
+    """Processed resumes keyed by the SHA-256 of the uploaded file.
+
+    Keeps what ``ResumeProcessor.process_resume`` produced (extracted text,
+    preprocessed tokens, skills) so a file that was ingested before is never
+    extracted or preprocessed again, and so the TF-IDF ``ResumeIndex`` can be
+    rebuilt without the original files. Rows written under a different
+    ``version`` count as missing; callers pass one covering both the
+    extractor settings and ``ResumeProcessor.version`` (taxonomy included).
+    """
+
+    def __init__(self, path, version='1'):
+        self.path = path
+        self.version = str(version)
+        self._connections = SQLiteConnections(path)
+
+        conn = self._connections.get()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS candidates ('
+            ' digest TEXT PRIMARY KEY,'
+            ' version TEXT NOT NULL,'
+            ' filename TEXT NOT NULL,'
+            ' original_text BLOB NOT NULL,'
+            ' processed_text TEXT NOT NULL,'
+            ' skills TEXT NOT NULL,'
+            ' skill_counts TEXT NOT NULL,'
+            ' created REAL NOT NULL,'
+            ' updated REAL NOT NULL)'
+        )
+
+    @staticmethod
+    def _row_to_processed(row):
+        # The original text stays on disk: ranking never reads it (see text()).
+        digest, filename, processed_text, skills, skill_counts = row
+        skills = json.loads(skills)
+        return {
+            'digest': digest,
+            'filename': filename,
+            'processed_text': processed_text,
+            'skills': skills,
+            'skill_count': len(skills),
+            'skill_counts': json.loads(skill_counts),
+        }
+
+    # ------------------------------------------------------------------ #
+    #  PUBLIC API                                                         #
+    # ------------------------------------------------------------------ #
+    def get_many(self, digests):
+        """``{digest: processed}`` for the digests stored under this version.
+
+        The dicts are ``process_resume`` output without ``original_text``.
+        """
+        digests = list(dict.fromkeys(digests))
+        found = {}
+        conn = self._connections.get()
+        try:
+            # SQLite caps the number of bound parameters per statement.
+            for start in range(0, len(digests), 500):
+                batch = digests[start:start + 500]
+                rows = conn.execute(
+                    'SELECT digest, filename, processed_text, skills, skill_counts '
+                    f'FROM candidates WHERE version = ? AND digest IN ({",".join("?" * len(batch))})',
+                    [self.version] + batch
+                ).fetchall()
+                for row in rows:
+                    found[row[0]] = self._row_to_processed(row)
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning("Candidate store read failed (%s): %s", self.path, e)
+        return found
+
+    def get(self, digest):
+        return self.get_many([digest]).get(digest)
+
+    def text(self, digest):
+        """The extracted text a candidate was processed from, or None."""
+        row = self._connections.get().execute(
+            'SELECT original_text FROM candidates WHERE digest = ? AND version = ?',
+            (digest, self.version)
+        ).fetchone()
+        return zlib.decompress(row[0]).decode('utf-8') if row else None
+
+    def put_many(self, entries):
+        """Store ``(digest, processed)`` pairs; ``processed`` as from ``process_resume``."""
+        now = time.time()
+        rows = [
+            (digest, self.version, processed.get('filename') or digest,
+             zlib.compress(processed.get('original_text', '').encode('utf-8')),
+             processed['processed_text'], json.dumps(processed.get('skills', [])),
+             json.dumps(processed.get('skill_counts', {})), now, now)
+            for digest, processed in entries
+        ]
+        if not rows:
+            return
+        conn = self._connections.get()
+        try:
+            with conn:
+                conn.execute('BEGIN IMMEDIATE')
+                conn.executemany(
+                    'INSERT INTO candidates(digest, version, filename, original_text, '
+                    'processed_text, skills, skill_counts, created, updated) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) '
+                    'ON CONFLICT(digest) DO UPDATE SET version = excluded.version, '
+                    'filename = excluded.filename, original_text = excluded.original_text, '
+                    'processed_text = excluded.processed_text, skills = excluded.skills, '
+                    'skill_counts = excluded.skill_counts, updated = excluded.updated',
+                    rows
+                )
+        except sqlite3.Error as e:
+            logger.warning("Candidate store write failed (%s): %s", self.path, e)
+
+    def put(self, digest, processed):
+        self.put_many([(digest, processed)])
+
+    def remove(self, digests):
+        conn = self._connections.get()
+        conn.executemany('DELETE FROM candidates WHERE digest = ?', [(d,) for d in digests])
+
+    def iter_all(self, batch_size=1000):
+        """Yield every current-version candidate as a ``(digest, processed)`` pair."""
+        conn = self._connections.get()
+        last = ''
+        while True:
+            rows = conn.execute(
+                'SELECT digest, filename, processed_text, skills, skill_counts '
+                'FROM candidates WHERE version = ? AND digest > ? ORDER BY digest LIMIT ?',
+                (self.version, last, batch_size)
+            ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield row[0], self._row_to_processed(row)
+            last = rows[-1][0]
+
+    def __len__(self):
+        return self._connections.get().execute(
+            'SELECT COUNT(*) FROM candidates WHERE version = ?', (self.version,)).fetchone()[0]
+
+    def stats(self):
+        conn = self._connections.get()
+        current, total = conn.execute(
+            'SELECT COALESCE(SUM(version = ?), 0), COUNT(*) FROM candidates', (self.version,)
+        ).fetchone()
+        return {'candidates': current, 'stale': total - current, 'version': self.version}
@@ -0,0 +1,111 @@
+import fcntl
+import logging
+import os
+from contextlib import contextmanager
+
+import numpy as np
+
+from utils.sqlite_store import SQLiteConnections
+
+logger = logging.getLogger(__name__)
+
+
+class DFStore:
+    """Document frequencies of hashed features, shared on disk by every process.
+
+    ``df.i64`` is a raw int64 array of ``n_features + 1`` slots: how many
+    documents contain each hashed feature, then the number of documents.
+    Every process memory-maps the same file, so readers always see the
+    current counts without reloading and the pages are shared. Writers
+    take an ``fcntl`` lock; ``docs.sqlite3`` remembers which documents were
+    counted, so the same resume added twice (another upload, another
+    worker) is counted once.
+    """
+
+    def __init__(self, folder, n_features=2 ** 18):
+        self.folder = folder
+        self.n_features = int(n_features)
+        os.makedirs(folder, exist_ok=True)
+        self._connections = SQLiteConnections(os.path.join(folder, 'docs.sqlite3'))
+        self._connections.get().execute('CREATE TABLE IF NOT EXISTS docs (key TEXT PRIMARY KEY)')
+        path = os.path.join(folder, 'df.i64')
+        size = (self.n_features + 1) * 8
+        with self._write_lock():
+            if not os.path.exists(path):
+                with open(path, 'wb') as f:
+                    f.truncate(size)
+        if os.path.getsize(path) != size:
+            raise ValueError(f"{path} holds {os.path.getsize(path) // 8 - 1} features, "
+                             f"not {self.n_features}; use another folder or remove it")
+        self._counts = np.memmap(path, dtype=np.int64, mode='r+', shape=(self.n_features + 1,))
+
+    @contextmanager
+    def _write_lock(self):
+        with open(os.path.join(self.folder, '.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _bump(self, df, n_docs):
+        self._counts[:-1] += df
+        self._counts[-1] += n_docs
+        self._counts.flush()
+
+    @property
+    def n_docs(self):
+        return int(self._counts[-1])
+
+    # ------------------------------------------------------------------ #
+    #  PUBLIC API                                                         #
+    # ------------------------------------------------------------------ #
+    def add(self, keys, counts):
+        """Count the rows of ``counts`` (CSR, one per document) not counted before.
+
+        Returns how many documents were new.
+        """
+        if not len(keys):
+            return 0
+        conn = self._connections.get()
+        with self._write_lock():
+            known = set()
+            keys = list(keys)
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                known.update(row[0] for row in conn.execute(
+                    f'SELECT key FROM docs WHERE key IN ({",".join("?" * len(chunk))})', chunk))
+            fresh = [i for i, key in enumerate(keys) if key not in known]
+            # Duplicates within one call are counted once too
+            fresh = list({keys[i]: i for i in reversed(fresh)}.values())
+            if not fresh:
+                return 0
+            rows = counts[sorted(fresh)].tocsr()
+            rows.sum_duplicates()
+            df = np.bincount(rows.indices, minlength=self.n_features)
+            # The keys go in first and the counts are bumped before COMMIT:
+            # a failed insert leaves the counts alone, and counts bumped for
+            # a transaction that does not commit are taken back.
+            counted = False
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.executemany('INSERT INTO docs(key) VALUES (?)', [(keys[i],) for i in fresh])
+                counted = True
+                self._bump(df, len(fresh))
+                conn.execute('COMMIT')
+            except BaseException:
+                if counted:
+                    self._bump(-df, -len(fresh))
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                raise
+        return len(fresh)
+
+    def idf(self, columns):
+        """Smoothed IDF (as ``TfidfVectorizer``) of the given feature columns."""
+        n_docs = self._counts[-1]
+        return (np.log((1.0 + n_docs) / (1.0 + self._counts[columns])) + 1.0).astype(np.float32)
+
+    def stats(self):
+        return {'documents': self.n_docs, 'n_features': self.n_features,
+                'features_seen': int(np.count_nonzero(self._counts[:-1]))}
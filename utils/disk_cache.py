@@ -0,0 +1,154 @@
+import logging
+import pickle
+import sqlite3
+import time
+
+from utils.sqlite_store import SQLiteConnections
+
+logger = logging.getLogger(__name__)
+
+
+class DiskCache:
+    """Size-bounded LRU key/value store backed by a single SQLite file.
+
+    The file can be shared by several processes (e.g. gunicorn workers);
+    hit/miss counters are kept in the same file so they reflect all of them.
+    Entries written under a different ``version`` are dropped on open, which
+    is how callers invalidate the cache when the producer of the values
+    changes. With ``ttl`` (seconds) entries also expire that long after
+    they were written.
+    """
+
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, version='1', ttl=None):
+        self.path = path
+        self.max_bytes = int(max_bytes)
+        self.version = str(version)
+        self.ttl = ttl
+        self._connections = SQLiteConnections(path)
+
+        conn = self._connect()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            ' key TEXT PRIMARY KEY,'
+            ' version TEXT NOT NULL,'
+            ' value BLOB NOT NULL,'
+            ' size INTEGER NOT NULL,'
+            ' last_access REAL NOT NULL,'
+            ' created REAL NOT NULL DEFAULT 0)'
+        )
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(entries)')}
+        if 'created' not in columns:
+            # Files written before entries had a creation time
+            conn.execute('ALTER TABLE entries ADD COLUMN created REAL NOT NULL DEFAULT 0')
+        conn.execute('CREATE INDEX IF NOT EXISTS entries_lru ON entries(last_access)')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)'
+        )
+        conn.execute('DELETE FROM entries WHERE version != ?', (self.version,))
+
+    def _connect(self):
+        return self._connections.get()
+
+    def _bump(self, conn, name):
+        conn.execute(
+            'INSERT INTO stats(name, value) VALUES (?, 1) '
+            'ON CONFLICT(name) DO UPDATE SET value = value + 1',
+            (name,)
+        )
+
+    # ------------------------------------------------------------------ #
+    #  PUBLIC API                                                         #
+    # ------------------------------------------------------------------ #
+    def get(self, key, default=None):
+        """Return the cached value for ``key`` or ``default`` on a miss."""
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                'SELECT value, created FROM entries WHERE key = ? AND version = ?',
+                (key, self.version)
+            ).fetchone()
+            now = time.time()
+            if row is not None and self.ttl is not None and row[1] < now - self.ttl:
+                conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+                self._bump(conn, 'expirations')
+                row = None
+            if row is None:
+                self._bump(conn, 'misses')
+                return default
+            conn.execute('UPDATE entries SET last_access = ? WHERE key = ?', (now, key))
+            self._bump(conn, 'hits')
+            return pickle.loads(row[0])
+        except (sqlite3.Error, pickle.PickleError, EOFError) as e:
+            logger.warning("Cache read failed (%s): %s", self.path, e)
+            return default
+
+    def set(self, key, value):
+        """Store ``value`` under ``key`` and evict least recently used entries."""
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            return
+        try:
+            conn = self._connect()
+            now = time.time()
+            conn.execute(
+                'INSERT OR REPLACE INTO entries(key, version, value, size, last_access, created) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (key, self.version, blob, len(blob), now, now)
+            )
+            self._evict(conn)
+        except sqlite3.Error as e:
+            logger.warning("Cache write failed (%s): %s", self.path, e)
+
+    def _evict(self, conn):
+        if self.ttl is not None:
+            expired = conn.execute('DELETE FROM entries WHERE created < ?',
+                                   (time.time() - self.ttl,)).rowcount
+            if expired:
+                conn.execute(
+                    'INSERT INTO stats(name, value) VALUES (\'expirations\', ?) '
+                    'ON CONFLICT(name) DO UPDATE SET value = value + excluded.value',
+                    (expired,)
+                )
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        doomed = []
+        for key, size in conn.execute('SELECT key, size FROM entries ORDER BY last_access'):
+            doomed.append((key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+        conn.executemany('DELETE FROM entries WHERE key = ?', doomed)
+        conn.execute(
+            'INSERT INTO stats(name, value) VALUES (\'evictions\', ?) '
+            'ON CONFLICT(name) DO UPDATE SET value = value + excluded.value',
+            (len(doomed),)
+        )
+
+    def clear(self):
+        conn = self._connect()
+        conn.execute('DELETE FROM entries')
+        conn.execute('DELETE FROM stats')
+
+    def stats(self):
+        """Return hit/miss counters and current size as a plain dict."""
+        conn = self._connect()
+        counters = dict(conn.execute('SELECT name, value FROM stats').fetchall())
+        entries, size = conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries'
+        ).fetchone()
+        hits = counters.get('hits', 0)
+        misses = counters.get('misses', 0)
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'evictions': counters.get('evictions', 0),
+            'expirations': counters.get('expirations', 0),
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+            'entries': entries,
+            'bytes': size,
+            'max_bytes': self.max_bytes,
+            'ttl': self.ttl,
+            'version': self.version,
+        }
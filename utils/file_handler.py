@@ -1,91 +1,255 @@
+import hashlib
+import logging
 import os
+import re
+import zipfile
+from xml.etree import ElementTree
 from werkzeug.utils import secure_filename
 
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
 try:
     import PyPDF2
     PDF_AVAILABLE = True
 except ImportError:
     PDF_AVAILABLE = False
-    print("Warning: PyPDF2 not installed. PDF processing will be disabled.")
+    logger.warning("PyPDF2 not installed. PDF processing will be disabled.")
+
+# Bump whenever extraction output can change for the same input bytes;
+# cached texts produced by an older extractor are discarded.
+EXTRACTOR_VERSION = '3'
+
+# Extractors report failures as text; those must never be cached.
+_ERROR_PREFIXES = (
+    'Error processing',
+    'Unsupported file type',
+    'PDF processing not available',
+)
+
+# Separates pages in extracted PDF text; whitespace to the preprocessor and
+# skill matcher.
+PAGE_BREAK = '\f'
+
+
+# WordprocessingML and markup-compatibility namespaces, as ElementTree
+# spells qualified tags.
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_MC = '{http://schemas.openxmlformats.org/markup-compatibility/2006}'
+_DOCX_BREAKS = {_W + 'tab': '\t', _W + 'br': '\n', _W + 'cr': '\n'}
+_DOCX_CONTAINERS = {_W + 'body', _W + 'hdr'}
+_DOCX_HEADER = re.compile(r'word/header\d*\.xml')
+
+
+def iter_docx_part(stream):
+    """Yield the text of each paragraph in one WordprocessingML part.
+
+    Parses incrementally and clears every paragraph, and every top-level
+    block (paragraph or table) of the body, once it is read, so memory
+    stays around one block however long the document is. Table cells and
+    text boxes are paragraphs of their own and are yielded when they end;
+    a text box is yielded before the paragraph anchoring it. The legacy
+    VML copy of each text box (``mc:Fallback``) is skipped.
+    """
+    paragraphs = []   # text pieces of the open (possibly nested) paragraphs
+    fallback = 0      # depth inside mc:Fallback
+    container = None  # w:body / w:hdr, and its depth
+    container_depth = depth = 0
+    for event, elem in ElementTree.iterparse(stream, events=('start', 'end')):
+        tag = elem.tag
+        if event == 'start':
+            depth += 1
+            if tag == _MC + 'Fallback':
+                fallback += 1
+            elif tag == _W + 'p' and not fallback:
+                paragraphs.append([])
+            elif tag in _DOCX_CONTAINERS and container is None:
+                container, container_depth = elem, depth
+            continue
+
+        depth -= 1
+        if tag == _MC + 'Fallback':
+            fallback -= 1
+        elif fallback:
+            pass
+        elif tag == _W + 't':
+            if paragraphs and elem.text:
+                paragraphs[-1].append(elem.text)
+        elif tag in _DOCX_BREAKS:
+            if paragraphs:
+                paragraphs[-1].append(_DOCX_BREAKS[tag])
+        elif tag == _W + 'p':
+            yield ''.join(paragraphs.pop())
+            elem.clear()
+        if container is not None and depth == container_depth:
+            container.clear()
 
-try:
-    import docx
-    DOCX_AVAILABLE = True
-except ImportError:
-    DOCX_AVAILABLE = False
-    print("Warning: python-docx not installed. DOCX processing will be disabled.")
 
 class FileHandler:
-    def __init__(self, upload_folder='static/uploads'):
+    def __init__(self, upload_folder='static/uploads', cache=None, max_pages=None,
+                 max_chars=None, store=None):
+        """
+        ``max_pages``/``max_chars`` cap how much of each file is extracted
+        (None = all). With an ``UploadStore`` as ``store``, uploads are saved
+        content-addressed instead of under their own names.
+        """
         self.upload_folder = upload_folder
+        self.cache = cache
+        self.store = store
+        self.max_pages = max_pages
+        self.max_chars = max_chars
         self.allowed_extensions = {'pdf', 'docx', 'txt'}
         if not PDF_AVAILABLE:
             self.allowed_extensions.discard('pdf')
-            print("PDF support disabled - install PyPDF2 to enable")
-        if not DOCX_AVAILABLE:
-            self.allowed_extensions.discard('docx')
-            print("DOCX support disabled - install python-docx to enable")
+            logger.info("PDF support disabled - install PyPDF2 to enable")
         os.makedirs(upload_folder, exist_ok=True)
 
+    @property
+    def extraction_version(self):
+        """Changes whenever ``extract_text`` may return something else for the same file."""
+        return f'{EXTRACTOR_VERSION}:{self.max_pages}:{self.max_chars}'
+
     def allowed_file(self, filename):
         return '.' in filename and filename.rsplit('.', 1)[1].lower() in self.allowed_extensions
 
     def save_file(self, file):
         if file and self.allowed_file(file.filename):
+            if self.store is not None:
+                with metrics.span('save'):
+                    _, file_path, is_new = self.store.save(file.stream, file.filename)
+                metrics.UPLOADS.inc(result='new' if is_new else 'duplicate')
+                return file_path
             filename = secure_filename(file.filename)
             file_path = os.path.join(self.upload_folder, filename)
-            file.save(file_path)
+            with metrics.span('save'):
+                file.save(file_path)
             return file_path
         return None
 
+    def iter_pdf_pages(self, file_path):
+        """
+        Yield the text of each PDF page, parsing pages only as they are consumed.
+
+        Stops after ``max_pages``, so later pages are never parsed; errors
+        propagate.
+        """
+        with open(file_path, 'rb') as file:
+            reader = PyPDF2.PdfReader(file)
+            num_pages = len(reader.pages)
+            if self.max_pages is not None:
+                num_pages = min(num_pages, self.max_pages)
+            for i in range(num_pages):
+                yield reader.pages[i].extract_text() or ''
+
+    def iter_docx_paragraphs(self, file_path):
+        """Yield the text of each DOCX paragraph: headers first, then the body.
+
+        Reads ``word/header*.xml`` and ``word/document.xml`` straight from
+        the zip, decompressing and parsing as paragraphs are consumed, and
+        includes tables and text boxes. Errors propagate.
+        """
+        with zipfile.ZipFile(file_path) as archive:
+            names = archive.namelist()
+            headers = sorted((name for name in names if _DOCX_HEADER.fullmatch(name)),
+                             key=lambda name: (len(name), name))
+            for name in headers + ['word/document.xml']:
+                with archive.open(name) as part:
+                    yield from iter_docx_part(part)
+
+    def _join_capped(self, pieces, separator):
+        """Join pieces, stopping (and truncating) once ``max_chars`` is reached."""
+        if self.max_chars is None:
+            return separator.join(pieces)
+        parts = []
+        remaining = self.max_chars
+        for piece in pieces:
+            if len(piece) >= remaining:
+                parts.append(piece[:remaining])
+                break
+            parts.append(piece)
+            remaining -= len(piece) + len(separator)
+            if remaining <= 0:
+                break
+        return separator.join(parts)
+
     def extract_text_from_pdf(self, file_path):
         if not PDF_AVAILABLE:
             return "PDF processing not available. Please install PyPDF2."
-        text = ''
         try:
-            with open(file_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                for page in reader.pages:
-                    text_ = page.extract_text()
-                    if text_:
-                        text += text_
+            return self._join_capped(self.iter_pdf_pages(file_path), PAGE_BREAK)
         except Exception as e:
-            print(f"Error reading PDF: {e}")
+            logger.error("Error reading PDF %s: %s", file_path, e)
             return f"Error processing PDF: {str(e)}"
-        return text
 
     def extract_text_from_docx(self, file_path):
-        if not DOCX_AVAILABLE:
-            return "DOCX processing not available. Please install python-docx."
-        text = ''
         try:
-            doc = docx.Document(file_path)
-            for para in doc.paragraphs:
-                text += para.text + '\n'
+            return self._join_capped(self.iter_docx_paragraphs(file_path), '\n')
         except Exception as e:
-            print(f"Error reading DOCX: {e}")
+            logger.error("Error reading DOCX %s: %s", file_path, e)
             return f"Error processing DOCX: {str(e)}"
-        return text
 
     def extract_text_from_txt(self, file_path):
         text = ''
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
-                text = f.read()
+                text = f.read(self.max_chars)
         except UnicodeDecodeError:
             try:
                 with open(file_path, 'r', encoding='latin-1') as f:
-                    text = f.read()
+                    text = f.read(self.max_chars)
             except Exception as e:
-                print(f"Error reading TXT file: {e}")
+                logger.error("Error reading TXT file %s: %s", file_path, e)
                 return f"Error processing TXT: {str(e)}"
         except Exception as e:
-            print(f"Error reading TXT: {e}")
+            logger.error("Error reading TXT %s: %s", file_path, e)
             return f"Error processing TXT: {str(e)}"
         return text
 
+    @staticmethod
+    def file_digest(file_path, chunk_size=1024 * 1024):
+        """SHA-256 of the file contents, read in chunks."""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
     def extract_text(self, file_path):
+        """Extract text, reusing the cached result for identical file contents."""
+        if self.cache is None:
+            return self._extract_text(file_path)
+
         ext = os.path.splitext(file_path)[1].lower()
+        try:
+            # Stored uploads are named by their digest; no need to re-hash them
+            digest = self.store.digest_of(file_path) if self.store is not None else None
+            key = f"{ext}:{self.max_pages}:{self.max_chars}:{digest or self.file_digest(file_path)}"
+        except OSError as e:
+            logger.error("Error hashing file %s: %s", file_path, e)
+            return self._extract_text(file_path)
+
+        text = self.cache.get(key)
+        if text is not None:
+            metrics.EXTRACTION_CACHE.inc(result='hit')
+            return text
+        metrics.EXTRACTION_CACHE.inc(result='miss')
+
+        text = self._extract_text(file_path)
+        if text and not text.startswith(_ERROR_PREFIXES):
+            self.cache.set(key, text)
+        return text
+
+    def _extract_text(self, file_path):
+        ext = os.path.splitext(file_path)[1].lower()
+        try:
+            metrics.BYTES_PARSED.inc(os.path.getsize(file_path), format=ext.lstrip('.') or 'none')
+        except OSError:
+            pass
+        with metrics.span('extract'):
+            return self._dispatch(file_path, ext)
+
+    def _dispatch(self, file_path, ext):
         if ext == '.pdf':
             return self.extract_text_from_pdf(file_path)
         elif ext == '.docx':
@@ -0,0 +1,182 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from utils import metrics
+
+# Per-process state for pool workers, populated by _init_worker.
+_worker_file_handler = None
+_worker_resume_processor = None
+_worker_min_text_length = 50
+_worker_candidates = None
+
+
+def _init_worker(file_handler, resume_processor, min_text_length, candidates):
+    global _worker_file_handler, _worker_resume_processor, _worker_min_text_length
+    global _worker_candidates
+    _worker_file_handler = file_handler
+    _worker_resume_processor = resume_processor
+    _worker_min_text_length = min_text_length
+    _worker_candidates = candidates
+    # Metrics travel back with each result rather than through snapshot files
+    metrics.REGISTRY.detach()
+
+
+def _pool_context():
+    # Workers are never forked from the caller: a web worker already runs
+    # threads (request threads, the job queue), and a forked child could
+    # inherit locks they held. The forkserver starts each one clean. Like
+    # spawn, workers import the caller's __main__ module, so scripts keep
+    # their entry point under ``if __name__ == '__main__'``.
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
+
+def _ingest_one(job):
+    item, digest = job
+    result = ingest_file(item, _worker_file_handler, _worker_resume_processor,
+                         _worker_min_text_length, candidates=_worker_candidates, digest=digest)
+    result['metrics'] = metrics.REGISTRY.drain()
+    return result
+
+
+def ingest_file(item, file_handler, resume_processor, min_text_length=50, candidates=None,
+                digest=None):
+    """Extract and process one saved upload.
+
+    ``item`` is a ``(filename, file_path)`` pair. Returns a dict with
+    ``filename``, ``processed`` (the ``process_resume`` output, or None) and
+    ``error``/``category`` describing why the file was skipped.
+
+    Ranking never reads ``original_text``, so it is dropped from
+    ``processed`` here; with a ``CandidateStore`` and the file's ``digest``
+    it is first spilled to the store, compressed.
+    """
+    filename, file_path = item
+    result = {'filename': filename, 'processed': None, 'error': None, 'category': None}
+
+    resume_text = file_handler.extract_text(file_path)
+    if not resume_text or len(resume_text.strip()) < min_text_length:
+        result['error'] = f'Could not extract sufficient text from: {filename}'
+        result['category'] = 'warning'
+        metrics.FILES.inc(outcome='skipped')
+        return result
+
+    try:
+        processed = resume_processor.process_resume(resume_text)
+        processed['filename'] = filename
+        if digest:
+            processed['digest'] = digest
+            if candidates is not None:
+                candidates.put(digest, processed)
+        del processed['original_text']
+        result['processed'] = processed
+    except Exception as e:
+        result['error'] = f'Error processing {filename}: {str(e)}'
+        result['category'] = 'warning'
+    metrics.FILES.inc(outcome='skipped' if result['error'] else 'ok')
+    return result
+
+
+class IngestionPipeline:
+    """Extract and preprocess saved uploads, optionally on a process pool.
+
+    Text extraction (PyPDF2 / DOCX XML parsing) and ``ResumeProcessor.process_resume``
+    are CPU bound, so they run in worker processes. Results always come back
+    in input order, and per-file failures are reported in the result instead
+    of being raised.
+
+    With a ``CandidateStore`` as ``candidates``, files whose contents were
+    processed before are served from the store without being opened, and
+    newly processed ones are added to it; their ``processed`` dicts then
+    carry the file's ``digest``.
+    """
+
+    def __init__(self, file_handler, resume_processor, workers=None, min_text_length=50,
+                 candidates=None):
+        self.file_handler = file_handler
+        self.resume_processor = resume_processor
+        self.candidates = candidates
+        self.workers = (os.cpu_count() or 1) if workers is None else int(workers)
+        self.min_text_length = min_text_length
+        self._pool = None
+        self._pool_pid = None
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self):
+        # Concurrent requests in a threaded worker must not each start a pool
+        with self._pool_lock:
+            # A pool inherited through fork (e.g. gunicorn preload) is unusable.
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=_pool_context(),
+                    initializer=_init_worker,
+                    initargs=(self.file_handler, self.resume_processor, self.min_text_length,
+                              self.candidates),
+                )
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def run(self, items):
+        """Ingest ``(filename, file_path)`` pairs and return results in order."""
+        return list(self.iter_run(items))
+
+    def iter_run(self, items):
+        """Like ``run`` but yields each result, in order, as soon as it is ready."""
+        items = list(items)
+        if self.candidates is None:
+            yield from self._ingest([(item, None) for item in items])
+            return
+
+        digests = [self.digest(path) for _, path in items]
+        known = self.candidates.get_many([digest for digest in digests if digest])
+        fresh = self._ingest([(item, digest) for item, digest in zip(items, digests)
+                              if digest not in known])
+        for (filename, _), digest in zip(items, digests):
+            stored = known.get(digest)
+            if stored is not None:
+                metrics.FILES.inc(outcome='stored')
+                yield {'filename': filename, 'processed': dict(stored, filename=filename),
+                       'error': None, 'category': None}
+                continue
+            yield next(fresh)
+
+    def _ingest(self, jobs):
+        """Iterator of ``ingest_file`` results for ``(item, digest)`` pairs.
+
+        The pool starts work right away.
+        """
+        if self.workers <= 1 or len(jobs) < 2:
+            return (ingest_file(item, self.file_handler, self.resume_processor,
+                                self.min_text_length, candidates=self.candidates, digest=digest)
+                    for item, digest in jobs)
+
+        chunksize = max(1, len(jobs) // (self.workers * 4))
+        results = self._get_pool().map(_ingest_one, jobs, chunksize=chunksize)
+        return (self._merge_metrics(result) for result in results)
+
+    @staticmethod
+    def _merge_metrics(result):
+        metrics.REGISTRY.merge(result.pop('metrics'))
+        return result
+
+    def digest(self, file_path):
+        """Content digest of a saved file (free for stored uploads), or None."""
+        store = self.file_handler.store
+        digest = store.digest_of(file_path) if store is not None else None
+        if digest is None:
+            try:
+                digest = self.file_handler.file_digest(file_path)
+            except OSError:
+                return None
+        return digest
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool is not None and self._pool_pid == os.getpid():
+                self._pool.shutdown()
+            self._pool = None
+            self._pool_pid = None
@@ -0,0 +1,210 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.sqlite_store import SQLiteConnections
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """Handle passed to a job function to report progress."""
+
+    def __init__(self, queue, job_id):
+        self.queue = queue
+        self.id = job_id
+
+    def file_done(self, filename, error=None, data=None):
+        """Record one processed input; ``error`` marks it as skipped."""
+        self.queue._record_event(self.id, filename, error, data)
+
+
+class JobQueue:
+    """Background jobs run by a local thread pool, tracked in SQLite.
+
+    Jobs execute in the process that submitted them, but their status,
+    per-file progress and final result live in a SQLite file, so any
+    gunicorn worker can answer progress and result requests. There is no
+    external broker: while a process has unfinished jobs it refreshes their
+    ``heartbeat`` every ``heartbeat_interval`` seconds, and a queued or
+    running job whose heartbeat is older than ``stale_after`` is reported as
+    failed. Liveness is judged from the shared file alone, so it holds when
+    the submitting process runs on another host or container.
+    """
+
+    def __init__(self, path, workers=2, retention_seconds=7 * 24 * 3600,
+                 heartbeat_interval=10.0, stale_after=60.0):
+        self.path = path
+        self.workers = workers
+        self.retention_seconds = retention_seconds
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self._connections = SQLiteConnections(path)
+        self._executor = None
+        self._executor_pid = None
+        self._active = set()
+        self._lock = threading.Lock()
+
+        conn = self._connections.get()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS jobs ('
+            ' id TEXT PRIMARY KEY,'
+            ' kind TEXT NOT NULL,'
+            ' status TEXT NOT NULL,'
+            ' total INTEGER NOT NULL,'
+            ' processed INTEGER NOT NULL DEFAULT 0,'
+            ' failed INTEGER NOT NULL DEFAULT 0,'
+            ' pid INTEGER,'
+            ' created REAL NOT NULL,'
+            ' updated REAL NOT NULL,'
+            ' error TEXT,'
+            ' result TEXT)'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS job_events ('
+            ' job_id TEXT NOT NULL,'
+            ' seq INTEGER NOT NULL,'
+            ' filename TEXT,'
+            ' ok INTEGER NOT NULL,'
+            ' message TEXT,'
+            ' data TEXT,'
+            ' PRIMARY KEY (job_id, seq))'
+        )
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(jobs)')}
+        if 'heartbeat' not in columns:
+            # Files written before heartbeats were added: their unfinished
+            # jobs have a NULL heartbeat and are reported as failed.
+            conn.execute('ALTER TABLE jobs ADD COLUMN heartbeat REAL')
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix='job')
+                self._executor_pid = os.getpid()
+                self._active = set()
+                threading.Thread(target=self._beat, name='job-heartbeat',
+                                 daemon=True).start()
+            return self._executor
+
+    # ------------------------------------------------------------------ #
+    #  PUBLIC API                                                         #
+    # ------------------------------------------------------------------ #
+    def submit(self, fn, total, *args, kind='ranking'):
+        """Queue ``fn(job, *args)`` and return the new job id immediately.
+
+        Whatever ``fn`` returns (JSON-serialisable) becomes the job result;
+        an exception marks the job as failed.
+        """
+        self._prune()
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        executor = self._get_executor()
+        self._connections.get().execute(
+            'INSERT INTO jobs(id, kind, status, total, pid, created, updated, heartbeat) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (job_id, kind, 'queued', int(total), os.getpid(), now, now, now)
+        )
+        with self._lock:
+            self._active.add(job_id)
+        executor.submit(self._run, job_id, fn, args)
+        return job_id
+
+    def get(self, job_id):
+        """Job status as a dict, or None for an unknown id."""
+        row = self._connections.get().execute(
+            'SELECT id, kind, status, total, processed, failed, created, updated, '
+            'error, result, heartbeat FROM jobs WHERE id = ?', (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(('id', 'kind', 'status', 'total', 'processed', 'failed',
+                        'created', 'updated', 'error', 'result', 'heartbeat'), row))
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        heartbeat = job.pop('heartbeat')
+        if (job['status'] in ('queued', 'running')
+                and (heartbeat is None or time.time() - heartbeat > self.stale_after)):
+            job['status'] = 'failed'
+            job['error'] = 'The worker running this job stopped before it finished.'
+        return job
+
+    def events(self, job_id, after=0, limit=500):
+        """Per-file progress records with ``seq`` greater than ``after``."""
+        rows = self._connections.get().execute(
+            'SELECT seq, filename, ok, message, data FROM job_events '
+            'WHERE job_id = ? AND seq > ? ORDER BY seq LIMIT ?',
+            (job_id, int(after), int(limit))
+        ).fetchall()
+        return [{'seq': seq, 'filename': filename, 'ok': bool(ok), 'message': message,
+                 'data': json.loads(data) if data else None}
+                for seq, filename, ok, message, data in rows]
+
+    # ------------------------------------------------------------------ #
+    #  Internals                                                          #
+    # ------------------------------------------------------------------ #
+    def _run(self, job_id, fn, args):
+        conn = self._connections.get()
+        now = time.time()
+        conn.execute('UPDATE jobs SET status = ?, updated = ?, heartbeat = ? WHERE id = ?',
+                     ('running', now, now, job_id))
+        try:
+            result = fn(Job(self, job_id), *args)
+        except Exception as e:
+            logger.exception("Job %s failed", job_id)
+            conn.execute('UPDATE jobs SET status = ?, error = ?, updated = ? WHERE id = ?',
+                         ('failed', str(e), time.time(), job_id))
+            return
+        finally:
+            with self._lock:
+                self._active.discard(job_id)
+        conn.execute('UPDATE jobs SET status = ?, result = ?, updated = ? WHERE id = ?',
+                     ('done', json.dumps(result), time.time(), job_id))
+
+    def _beat(self):
+        """Refresh the heartbeat of this process's unfinished jobs."""
+        pid = os.getpid()
+        while self._executor_pid == pid:
+            time.sleep(self.heartbeat_interval)
+            with self._lock:
+                active = list(self._active)
+            if not active:
+                continue
+            try:
+                self._connections.get().execute(
+                    f"UPDATE jobs SET heartbeat = ? WHERE id IN ({','.join('?' * len(active))})",
+                    (time.time(), *active)
+                )
+            except Exception as e:
+                logger.error("Could not refresh job heartbeats: %s", e)
+
+    def _record_event(self, job_id, filename, error, data):
+        conn = self._connections.get()
+        now = time.time()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            seq = conn.execute(
+                'SELECT processed + 1 FROM jobs WHERE id = ?', (job_id,)
+            ).fetchone()[0]
+            conn.execute(
+                'INSERT INTO job_events(job_id, seq, filename, ok, message, data) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (job_id, seq, filename, int(error is None), error,
+                 json.dumps(data) if data is not None else None)
+            )
+            conn.execute(
+                'UPDATE jobs SET processed = processed + 1, failed = failed + ?, updated = ?, '
+                'heartbeat = ? WHERE id = ?',
+                (int(error is not None), now, now, job_id)
+            )
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_seconds
+        conn = self._connections.get()
+        conn.execute('DELETE FROM job_events WHERE job_id IN '
+                     '(SELECT id FROM jobs WHERE updated < ?)', (cutoff,))
+        conn.execute('DELETE FROM jobs WHERE updated < ?', (cutoff,))
+
@@ -0,0 +1,319 @@
+"""In-process counters, histograms and timing spans, rendered for Prometheus.
+
+Metrics are plain Python objects updated under a lock; nothing leaves the
+process until ``/metrics`` is scraped. With several gunicorn workers each
+worker dumps a JSON snapshot to a shared directory (see ``configure``) and
+the scraped worker merges them, so the endpoint reports the whole server.
+Ingestion pool processes send their increments back with each result
+instead (``drain``/``merge``).
+
+Rates such as files per second come from the counters on the Prometheus
+side, e.g. ``rate(resume_ranker_files_total[5m])``.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0, 60.0)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+
+    def _key(self, labels):
+        try:
+            if len(labels) == len(self.labelnames):
+                return tuple([str(labels[name]) for name in self.labelnames])
+        except KeyError:
+            pass
+        raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+
+    def describe(self):
+        return {'type': self.kind, 'help': self.documentation, 'labels': list(self.labelnames)}
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.registry._lock:
+            self.registry._check_pid()
+            self.values[key] = self.values.get(key, 0) + amount
+        self.registry._maybe_dump()
+
+    def _merge(self, key, value):
+        self.values[key] = self.values.get(key, 0) + value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.registry._lock:
+            self.registry._check_pid()
+            state = self.values.get(key)
+            if state is None:
+                # per-bucket (non-cumulative) counts, +Inf last; then sum, count
+                state = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+        self.registry._maybe_dump()
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def describe(self):
+        description = super().describe()
+        description['buckets'] = list(self.buckets)
+        return description
+
+    def _merge(self, key, value):
+        state = self.values.get(key)
+        if state is None:
+            self.values[key] = [list(value[0]), value[1], value[2]]
+            return
+        state[0] = [a + b for a, b in zip(state[0], value[0])]
+        state[1] += value[1]
+        state[2] += value[2]
+
+
+class Registry:
+    """A set of metrics plus the snapshot/merge plumbing between processes."""
+
+    def __init__(self):
+        self.metrics = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._directory = None
+        self._interval = 5.0
+        self._last_dump = 0.0
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def _check_pid(self):
+        # A forked child (gunicorn worker, pool process) starts from zero
+        # rather than re-reporting what its parent had counted.
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._last_dump = time.monotonic()
+            for metric in self.metrics.values():
+                metric.values = {}
+
+    def reset(self):
+        with self._lock:
+            for metric in self.metrics.values():
+                metric.values = {}
+
+    # ------------------------------------------------------------------ #
+    #  Snapshots                                                         #
+    # ------------------------------------------------------------------ #
+    def snapshot(self):
+        """JSON-serialisable copy of every metric's current values."""
+        with self._lock:
+            self._check_pid()
+            return self._snapshot()
+
+    def _snapshot(self):
+        return {name: dict(metric.describe(), values=[
+                    [list(key), value] for key, value in metric.values.items()])
+                for name, metric in self.metrics.items()}
+
+    def drain(self):
+        """Snapshot and reset: the increments since the last drain."""
+        with self._lock:
+            self._check_pid()
+            snapshot = self._snapshot()
+            for metric in self.metrics.values():
+                metric.values = {}
+        return snapshot
+
+    def merge(self, snapshot):
+        """Add the values of a snapshot (e.g. from ``drain`` in another process)."""
+        with self._lock:
+            self._check_pid()
+            for name, data in snapshot.items():
+                metric = self.metrics.get(name)
+                if metric is None:
+                    continue
+                for key, value in data['values']:
+                    metric._merge(tuple(key), value)
+
+    # ------------------------------------------------------------------ #
+    #  Sharing between web workers                                       #
+    # ------------------------------------------------------------------ #
+    def configure(self, directory, interval=5.0):
+        """Dump snapshots to ``directory`` every ``interval`` seconds (and at exit).
+
+        Snapshots left by processes that no longer exist are removed, so a
+        restart begins counting from zero.
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            pid = name[:-len('.json')] if name.endswith('.json') else ''
+            if pid.isdigit() and int(pid) != os.getpid() and not _pid_alive(int(pid)):
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError:
+                    pass
+        self._directory = directory
+        self._interval = interval
+        self._last_dump = time.monotonic()
+        atexit.register(self.dump)
+
+    def detach(self):
+        """Stop dumping snapshots, e.g. in a pool process that reports via ``drain``."""
+        self._directory = None
+
+    def _maybe_dump(self):
+        if self._directory and time.monotonic() - self._last_dump >= self._interval:
+            self.dump()
+
+    def dump(self):
+        if not self._directory:
+            return
+        self._last_dump = time.monotonic()
+        path = os.path.join(self._directory, f'{os.getpid()}.json')
+        try:
+            tmp = f'{path}.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.snapshot(), f)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning("Could not write metrics snapshot %s: %s", path, e)
+
+    def collect(self):
+        """Merged snapshot of this process and every other dumped process."""
+        merged = Registry()
+        for name, metric in self.metrics.items():
+            if isinstance(metric, Histogram):
+                merged.histogram(name, metric.documentation, metric.labelnames, metric.buckets)
+            else:
+                merged.counter(name, metric.documentation, metric.labelnames)
+        merged.merge(self.snapshot())
+        if self._directory:
+            own = f'{os.getpid()}.json'
+            for name in os.listdir(self._directory):
+                if not name.endswith('.json') or name == own:
+                    continue
+                try:
+                    with open(os.path.join(self._directory, name), encoding='utf-8') as f:
+                        merged.merge(json.load(f))
+                except (OSError, ValueError):
+                    continue
+        return merged
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for name, metric in self.collect().metrics.items():
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            for key, value in sorted(metric.values.items()):
+                labels = list(zip(metric.labelnames, key))
+                if metric.kind == 'counter':
+                    lines.append(f'{name}{_labels(labels)} {_number(value)}')
+                    continue
+                counts, total, count = value
+                cumulative = 0
+                for bound, bucket_count in zip(metric.buckets + (float('inf'),), counts):
+                    cumulative += bucket_count
+                    le = '+Inf' if bound == float('inf') else _number(bound)
+                    lines.append(f'{name}_bucket{_labels(labels + [("le", le)])} {cumulative}')
+                lines.append(f'{name}_sum{_labels(labels)} {_number(total)}')
+                lines.append(f'{name}_count{_labels(labels)} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'resume_ranker_stage_seconds', 'Time spent in each pipeline stage.', ['stage'])
+FILES = REGISTRY.counter(
+    'resume_ranker_files_total', 'Uploaded files ingested, by outcome.', ['outcome'])
+BYTES_PARSED = REGISTRY.counter(
+    'resume_ranker_bytes_parsed_total', 'Bytes of uploaded files run through an extractor.',
+    ['format'])
+UPLOADS = REGISTRY.counter(
+    'resume_ranker_uploads_total', 'Uploads saved, by whether the content was new.', ['result'])
+EXTRACTION_CACHE = REGISTRY.counter(
+    'resume_ranker_extraction_cache_requests_total', 'Extraction cache lookups.', ['result'])
+RESUMES_SCORED = REGISTRY.counter(
+    'resume_ranker_resumes_scored_total', 'Resume/job-description pairs scored.')
+HTTP_REQUESTS = REGISTRY.counter(
+    'resume_ranker_http_requests_total', 'HTTP requests served.',
+    ['endpoint', 'method', 'status'])
+HTTP_SECONDS = REGISTRY.histogram(
+    'resume_ranker_http_request_seconds', 'HTTP request latency.', ['endpoint'])
+
+
+@contextmanager
+def span(stage):
+    """Time a block as one observation of ``resume_ranker_stage_seconds``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        logger.debug("%s took %.2f ms", stage, elapsed * 1000)
@@ -0,0 +1,51 @@
+import hashlib
+import json
+import re
+
+import numpy as np
+
+from utils.disk_cache import DiskCache
+
+
+class RankingCache:
+    """Finished rankings keyed by job description, resume set and matcher config.
+
+    A thin layer over ``DiskCache``: one SQLite file shared by all gunicorn
+    workers, LRU-bounded by size and with entries expiring after ``ttl``
+    seconds. Values are ``(sims, meta)`` in the resume order of the key, so
+    a hit can be stored and rendered exactly like a fresh ranking.
+    """
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024, ttl=3600, version='1'):
+        self.cache = DiskCache(path, max_bytes=max_bytes, version=version, ttl=ttl)
+
+    @staticmethod
+    def normalize(job_description):
+        """Case and whitespace never change a ranking (the matcher lowercases)."""
+        return re.sub(r'\s+', ' ', job_description).strip().lower()
+
+    @classmethod
+    def key(cls, job_description, resumes, config):
+        """Cache key for ``(filename, content digest)`` pairs in ranking order."""
+        digest = hashlib.sha256()
+        digest.update(hashlib.sha256(cls.normalize(job_description).encode('utf-8')).digest())
+        digest.update(json.dumps(list(resumes)).encode('utf-8'))
+        digest.update(json.dumps(config, sort_keys=True, default=str).encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """``(sims, meta)`` or None on a miss."""
+        return self.cache.get(key)
+
+    def set(self, key, sims, resumes_data):
+        meta = [{'filename': res.get('filename'), 'skills': res.get('skills', []),
+                 'skill_count': res.get('skill_count', 0),
+                 **({'duplicates': res['duplicates']} if res.get('duplicates') else {})}
+                for res in resumes_data]
+        self.cache.set(key, (np.asarray(sims, dtype=np.float32), meta))
+
+    def clear(self):
+        self.cache.clear()
+
+    def stats(self):
+        return self.cache.stats()
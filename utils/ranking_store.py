@@ -0,0 +1,69 @@
+import json
+import os
+import uuid
+
+import numpy as np
+
+
+class RankingStore:
+    """Keep computed rankings on disk so results can be paged later.
+
+    A ranking is the similarity vector (``<id>.npy``) plus per-resume metadata
+    and the job description (``<id>.json``). Only the ``max_rankings`` most
+    recent rankings are kept.
+    """
+
+    def __init__(self, folder='data/rankings', max_rankings=200):
+        self.folder = folder
+        self.max_rankings = max_rankings
+        os.makedirs(folder, exist_ok=True)
+
+    def _path(self, ranking_id, ext):
+        return os.path.join(self.folder, f'{ranking_id}{ext}')
+
+    def save(self, sims, metas, job_description, ids=None, extra=None):
+        """Persist a ranking and return its id."""
+        ranking_id = uuid.uuid4().hex
+        np.save(self._path(ranking_id, '.npy'), np.asarray(sims, dtype=np.float32))
+        payload = {
+            'job_description': job_description,
+            'ids': ids,
+            'meta': [
+                {'filename': m.get('filename'), 'skills': m.get('skills', []),
+                 'skill_count': m.get('skill_count', 0),
+                 **({'duplicates': m['duplicates']} if m.get('duplicates') else {})}
+                for m in metas
+            ],
+        }
+        payload.update(extra or {})
+        tmp = self._path(ranking_id, '.json.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(payload, f)
+        os.replace(tmp, self._path(ranking_id, '.json'))
+        self._prune()
+        return ranking_id
+
+    def load(self, ranking_id):
+        """Return ``(sims, payload)`` or ``None`` if the ranking is unknown."""
+        if not ranking_id.isalnum():
+            return None
+        try:
+            with open(self._path(ranking_id, '.json'), encoding='utf-8') as f:
+                payload = json.load(f)
+            sims = np.load(self._path(ranking_id, '.npy'))
+        except (OSError, ValueError):
+            return None
+        return sims, payload
+
+    def _prune(self):
+        saved = [f for f in os.listdir(self.folder) if f.endswith('.json')]
+        if len(saved) <= self.max_rankings:
+            return
+        saved.sort(key=lambda f: os.path.getmtime(os.path.join(self.folder, f)))
+        for name in saved[:len(saved) - self.max_rankings]:
+            ranking_id = name[:-len('.json')]
+            for ext in ('.json', '.npy'):
+                try:
+                    os.remove(self._path(ranking_id, ext))
+                except OSError:
+                    pass
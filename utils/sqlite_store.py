@@ -0,0 +1,37 @@
+import os
+import sqlite3
+import threading
+
+
+class SQLiteConnections:
+    """One SQLite connection per thread and per process for a database file.
+
+    Connections are never shared across threads, and a process forked from
+    the owner (gunicorn workers, pool processes) opens its own instead of
+    reusing an inherited one. Pickling drops the open connections.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def get(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def __getstate__(self):
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.path = state['path']
+        self._local = threading.local()
@@ -1,41 +1,169 @@
+import importlib.util
+import logging
 import re
 import string
+import threading
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# NLTK takes over a second and ~100MB to import, so it is only imported on
+# first use (or once in the gunicorn master, see warm_up in app.py). Its data
+# is never downloaded at runtime: install it at build time with
+#     python -m nltk.downloader punkt stopwords
+NLTK_AVAILABLE = importlib.util.find_spec('nltk') is not None
+if not NLTK_AVAILABLE:
+    logger.warning("NLTK not available, using basic preprocessing")
+
+BASIC_STOP_WORDS = frozenset(
+    ['the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is',
+     'are', 'was', 'were'])
+
+# Compiled once instead of on every call
+_CLEAN_RE = re.compile(r'[^\w\s+#\.]')
+# The 'regex' tokenizer is word_tokenize for clean_text output, minus most of
+# its cost. Sentences still come from punkt, but after cleaning only word
+# characters, single spaces, '+', '#' and '.' are left, and of the ~25
+# substitutions NLTKWordTokenizer runs per sentence only these can match:
+# the sentence-final period, runs of periods, '#', and a few contractions.
+_ELLIPSIS_RE = re.compile(r'\.{2,}')
+_SYMBOL_RE = re.compile(r'[;@#$%&]')
+_CONTRACTION_HINT_RE = re.compile(r'(?i)cannot|gimme|gonna|gotta|lemme|wanna')
+_CONTRACTION_RES = [re.compile(pattern) for pattern in (
+    r"(?i)\b(can)(?#X)(not)\b", r"(?i)\b(gim)(?#X)(me)\b", r"(?i)\b(gon)(?#X)(na)\b",
+    r"(?i)\b(got)(?#X)(ta)\b", r"(?i)\b(lem)(?#X)(me)\b", r"(?i)\b(wan)(?#X)(na)(?=\s)")]
+
+# Stems shared by every TextPreprocessor in the process. Resume vocabulary is
+# small and repetitive, so most tokens are served from here.
+STEM_CACHE_SIZE = 100_000
+
+_nltk_lock = threading.Lock()
+_nltk_resources = None
+
+
+def load_nltk():
+    """
+    Import NLTK and resolve its data from local paths only, once per process.
+
+    Returns a dict with ``stop_words`` (set, or None if the corpus is
+    missing), ``word_tokenize`` and ``sent_tokenize`` (None if punkt is
+    missing) and ``stemmer``.
+    """
+    global _nltk_resources
+    if _nltk_resources is not None:
+        return _nltk_resources
+    with _nltk_lock:
+        if _nltk_resources is not None:
+            return _nltk_resources
+        resources = {'stop_words': None, 'word_tokenize': None, 'sent_tokenize': None,
+                     'stemmer': None}
+        if NLTK_AVAILABLE:
+            import nltk
+            from nltk.stem import PorterStemmer
 
-try:
-    import nltk
-    from nltk.corpus import stopwords
-    from nltk.tokenize import word_tokenize
-    from nltk.stem import PorterStemmer
-
-    # Download required NLTK data
-    try:
-        nltk.download('punkt', quiet=True)
-        nltk.download('stopwords', quiet=True)
-    except:
-        pass
-
-    NLTK_AVAILABLE = True
-except ImportError:
-    NLTK_AVAILABLE = False
-    print("NLTK not available, using basic preprocessing")
+            try:
+                nltk.data.find('corpora/stopwords')
+                from nltk.corpus import stopwords
+                resources['stop_words'] = set(stopwords.words('english'))
+                resources['stemmer'] = PorterStemmer()
+            except LookupError:
+                logger.warning("NLTK stopwords not installed, using basic stop words "
+                               "without stemming")
+            try:
+                nltk.data.find('tokenizers/punkt')
+                from nltk.tokenize import sent_tokenize, word_tokenize
+                resources['word_tokenize'] = word_tokenize
+                resources['sent_tokenize'] = sent_tokenize
+            except LookupError:
+                logger.warning("NLTK punkt not installed, tokenizing on whitespace")
+        _nltk_resources = resources
+        return resources
+
+
+@lru_cache(maxsize=STEM_CACHE_SIZE)
+def _cached_stem(token):
+    return load_nltk()['stemmer'].stem(token)
+
+
+def _sentence_tokens(sentence):
+    """NLTKWordTokenizer.tokenize for one sentence of cleaned text."""
+    sentence = sentence.rstrip()
+    if sentence.endswith('.') and len(sentence) > 1 and sentence[-2] != '.':
+        sentence = sentence[:-1] + ' .'
+    if '..' in sentence:
+        sentence = _ELLIPSIS_RE.sub(r' \g<0> ', sentence)
+    if '#' in sentence:
+        sentence = _SYMBOL_RE.sub(r' \g<0> ', sentence)
+    if _CONTRACTION_HINT_RE.search(sentence):
+        sentence = f' {sentence} '
+        for regexp in _CONTRACTION_RES:
+            sentence = regexp.sub(r' \1 \2 ', sentence)
+    return sentence.split()
 
 
 class TextPreprocessor:
-    def __init__(self):
-        if NLTK_AVAILABLE:
-            try:
-                self.stop_words = set(stopwords.words('english'))
-                self.stemmer = PorterStemmer()
-            except:
-                self.stop_words = set(
-                    ['the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is',
-                     'are', 'was', 'were'])
-                self.stemmer = None
+    def __init__(self, tokenizer='nltk'):
+        """``tokenizer`` is 'nltk' (word_tokenize) or 'regex' (same tokens, faster)"""
+        if tokenizer not in ('nltk', 'regex'):
+            raise ValueError(f"Unknown tokenizer: {tokenizer}")
+        self.tokenizer = tokenizer
+        # Resolved from load_nltk() on first use
+        self._stop_words = None
+        self._stemmer = None
+        self._word_tokenize = None
+        self._sent_tokenize = None
+        self._loaded = False
+
+    def _load(self):
+        resources = load_nltk()
+        if resources['stop_words'] is not None:
+            self._stop_words = resources['stop_words']
+            self._stemmer = resources['stemmer']
         else:
-            self.stop_words = set(
-                ['the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are',
-                 'was', 'were'])
-            self.stemmer = None
+            self._stop_words = set(BASIC_STOP_WORDS)
+        self._word_tokenize = resources['word_tokenize']
+        self._sent_tokenize = resources['sent_tokenize']
+        self._loaded = True
+
+    @property
+    def version(self):
+        """Which NLTK resources shape the output (stemming, punkt tokenization)"""
+        if not self._loaded:
+            self._load()
+        return (('stem' if self._stemmer is not None else 'basic') + '-'
+                + ('punkt' if self._word_tokenize is not None else 'split'))
+
+    def __getstate__(self):
+        # NLTK resources are re-resolved (and the stem cache reused) in the
+        # receiving process, e.g. an ingestion pool worker.
+        state = self.__dict__.copy()
+        state.update(_stop_words=None, _stemmer=None, _word_tokenize=None,
+                     _sent_tokenize=None, _loaded=False)
+        return state
+
+    @property
+    def stop_words(self):
+        if not self._loaded:
+            self._load()
+        return self._stop_words
+
+    @stop_words.setter
+    def stop_words(self, value):
+        if not self._loaded:
+            self._load()
+        self._stop_words = value
+
+    @property
+    def stemmer(self):
+        if not self._loaded:
+            self._load()
+        return self._stemmer
+
+    @stemmer.setter
+    def stemmer(self, value):
+        if not self._loaded:
+            self._load()
+        self._stemmer = value
 
     def clean_text(self, text):
         """Clean and preprocess text data"""
@@ -46,7 +174,7 @@ class TextPreprocessor:
         text = text.lower()
 
         # Remove special characters but keep + and # (for C++, C#, etc.)
-        text = re.sub(r'[^\w\s+#\.]', ' ', text)
+        text = _CLEAN_RE.sub(' ', text)
 
         # Remove extra whitespaces
         text = ' '.join(text.split())
@@ -55,26 +183,38 @@ class TextPreprocessor:
 
     def tokenize_and_remove_stopwords(self, text):
         """Tokenize text and remove stopwords"""
-        if NLTK_AVAILABLE:
+        if not self._loaded:
+            self._load()
+        if self.tokenizer == 'regex' and self._sent_tokenize is not None:
+            try:
+                tokens = [token for sentence in self._sent_tokenize(text)
+                          for token in _sentence_tokens(sentence)]
+            except:
+                tokens = text.split()
+        elif self.tokenizer == 'nltk' and self._word_tokenize is not None:
             try:
-                tokens = word_tokenize(text)
+                tokens = self._word_tokenize(text)
             except:
                 tokens = text.split()
         else:
             tokens = text.split()
 
         # Remove stopwords and very short tokens
+        stop_words = self.stop_words
         filtered_tokens = [
             token for token in tokens
-            if token not in self.stop_words and len(token) > 1
+            if len(token) > 1 and token not in stop_words
         ]
 
         return filtered_tokens
 
     def stem_tokens(self, tokens):
         """Apply stemming to tokens"""
-        if self.stemmer and NLTK_AVAILABLE:
-            return [self.stemmer.stem(token) for token in tokens]
+        stemmer = self.stemmer
+        if stemmer:
+            if stemmer is load_nltk()['stemmer']:
+                return [_cached_stem(token) for token in tokens]
+            return [stemmer.stem(token) for token in tokens]
         return tokens
 
     def preprocess_text(self, text):
@@ -97,3 +237,8 @@ class TextPreprocessor:
 
         # If processing resulted in empty text, return cleaned version
         return processed_text if processed_text.strip() else cleaned_text
+
+    def preprocess_many(self, texts):
+        """Lazily preprocess an iterable of documents, one result per input"""
+        for text in texts:
+            yield self.preprocess_text(text)
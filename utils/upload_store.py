@@ -0,0 +1,264 @@
+import hashlib
+import logging
+import os
+import tempfile
+import time
+
+from utils.sqlite_store import SQLiteConnections
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class UploadStore:
+    """Content-addressed storage for uploaded files.
+
+    Each distinct file is stored once, as ``<folder>/<aa>/<sha256>.<ext>``,
+    so re-uploads cost no write and two candidates' ``resume.pdf`` can no
+    longer overwrite each other. A SQLite index maps original filenames to
+    digests and tracks when each blob was last uploaded. ``gc`` removes blobs
+    not uploaded for ``retention_seconds`` and then the least recently used
+    ones while the store is over ``max_bytes``.
+    """
+
+    def __init__(self, folder, index_path, max_bytes=None, retention_seconds=None,
+                 min_age_seconds=3600, gc_interval_seconds=600):
+        self.folder = folder
+        self.index_path = index_path
+        self.max_bytes = max_bytes
+        self.retention_seconds = retention_seconds
+        # Blobs uploaded this recently are never collected: a ranking job
+        # may still be reading them.
+        self.min_age_seconds = min_age_seconds
+        self.gc_interval_seconds = gc_interval_seconds
+        self._last_gc = time.monotonic()
+        self._connections = SQLiteConnections(index_path)
+        os.makedirs(folder, exist_ok=True)
+
+        conn = self._connections.get()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS blobs ('
+            ' digest TEXT PRIMARY KEY,'
+            ' ext TEXT NOT NULL,'
+            ' size INTEGER NOT NULL,'
+            ' created REAL NOT NULL,'
+            ' last_used REAL NOT NULL)'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS uploads ('
+            ' filename TEXT NOT NULL,'
+            ' digest TEXT NOT NULL,'
+            ' uploaded REAL NOT NULL,'
+            ' PRIMARY KEY (filename, digest))'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS blobs_last_used ON blobs(last_used)')
+        conn.execute('CREATE INDEX IF NOT EXISTS uploads_digest ON uploads(digest)')
+
+    def path_for(self, digest, ext):
+        return os.path.join(self.folder, digest[:2], f'{digest}{ext}')
+
+    def digest_of(self, file_path):
+        """The digest encoded in a path returned by ``save``, or None."""
+        folder, name = os.path.split(file_path)
+        digest = os.path.splitext(name)[0]
+        if (len(digest) == 64 and os.path.basename(folder) == digest[:2]
+                and os.path.dirname(os.path.abspath(folder)) == os.path.abspath(self.folder)):
+            return digest
+        return None
+
+    # ------------------------------------------------------------------ #
+    #  PUBLIC API                                                         #
+    # ------------------------------------------------------------------ #
+    def save(self, stream, filename):
+        """Store the bytes of ``stream`` uploaded as ``filename``.
+
+        Returns ``(digest, path, is_new)``. Seekable streams (what werkzeug
+        hands out) are hashed before anything is written, so a known file
+        costs no disk write at all; other streams are hashed while being
+        copied to a temporary file that is dropped if the blob exists.
+        """
+        ext = os.path.splitext(filename)[1].lower()
+        if _seekable(stream):
+            start = stream.tell()
+            digest, size = _hash_stream(stream)
+            path = self.path_for(digest, ext)
+            is_new = not os.path.exists(path)
+            if is_new:
+                stream.seek(start)
+                self._write_blob(stream, path)
+        else:
+            digest, size, path, is_new = self._write_hashing(stream, ext)
+
+        self._record(filename, digest, ext, size)
+        self.maybe_gc()
+        return digest, path, is_new
+
+    def lookup(self, filename):
+        """Path of the most recent upload named ``filename``, or None."""
+        row = self._connections.get().execute(
+            'SELECT b.digest, b.ext FROM uploads u JOIN blobs b ON b.digest = u.digest '
+            'WHERE u.filename = ? ORDER BY u.uploaded DESC LIMIT 1', (filename,)
+        ).fetchone()
+        return self.path_for(*row) if row else None
+
+    def stats(self):
+        blobs, size = self._connections.get().execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs').fetchone()
+        uploads = self._connections.get().execute('SELECT COUNT(*) FROM uploads').fetchone()[0]
+        return {'blobs': blobs, 'bytes': size, 'uploads': uploads,
+                'max_bytes': self.max_bytes, 'retention_seconds': self.retention_seconds}
+
+    def maybe_gc(self):
+        if time.monotonic() - self._last_gc >= self.gc_interval_seconds:
+            self.gc()
+
+    def gc(self):
+        """Apply the retention and size limits; returns the number of blobs removed."""
+        self._last_gc = time.monotonic()
+        conn = self._connections.get()
+        now = time.time()
+        protected = now - self.min_age_seconds
+        victims = []
+
+        if self.retention_seconds is not None:
+            victims += conn.execute(
+                'SELECT digest, ext, size FROM blobs WHERE last_used < ?',
+                (min(protected, now - self.retention_seconds),)
+            ).fetchall()
+
+        if self.max_bytes is not None:
+            total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM blobs').fetchone()[0]
+            total -= sum(size for _, _, size in victims)
+            expired = {digest for digest, _, _ in victims}
+            if total > self.max_bytes:
+                for digest, ext, size in conn.execute(
+                        'SELECT digest, ext, size FROM blobs WHERE last_used < ? '
+                        'ORDER BY last_used', (protected,)):
+                    if total <= self.max_bytes:
+                        break
+                    if digest in expired:
+                        continue
+                    victims.append((digest, ext, size))
+                    total -= size
+
+        removed = 0
+        for digest, ext, _ in victims:
+            # Re-check the age in the same statement, in case the file was
+            # uploaded again since it was selected.
+            with conn:
+                conn.execute('BEGIN IMMEDIATE')
+                deleted = conn.execute('DELETE FROM blobs WHERE digest = ? AND last_used < ?',
+                                       (digest, protected)).rowcount
+                if deleted:
+                    conn.execute('DELETE FROM uploads WHERE digest = ?', (digest,))
+            if not deleted:
+                continue
+            try:
+                os.remove(self.path_for(digest, ext))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning("Could not remove upload %s: %s", digest, e)
+            removed += 1
+        removed += self._remove_orphans(protected)
+        if removed:
+            logger.info("Upload store GC removed %d blobs", removed)
+        return removed
+
+    # ------------------------------------------------------------------ #
+    #  Internals                                                          #
+    # ------------------------------------------------------------------ #
+    def _write_blob(self, stream, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                    out.write(chunk)
+            os.replace(tmp, path)
+        except BaseException:
+            _unlink(tmp)
+            raise
+
+    def _write_hashing(self, stream, ext):
+        fd, tmp = tempfile.mkstemp(dir=self.folder, suffix='.tmp')
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    size += len(chunk)
+                    out.write(chunk)
+            path = self.path_for(digest.hexdigest(), ext)
+            if os.path.exists(path):
+                _unlink(tmp)
+                return digest.hexdigest(), size, path, False
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp, path)
+        except BaseException:
+            _unlink(tmp)
+            raise
+        return digest.hexdigest(), size, path, True
+
+    def _record(self, filename, digest, ext, size):
+        now = time.time()
+        conn = self._connections.get()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute(
+                'INSERT INTO blobs(digest, ext, size, created, last_used) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT(digest) DO UPDATE SET last_used = excluded.last_used',
+                (digest, ext, size, now, now)
+            )
+            conn.execute(
+                'INSERT INTO uploads(filename, digest, uploaded) VALUES (?, ?, ?) '
+                'ON CONFLICT(filename, digest) DO UPDATE SET uploaded = excluded.uploaded',
+                (filename, digest, now)
+            )
+
+    def _remove_orphans(self, protected):
+        """Delete blob files (and stale temp files) the index does not know."""
+        conn = self._connections.get()
+        removed = 0
+        for root, _, names in os.walk(self.folder):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    if os.path.getmtime(path) >= protected:
+                        continue
+                except OSError:
+                    continue
+                digest = self.digest_of(path)
+                if digest is not None and conn.execute(
+                        'SELECT 1 FROM blobs WHERE digest = ?', (digest,)).fetchone():
+                    continue
+                if digest is None and not name.endswith('.tmp'):
+                    continue
+                _unlink(path)
+                removed += 1
+        return removed
+
+
+def _seekable(stream):
+    try:
+        return stream.seekable()
+    except (AttributeError, ValueError):
+        return False
+
+
+def _hash_stream(stream):
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+        digest.update(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def _unlink(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass